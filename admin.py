@@ -0,0 +1,64 @@
+"""Operator view of request timings, opened with ?view=admin on the app.
+
+The view is off unless ADMIN_TOKEN is set (environment or st.secrets), and
+asks for that token once per browser session.
+
+Shows p50/p95/p99 per traced step from this process's ring buffer (see
+tracing.py) next to the cache, queue and breaker counters from Core.stats().
+"""
+import streamlit as st
+
+from core import token_matches
+from resources import core
+from tracing import tracer
+
+
+def authorized(token):
+    """Whether this session entered the operator token; asks for it if not"""
+    if st.session_state.get("admin_authorized"):
+        return True
+    entered = st.text_input("Admin token", type="password")
+    if token_matches(entered, token):
+        st.session_state.admin_authorized = True
+        st.rerun()
+    if entered:
+        st.error("Wrong token")
+    return False
+
+
+def render():
+    st.markdown("# 🛠️ Iron Lady Navigator - Admin")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        enabled = st.toggle("Tracing enabled", value=tracer.enabled,
+                            help="Applies to this server process until it restarts")
+        if enabled != tracer.enabled:
+            tracer.enabled = enabled
+    with col2:
+        if st.button("🧹 Clear samples"):
+            tracer.clear()
+    with col3:
+        st.download_button("📥 Download JSONL", data=tracer.jsonl(), file_name="traces.jsonl",
+                           mime="application/x-ndjson")
+
+    summary = tracer.summary()
+    st.markdown(f"### ⏱️ Step timings ({len(tracer.samples)} recent samples)")
+    if not summary:
+        st.info("No samples yet. Enable tracing and use the app in another tab.")
+    else:
+        rows = []
+        for name, stats in summary.items():
+            rows.append({
+                "step": name,
+                "count": stats["count"],
+                "mean ms": round(stats["mean"] * 1000, 2),
+                "p50 ms": round(stats["p50"] * 1000, 2),
+                "p95 ms": round(stats["p95"] * 1000, 2),
+                "p99 ms": round(stats["p99"] * 1000, 2),
+                "tokens": stats.get("tokens"),
+            })
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+
+    st.markdown("### 📊 Counters")
+    st.json(core().stats(), expanded=False)
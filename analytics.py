@@ -0,0 +1,150 @@
+"""Process-shared event counters for the analytics dashboard.
+
+record() bumps a counter in a buffer owned by the calling thread: no lock and
+no I/O on the request path. Only that thread ever writes the buffer. Every
+`flush_interval` seconds a background thread copies each buffer and adds
+what grew since its last copy to SQLite, which every worker process shares,
+in one transaction, so an increment racing the flush is simply picked up by
+the next one.
+
+Counts are kept per day, event, A/B version and language, plus an all-time
+rollup (day "*") maintained in the same upsert. rollup() reads today's and
+the all-time rows, a fixed number however much traffic there has been, and
+serves that snapshot for `refresh` seconds.
+"""
+import atexit
+import sqlite3
+import threading
+import time
+
+EVENTS = ("visit", "roadmap", "enroll", "whatsapp")
+ALL_TIME = "*"
+
+
+class _Buffer:
+    """Running counts recorded by one thread"""
+
+    __slots__ = ("thread", "counts", "flushed")
+
+    def __init__(self):
+        self.thread = threading.current_thread()
+        self.counts = {}   # written by the owning thread only
+        self.flushed = {}  # the counts as of the last flush, kept by the flusher
+
+
+class Analytics:
+    """Event counters by day, event, version and language, shared through SQLite"""
+
+    def __init__(self, path="analytics.db", flush_interval=1.0, refresh=2.0, clock=time.time):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.refresh = refresh
+        self.clock = clock
+        self.flushes = 0
+        self.flushed_events = 0
+        self._local = threading.local()
+        self._buffers = []
+        self._register_lock = threading.Lock()  # taken once per thread, not per event
+        self._flush_lock = threading.Lock()
+        self._snapshot = None
+        self._snapshot_at = 0.0
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS counts ("
+            " day TEXT NOT NULL, event TEXT NOT NULL, version TEXT NOT NULL, language TEXT NOT NULL,"
+            " n INTEGER NOT NULL,"
+            " PRIMARY KEY (day, event, version, language)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._run, name="analytics-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def _day(self):
+        return time.strftime("%Y-%m-%d", time.localtime(self.clock()))
+
+    def record(self, event, version, language, n=1):
+        """Count `n` occurrences of `event` (see EVENTS) for an A/B version and language"""
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self._local.buffer = _Buffer()
+            with self._register_lock:
+                self._buffers.append(buffer)
+        counts = buffer.counts
+        key = (self._day(), event, version, language)
+        counts[key] = counts.get(key, 0) + n
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Write everything counted since the last flush"""
+        with self._flush_lock:
+            with self._register_lock:
+                buffers = list(self._buffers)
+            totals = {}
+            for buffer in buffers:
+                finished = not buffer.thread.is_alive()
+                counts = buffer.counts.copy()  # atomic under the GIL
+                for key, n in counts.items():
+                    delta = n - buffer.flushed.get(key, 0)
+                    if delta:
+                        totals[key] = totals.get(key, 0) + delta
+                buffer.flushed = counts
+                if finished:
+                    # Its thread ended before the copy, so nothing more can arrive
+                    with self._register_lock:
+                        self._buffers.remove(buffer)
+            if totals:
+                self._write(totals)
+
+    def _write(self, totals):
+        rows = []
+        for (day, event, version, language), n in totals.items():
+            rows.append((day, event, version, language, n))
+            rows.append((ALL_TIME, event, version, language, n))
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO counts (day, event, version, language, n) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (day, event, version, language) DO UPDATE SET n = n + excluded.n",
+                rows,
+            )
+        self.flushes += 1
+        self.flushed_events += sum(totals.values())
+
+    def rollup(self):
+        """Today's and all-time counts: totals per event, and per event by version and by language"""
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._snapshot_at < self.refresh:
+            return self._snapshot
+        rollup = {}
+        for period in ("today", "all_time"):
+            rollup[period] = {"total": dict.fromkeys(EVENTS, 0), "by_version": {}, "by_language": {}}
+        with self._flush_lock:
+            rows = self._conn.execute(
+                "SELECT day, event, version, language, n FROM counts WHERE day IN (?, ?)",
+                (self._day(), ALL_TIME)).fetchall()
+        for day, event, version, language, n in rows:
+            period = rollup["all_time" if day == ALL_TIME else "today"]
+            period["total"][event] = period["total"].get(event, 0) + n
+            for group, value in (("by_version", version), ("by_language", language)):
+                bucket = period[group].setdefault(value, dict.fromkeys(EVENTS, 0))
+                bucket[event] = bucket.get(event, 0) + n
+        self._snapshot, self._snapshot_at = rollup, now
+        return rollup
+
+    def stats(self):
+        """Flushes so far, events written and threads currently buffering"""
+        with self._register_lock:
+            buffers = len(self._buffers)
+        return {"flushes": self.flushes, "flushed_events": self.flushed_events, "thread_buffers": buffers}
+
+    def close(self):
+        """Stop the flusher and write everything still buffered"""
+        if self._flusher.is_alive():
+            self._stop.set()
+            self._flusher.join()
+            self.flush()
@@ -0,0 +1,185 @@
+"""Similarity cache for follow-up answers, shared across users.
+
+Questions are turned into unit-length term vectors. A lookup returns a cached
+answer when a previous question for the same recommended program and
+language is at least `threshold` cosine-similar; the program stands in for a
+coarse goal class, since the recommender picked it from the goal. Storing a
+near-duplicate of a cached question replaces it rather than adding a copy.
+Entries are evicted least recently used once the estimated memory budget is
+exceeded, and can be persisted to SQLite so they survive restarts.
+
+Answers are personalised: the asker's name is swapped for a placeholder
+before storing and filled back in for the next user. An answer whose name
+cannot be found, or whose name is also persona or catalog text
+(roadmap_cache.name_collides), is not cached. The goal as typed is swapped
+the same way, so each user sees their own wording of it.
+"""
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+
+from faq_search import tokenize
+from roadmap_cache import name_collides
+
+NAME_PLACEHOLDER = "⟦NAME⟧"
+GOAL_PLACEHOLDER = "⟦GOAL⟧"
+ENTRY_OVERHEAD = 200  # rough bytes per entry beyond its strings and vector
+SCHEMA_VERSION = 2  # bumped when stored answers stop being safe to share under the current rules
+
+
+def question_vector(question):
+    """Unit-length term-frequency vector of a question"""
+    counts = Counter(tokenize(question))
+    norm = sum(c * c for c in counts.values()) ** 0.5
+    return {term: c / norm for term, c in counts.items()} if norm else {}
+
+
+def _entry_size(question, answer, vector):
+    return ENTRY_OVERHEAD + sys.getsizeof(question) + sys.getsizeof(answer) + 100 * len(vector)
+
+
+def _swap(text, value, placeholder):
+    value = value.strip()
+    if not value:
+        return text, 0
+    return re.subn(r"(?<!\w)" + re.escape(value) + r"(?!\w)", placeholder, text, flags=re.IGNORECASE)
+
+
+class AnswerCache:
+    """Thread-safe semantic cache of follow-up answers"""
+
+    def __init__(self, threshold=0.85, max_bytes=8 * 1024 * 1024, path=None, ttl=7 * 86400):
+        self.threshold = threshold
+        self.max_bytes = max_bytes
+        self.path = path
+        self.ttl = ttl
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # id -> (bucket, question, vector, answer, size), oldest first
+        self._terms = defaultdict(lambda: defaultdict(set))  # bucket -> term -> ids
+        self._next_id = 0
+        if path:
+            self._load()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            # Older answers may hold a name that was never swapped out, or be keyed by goal
+            conn.execute("DROP TABLE IF EXISTS answers")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " program TEXT, language TEXT, question TEXT, answer TEXT, created REAL,"
+            " PRIMARY KEY (program, language, question))"
+        )
+        return conn
+
+    def _load(self):
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT program, language, question, answer FROM answers WHERE created > ? ORDER BY created",
+                (time.time() - self.ttl,),
+            ).fetchall()
+        finally:
+            conn.close()
+        for program, language, question, answer in rows:
+            self._insert((program, language), question, answer)
+
+    def _closest(self, bucket, vector):
+        """Id and cosine similarity of the most similar cached question in a bucket"""
+        index = self._terms.get(bucket, {})
+        candidates = set()
+        for term in vector:
+            candidates |= index.get(term, set())
+        best_id, best_score = None, 0.0
+        for entry_id in candidates:
+            cached = self._entries[entry_id][2]
+            score = sum(w * cached.get(term, 0.0) for term, w in vector.items())
+            if score > best_score:
+                best_id, best_score = entry_id, score
+        return best_id, best_score
+
+    def _insert(self, bucket, question, answer):
+        """Add an entry, replacing a near-duplicate question; returns the replaced question or None"""
+        vector = question_vector(question)
+        if not vector:
+            return None
+        replaced = None
+        best_id, best_score = self._closest(bucket, vector)
+        if best_id is not None and best_score >= self.threshold:
+            replaced = self._entries[best_id][1]
+            self._remove(best_id)
+        entry_id = self._next_id
+        self._next_id += 1
+        size = _entry_size(question, answer, vector)
+        self._entries[entry_id] = (bucket, question, vector, answer, size)
+        for term in vector:
+            self._terms[bucket][term].add(entry_id)
+        self.bytes += size
+        while self.bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+        return replaced
+
+    def _remove(self, entry_id):
+        bucket, _, vector, _, size = self._entries.pop(entry_id)
+        for term in vector:
+            ids = self._terms[bucket][term]
+            ids.discard(entry_id)
+            if not ids:
+                del self._terms[bucket][term]
+        self.bytes -= size
+
+    def get(self, question, program, language, name="", goal=""):
+        """Cached answer for a similar question about the same program, personalised, or None"""
+        vector = question_vector(question)
+        with self._lock:
+            best_id, best_score = self._closest((program, language), vector)
+            if best_id is None or best_score < self.threshold:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            answer = self._entries[best_id][3]
+        return answer.replace(NAME_PLACEHOLDER, name).replace(GOAL_PLACEHOLDER, goal)
+
+    def put(self, question, program, language, answer, name="", goal=""):
+        """Store an answer given to `name`; returns False if it was not cached.
+
+        An answer that does not contain the name verbatim is skipped: the
+        model may have transliterated or shortened it, and it would leak. So
+        is one for a name like "Asha", which the placeholder would take over
+        in the persona's own lines.
+        """
+        if name_collides(name):
+            return False
+        answer, _ = _swap(answer, goal, GOAL_PLACEHOLDER)
+        answer, name_count = _swap(answer, name, NAME_PLACEHOLDER)
+        if name.strip() and name_count == 0:
+            return False
+        with self._lock:
+            replaced = self._insert((program, language), question, answer)
+        if self.path:
+            conn = self._connect()
+            try:
+                with conn:
+                    if replaced is not None:
+                        conn.execute("DELETE FROM answers WHERE program = ? AND language = ? AND question = ?",
+                                     (program, language, replaced))
+                    conn.execute(
+                        "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?)",
+                        (program, language, question, answer, time.time()),
+                    )
+            finally:
+                conn.close()
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.bytes, "hits": self.hits, "misses": self.misses}
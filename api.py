@@ -0,0 +1,295 @@
+"""Headless JSON API over the same core as the Streamlit app.
+
+Run it with any ASGI server, e.g.:
+    uvicorn api:app --workers 4
+
+Endpoints:
+    GET  /health
+    GET  /stats     cache, coalescing and follow-up counters for this worker
+    GET  /metrics   traced step timings in Prometheus text format (config.TRACING)
+    POST /roadmap   {"name", "role", "challenge", "goal", "version": "A", "language": "English", "stream": false}
+    POST /followup  {"question", "name", "goal", "program", "language": "English"}
+    GET  /faqs?q=emi&limit=5&language=English
+    POST /leads     {"name", "role", "challenge", "goal", "program", "contact"}
+
+Blocking work (SQLite, the Groq SDK) runs on a thread pool sized by
+config.API["threads"]; the event loop only parses and routes. With
+"stream": false, /roadmap returns the markdown roadmap and, under "structured",
+the same roadmap as JSON fields (roadmap_format.SCHEMA). With "stream": true it
+sends text/plain markdown sections as the model completes them, with the
+recommendation in the X-Program, X-Alternate and X-Match-Score headers; if
+generation fails after the first byte, the body ends with STREAM_ERROR.
+
+/stats and /metrics are operator endpoints: they answer 404 unless the
+ADMIN_TOKEN environment variable is set, and then require
+"Authorization: Bearer <token>".
+"""
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, quote
+
+import config
+from core import Core, env_admin_token, token_matches
+from ratelimit import RateLimited
+from recommender import recommend
+from tracing import tracer
+
+PROFILE_FIELDS = ("name", "role", "challenge", "goal")
+JSON_HEADERS = [(b"content-type", b"application/json")]
+# Last section of a streamed roadmap that failed after its status was sent
+STREAM_ERROR = "\n\n### ⚠️ Roadmap interrupted - please try again\n"
+
+
+class HTTPError(Exception):
+    """Turned into a JSON {"error": ...} response with the given status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _profile(body):
+    missing = [f for f in PROFILE_FIELDS if not str(body.get(f, "")).strip()]
+    if missing:
+        raise HTTPError(400, f"missing fields: {', '.join(missing)}")
+    return {f: str(body[f]).strip() for f in PROFILE_FIELDS}
+
+
+def _language(body):
+    language = body.get("language", "English")
+    if language not in config.LANGUAGES:
+        raise HTTPError(400, f"unknown language: {language}")
+    return language
+
+
+def _version(body):
+    version = body.get("version", "A")
+    if version not in ("A", "B"):
+        raise HTTPError(400, f"unknown version: {version}")
+    return version
+
+
+async def _read_body(receive, limit):
+    body = b""
+    more = True
+    while more:
+        message = await receive()
+        body += message.get("body", b"")
+        more = message.get("more_body", False)
+        if len(body) > limit:
+            raise HTTPError(413, "request body too large")
+    if not body:
+        return {}
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise HTTPError(400, "body is not valid JSON")
+    if not isinstance(data, dict):
+        raise HTTPError(400, "body must be a JSON object")
+    return data
+
+
+async def _send_json(send, status, payload):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    await send({"type": "http.response.start", "status": status,
+                "headers": JSON_HEADERS + [(b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+
+class API:
+    """ASGI application; one instance (and one Core) per worker process"""
+
+    def __init__(self, core=None, threads=None, admin_token=None):
+        self._core = core
+        self.admin_token = admin_token or env_admin_token()
+        self.executor = ThreadPoolExecutor(max_workers=threads or config.API["threads"],
+                                           thread_name_prefix="api")
+        self.routes = {
+            ("GET", "/health"): self.health,
+            ("GET", "/stats"): self.stats,
+            ("GET", "/metrics"): self.metrics,
+            ("POST", "/roadmap"): self.roadmap,
+            ("POST", "/followup"): self.followup,
+            ("GET", "/faqs"): self.faqs,
+            ("POST", "/leads"): self.leads,
+        }
+        self.operator_routes = {("GET", "/stats"), ("GET", "/metrics")}
+
+    @property
+    def core(self):
+        if self._core is None:
+            self._core = Core()
+        return self._core
+
+    def _run(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def _pump(self, chunks):
+        """Iterate a blocking generator on one pool thread for its whole life.
+
+        Hopping threads per chunk would deadlock once every pool thread waits
+        for an LLM connection held by a stream that needs a thread to advance.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        stop = threading.Event()
+        done = object()
+
+        def run():
+            try:
+                for piece in chunks:
+                    loop.call_soon_threadsafe(queue.put_nowait, piece)
+                    if stop.is_set():
+                        break
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                chunks.close()
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        self.executor.submit(run)
+        try:
+            while True:
+                piece = await queue.get()
+                if piece is done:
+                    return
+                if isinstance(piece, Exception):
+                    raise piece
+                yield piece
+        finally:
+            stop.set()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        started = False
+
+        async def send_tracked(message):
+            nonlocal started
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            handler = self.routes.get((scope["method"], scope["path"]))
+            if handler is None:
+                allowed = any(path == scope["path"] for _, path in self.routes)
+                raise HTTPError(405 if allowed else 404, "method not allowed" if allowed else "not found")
+            if (scope["method"], scope["path"]) in self.operator_routes:
+                self._authorize(scope)
+            body = await _read_body(receive, config.API["max_body"])
+            query = {k: v[-1] for k, v in parse_qs(scope.get("query_string", b"").decode("utf-8")).items()}
+            result = await handler(body, query, send_tracked)
+            if result is not None:
+                await _send_json(send_tracked, *result)
+        except Exception as e:
+            if started:
+                raise  # a second response start would break ASGI; let the server drop the connection
+            if isinstance(e, HTTPError):
+                await _send_json(send, e.status, {"error": str(e)})
+            elif isinstance(e, RateLimited):
+                await _send_json(send, 429, {"error": str(e)})
+            else:
+                await _send_json(send, 502, {"error": f"upstream error: {e}"})
+
+    def _authorize(self, scope):
+        """Require the operator token; the endpoint does not exist when none is configured"""
+        if not self.admin_token:
+            raise HTTPError(404, "not found")
+        auth = dict(scope.get("headers", [])).get(b"authorization", b"").decode("latin-1")
+        scheme, _, token = auth.partition(" ")
+        if scheme.lower() != "bearer" or not token_matches(token.strip(), self.admin_token):
+            raise HTTPError(401, "operator token required")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.core  # build caches and indexes before the first request
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._core is not None:
+                    await self._run(self._core.lead_store.flush)
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def health(self, body, query, send):
+        return 200, {"status": "ok"}
+
+    async def stats(self, body, query, send):
+        return 200, await self._run(self.core.stats)
+
+    async def metrics(self, body, query, send):
+        text = tracer.prometheus().encode("utf-8")
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/plain; version=0.0.4; charset=utf-8"),
+            (b"content-length", str(len(text)).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": text})
+
+    async def roadmap(self, body, query, send):
+        user_data = _profile(body)
+        version, language = _version(body), _language(body)
+        if not body.get("stream"):
+            return 200, await self._run(self.core.roadmap, user_data, version, language)
+
+        rec = recommend(user_data)
+        chunks = self.core.roadmap_chunks(user_data, version, language, rec)
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"x-program", quote(rec.program).encode()),
+            (b"x-alternate", quote(rec.alternate).encode()),
+            (b"x-match-score", str(rec.score).encode()),
+        ]})
+        pieces = self._pump(chunks)
+        try:
+            while True:
+                try:
+                    piece = await pieces.__anext__()
+                except StopAsyncIteration:
+                    break
+                except Exception:
+                    # The status is already sent: say so in the body and end it
+                    await send({"type": "http.response.body", "body": STREAM_ERROR.encode("utf-8")})
+                    return
+                await send({"type": "http.response.body", "body": piece.encode("utf-8"), "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            await pieces.aclose()  # on a disconnect, stops the pool thread and the upstream LLM stream
+
+    async def followup(self, body, query, send):
+        question = str(body.get("question", "")).strip()
+        program = body.get("program")
+        if not question:
+            raise HTTPError(400, "missing fields: question")
+        if program not in config.PROGRAMS_DB:
+            raise HTTPError(400, f"unknown program: {program}")
+        user_data = {"name": str(body.get("name", "")), "goal": str(body.get("goal", ""))}
+        result = await self._run(self.core.answer_followup, question, user_data, program, _language(body))
+        return 200, result
+
+    async def faqs(self, body, query, send):
+        try:
+            limit = max(1, min(int(query.get("limit", 5)), 50))
+        except ValueError:
+            raise HTTPError(400, "limit must be an integer")
+        term, language = query.get("q", ""), _language(query)
+        if not term:
+            return 200, {"results": [dict(faq, score=None) for faq in self.core.localized_faqs(language)[:limit]]}
+        results = self.core.search_faqs(term, limit, language)
+        return 200, {"results": [dict(faq, score=round(score, 4)) for score, faq in results]}
+
+    async def leads(self, body, query, send):
+        lead = _profile(body)
+        lead["program"] = body.get("program") or recommend(lead).program
+        lead["contact"] = str(body.get("contact") or "").strip() or None  # email or phone; identifies repeat leads
+        await self._run(self.core.save_lead, lead)
+        return 202, {"queued": True, "program": lead["program"]}
+
+
+app = API()
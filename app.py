@@ -1,22 +1,20 @@
 import streamlit as st
-import json
-from groq import Groq
 import os
-import time
+import sys
+import uuid
 
 from datetime import datetime
+import catalog
 import config
-from utils import get_whatsapp_link, generate_share_text, calculate_match_score
-from dotenv import load_dotenv
-import csv
+from utils import get_whatsapp_link, generate_share_text
+from recommender import recommend
+from resources import core, get_admin_token, page_css, preload_llm
+from tracing import tracer
 
+EXPERIMENT = "roadmap_tone"
 
-# Load environment variables
 
-# Load environment variables
-load_dotenv()
-
-# SAFETY: Check for API Key
+# SAFETY: Check for API Key (resources loads .env once per process)
 if not os.getenv("GROQ_API_KEY"):
     st.error("🔑 Please set GROQ_API_KEY in your .env file")
     st.stop()
@@ -25,92 +23,61 @@ if not os.getenv("GROQ_API_KEY"):
 # HELPER FUNCTIONS
 # -------------------------------------------------------------------------------------
 def save_lead(data):
-    """Save lead data to CSV"""
-    file_exists = os.path.isfile("leads.csv")
-    with open("leads.csv", "a", newline="") as f:
-        writer = csv.writer(f)
-        if not file_exists:
-            writer.writerow(["Timestamp", "Name", "Role", "Challenge", "Goal", "Program"])
-        writer.writerow([
-            datetime.now(), 
-            data['name'], 
-            data['role'], 
-            data['challenge'], 
-            data['goal'],
-            data.get('program', 'N/A')
-        ])
-
-@st.cache_data(ttl=3600)
-def generate_roadmap(user_data, version, language):
-    """Generate roadmap using AI with caching"""
-    try:
-        # Robust API Key Retrieval
-        # Priority: 1. Streamlit Cloud Secrets (st.secrets) 2. Environment Variable (os.getenv)
-        api_key = None
-        if "GROQ_API_KEY" in st.secrets:
-            api_key = st.secrets["GROQ_API_KEY"]
-        else:
-            api_key = os.getenv("GROQ_API_KEY")
-            
-        if not api_key:
-            raise ValueError("GROQ_API_KEY not found in secrets or environment.")
-
-        client = Groq(api_key=api_key)
-        
-        lang = config.LANGUAGES[language]["name"]
-        tone = "urgent sales with FOMO and scarcity" if version == "B" else "warm supportive mentoring"
-
-        prompt = f"""
-You are Asha, an AI Leadership Architect for Iron Lady. Speak in {lang}.
-
-User Profile:
-- Name: {user_data['name']}
-- Current Stage: {user_data['role']}
-- Challenge: {user_data['challenge']}
-- Goal: {user_data['goal']}
-
-Available Programs:
-{json.dumps(config.PROGRAMS_DB, indent=2)}
-
-Tone: {tone}
-
-Create a personalized roadmap with:
-
-1. **Best Program Match** (with % match score 85-95%)
-2. **Why This Program** (emotional connection to their goal)
-3. **Alternate Option** (if primary doesn't fit)
-4. **3-Step Transformation Plan**
-5. **Expected Outcomes** (specific, measurable)
-6. **Comparison Table** (Best vs Alternate - Duration, Focus, Price)
-7. **Emotional CTA** (call to action)
-
-Format with markdown. Be specific to their profile. Use their name.
-"""
-        out = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=1200
-        )
-        return out.choices[0].message.content
-    except Exception as e:
-        # DEBUG: Show actual error to the user
-        st.error(f"⚠️ Debug Error: {str(e)}")
-        
-        # FALLBACK RESPONSE
-        return f"""
-### ⚠️ AI Service Busy - Using Backup Roadmap
-
-**Recommended Program: Leadership Accelerator**
-
-Based on your goal to "{user_data['goal']}", this 6-month program is the best fit.
-
-*   **Match Score**: 92%
-*   **Focus**: Strategic Leadership & Team Management
-*   **Outcome**: Executive Presence & C-Suite Readiness
-
-Please contact our counselors for a more detailed plan.
-"""
+    """Queue lead data for the background writer"""
+    core().save_lead(data)
+
+def show_error(e):
+    """Surface an LLM failure; the core falls back to the local roadmap.
+
+    The error itself goes to the server log, never to the page.
+    """
+    print(f"roadmap: LLM call failed: {e!r}", file=sys.stderr)
+    st.warning(catalog.get(st.session_state.language).copy("busy_warning"))
+
+def queue_notice(placeholder):
+    """on_wait callback showing the user's place in the shared LLM queue"""
+    localized = catalog.get(st.session_state.language)
+
+    def show(position, eta):
+        placeholder.info(localized.copy("queue_notice", position=position, seconds=f"{eta:.0f}"))
+    return show
+
+def generate_roadmap(user_data, version, language, rec):
+    """Render the roadmap, streaming it from the AI on a cache miss.
+
+    Returns (text, timings) where timings holds time-to-first-token and
+    total latency in seconds, and "roadmap", the structured roadmap. A
+    roadmap already generated while the user was on the form is reused.
+    """
+    timings = {}
+    notice = st.empty()
+
+    def fresh():
+        return core().roadmap_chunks(user_data, version, language, rec, timings, show_error, queue_notice(notice))
+
+    with tracer.span("app.roadmap_render") as span:
+        spec = core().speculator.claim(st.session_state.session_id, user_data, version, language)
+        text = st.write_stream(spec.stream(fresh, timings) if spec else fresh())
+        span.set(cached=timings.get("cached", False), degraded=timings.get("degraded", False),
+                 speculative=timings.get("speculative", False))
+    notice.empty()
+    return text, timings
+
+def translate_roadmap(language):
+    """Stream the roadmap already shown into another language: (text, timings).
+
+    The structured roadmap is translated, not generated again; translations
+    are cached, so the next user with the same roadmap gets it instantly.
+    """
+    timings = {}
+    notice = st.empty()
+    with tracer.span("app.roadmap_translate") as span:
+        text = st.write_stream(core().localized_roadmap_chunks(
+            st.session_state.roadmap_timings["roadmap"], st.session_state.user_data['name'], language,
+            timings, show_error, queue_notice(notice)))
+        span.set(cached=timings.get("cached", False), degraded=timings.get("degraded", False))
+    notice.empty()
+    return text, timings
 
 
 # -------------------------------------------------------------------------------------
@@ -123,6 +90,14 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# Operator view: step timings and counters for this server process; off unless ADMIN_TOKEN is set
+admin_token = get_admin_token() if st.query_params.get("view") == "admin" else None
+if admin_token:
+    import admin
+    if admin.authorized(admin_token):
+        admin.render()
+    st.stop()
+
 # -------------------------------------------------------------------------------------
 # SESSION STATE INITIALIZATION
 # -------------------------------------------------------------------------------------
@@ -130,277 +105,124 @@ if "stage" not in st.session_state: st.session_state.stage = 0
 if "user_data" not in st.session_state: st.session_state.user_data = {}
 if "ai_response" not in st.session_state: st.session_state.ai_response = ""
 if "progress" not in st.session_state: st.session_state.progress = 25
-if "ab_test_version" not in st.session_state: st.session_state.ab_test_version = "A"
 if "language" not in st.session_state: st.session_state.language = "English"
-if "visits" not in st.session_state: st.session_state.visits = 0
-if "conversions" not in st.session_state: st.session_state.conversions = 0
 if "chat_history" not in st.session_state: st.session_state.chat_history = []
 if "recommended_program" not in st.session_state: st.session_state.recommended_program = ""
 if "match_score" not in st.session_state: st.session_state.match_score = 0
-
-st.session_state.visits += 1
-
-# -------------------------------------------------------------------------------------
-# LOAD DATA
-# -------------------------------------------------------------------------------------
-with open("faqs.json", "r", encoding="utf-8") as f:
-    FAQS = json.load(f)
+if "roadmap_timings" not in st.session_state: st.session_state.roadmap_timings = {}
+if "localized_roadmaps" not in st.session_state: st.session_state.localized_roadmaps = {}
+if "session_id" not in st.session_state:
+    # One visit and one A/B variant per browser session; reruns and "Start New Assessment" keep both
+    st.session_state.session_id = uuid.uuid4().hex
+    st.session_state.ab_test_version = core().experiments.assign(EXPERIMENT, st.session_state.session_id)
+    # ?variant=B previews a variant; such sessions stay out of the experiment's results
+    st.session_state.ab_forced = st.query_params.get("variant") in config.EXPERIMENTS["experiments"][EXPERIMENT]
+    if st.session_state.ab_forced:
+        st.session_state.ab_test_version = st.query_params["variant"]
+    core().analytics.record("visit", st.session_state.ab_test_version, st.session_state.language)
+
+# Reruns cut short by st.rerun()/st.stop() are not recorded
+rerun_span = tracer.span("app.rerun", stage=st.session_state.stage)
 
 # -------------------------------------------------------------------------------------
 # CUSTOM CSS
 # -------------------------------------------------------------------------------------
-st.markdown("""
-<style>
-@import url('https://fonts.googleapis.com/css2?family=Playfair+Display:wght@400;600;700&family=Lato:wght@300;400;700&display=swap');
-
-:root {
-    --primary: #881337;
-    --gold: #fbbf24;
-    --glass: rgba(255, 255, 255, 0.75);
-    --pink: #fb7185;
-}
-
-.stApp {
-    background: linear-gradient(120deg, #fdf2f8, #fce7f3, #fff1f2);
-    font-family: 'Lato', sans-serif;
-}
-
-h1, h2, h3, .big-font {
-    font-family: 'Playfair Display', serif;
-    color: var(--primary);
-}
-
-.glass-card {
-    background: var(--glass);
-    backdrop-filter: blur(12px);
-    border-radius: 20px;
-    border: 1px solid rgba(255, 255, 255, 0.6);
-    padding: 2rem;
-    box-shadow: 0 8px 32px rgba(136, 19, 55, 0.05);
-    margin-bottom: 1.5rem;
-    transition: all 0.3s ease;
-}
-.glass-card:hover { 
-    transform: translateY(-5px); 
-    border-color: #f472b6;
-    box-shadow: 0 12px 40px rgba(136, 19, 55, 0.1);
-}
-
-.stButton > button {
-    background: linear-gradient(to right, #be123c, #fb7185);
-    color: white;
-    border-radius: 30px;
-    border: none;
-    padding: 12px 28px;
-    font-weight: bold;
-    letter-spacing: 1px;
-    box-shadow: 0 4px 14px rgba(190, 18, 60, 0.4);
-    transition: all 0.3s ease;
-}
-.stButton > button:hover {
-    box-shadow: 0 6px 20px rgba(190, 18, 60, 0.6);
-    transform: scale(1.05);
-}
-
-.progress-container {
-    background: rgba(255,255,255,0.8);
-    border-radius: 15px;
-    padding: 1.5rem;
-    margin: 1rem 0;
-    box-shadow: 0 4px 12px rgba(0,0,0,0.05);
-}
-.progress-bar {
-    height: 12px;
-    background: linear-gradient(to right, #fbbf24, #f59e0b);
-    border-radius: 10px;
-    transition: width 0.5s ease;
-    box-shadow: 0 2px 8px rgba(251, 191, 36, 0.3);
-}
-
-.match-score {
-    background: linear-gradient(135deg, #fff, #fef3c7);
-    border-radius: 50%;
-    width: 140px;
-    height: 140px;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    font-size: 2.5rem;
-    border: 6px solid #fb7185;
-    margin: auto;
-    font-weight: bold;
-    color: var(--primary);
-    box-shadow: 0 8px 24px rgba(251, 113, 133, 0.3);
-}
-
-.success-story {
-    background: linear-gradient(135deg, #fef3c7, #fde68a);
-    padding: 1.5rem;
-    border-radius: 15px;
-    border-left: 5px solid var(--gold);
-    margin: 1rem 0;
-    box-shadow: 0 4px 12px rgba(0,0,0,0.05);
-}
-
-.stat-box {
-    background: white;
-    padding: 1.5rem;
-    border-radius: 15px;
-    text-align: center;
-    box-shadow: 0 4px 12px rgba(0,0,0,0.05);
-    border: 2px solid #fce7f3;
-}
-
-.chat-message {
-    background: white;
-    padding: 1rem;
-    border-radius: 15px;
-    margin: 0.5rem 0;
-    border-left: 4px solid var(--pink);
-    box-shadow: 0 2px 8px rgba(0,0,0,0.05);
-}
-
-.welcome-banner {
-    background: linear-gradient(135deg, #881337, #be123c);
-    color: white;
-    padding: 2rem;
-    border-radius: 20px;
-    text-align: center;
-    margin-bottom: 2rem;
-    box-shadow: 0 8px 24px rgba(136, 19, 55, 0.3);
-}
-
-.feature-badge {
-    display: inline-block;
-    background: var(--gold);
-    color: var(--primary);
-    padding: 0.5rem 1rem;
-    border-radius: 20px;
-    font-weight: bold;
-    margin: 0.25rem;
-    font-size: 0.9rem;
-}
-
-.comparison-table {
-    width: 100%;
-    border-collapse: separate;
-    border-spacing: 0;
-    margin: 1rem 0;
-}
-.comparison-table th {
-    background: var(--primary);
-    color: white;
-    padding: 1rem;
-    text-align: left;
-}
-.comparison-table td {
-    background: white;
-    padding: 1rem;
-    border-bottom: 1px solid #fce7f3;
-}
-.comparison-table tr:hover td {
-    background: #fef3c7;
-}
-</style>
-""", unsafe_allow_html=True)
+with tracer.span("app.css"):
+    st.markdown(page_css(), unsafe_allow_html=True)
+
+# Page copy in the chosen language, from the prebuilt catalog
+localized = catalog.get(st.session_state.language)
 
 # -------------------------------------------------------------------------------------
 # HEADER
 # -------------------------------------------------------------------------------------
 col1, col2, col3 = st.columns([2, 1, 1])
 with col1:
-    st.markdown("# 👑 Iron Lady Navigator")
-    st.markdown("### AI-Powered Leadership Path Designer")
+    st.markdown(f"# {localized.copy('app_title')}")
+    st.markdown(f"### {localized.copy('app_subtitle')}")
 with col2:
     st.image("https://cdn-icons-png.flaticon.com/512/6997/6997662.png", width=90)
 with col3:
-    st.selectbox("🌐 Language", config.LANGUAGES.keys(), key="lang_select",
+    st.selectbox(localized.copy("language_label"), config.LANGUAGES.keys(), key="lang_select",
                  on_change=lambda: setattr(st.session_state, "language", st.session_state.lang_select))
 
 # -------------------------------------------------------------------------------------
 # STAGE 0: WELCOME & DATA COLLECTION
 # -------------------------------------------------------------------------------------
 if st.session_state.stage == 0:
-    
     # Welcome Banner
-    st.markdown("""
+    st.markdown(f"""
     <div class="welcome-banner">
-        <h2 style="color:white">🎯 Transform Your Leadership Journey in 3 Minutes</h2>
+        <h2 style="color:white">{localized.copy('welcome_title')}</h2>
         <p style="font-size:1.1rem; margin-top:1rem;">
-            Asha, your AI Leadership Architect, will analyze your profile and design a personalized roadmap to success.
+            {localized.copy('welcome_text')}
         </p>
         <div style="margin-top:1.5rem;">
-            <span class="feature-badge">🤖 AI-Powered</span>
-            <span class="feature-badge">🌍 Multi-Language</span>
-            <span class="feature-badge">📊 92% Success Rate</span>
-            <span class="feature-badge">⚡ Instant Results</span>
+            <span class="feature-badge">{localized.copy('badge_ai')}</span>
+            <span class="feature-badge">{localized.copy('badge_languages')}</span>
+            <span class="feature-badge">{localized.copy('badge_success')}</span>
+            <span class="feature-badge">{localized.copy('badge_instant')}</span>
         </div>
     </div>
     """, unsafe_allow_html=True)
 
     # Main Form
     st.markdown('<div class="glass-card">', unsafe_allow_html=True)
-    st.markdown("### 🌸 Tell Asha About Yourself")
+    st.markdown(f"### {localized.copy('form_title')}")
 
     col_a, col_b = st.columns(2)
     with col_a:
-        name = st.text_input("👩 Your Name", placeholder="Anjali Sharma")
-        role = st.selectbox("📊 Current Stage", ["Student", "Professional", "Manager", "Career Break", "Entrepreneur"])
+        name = st.text_input(localized.copy("name_label"), placeholder=localized.copy("name_placeholder"))
+        contact = st.text_input(localized.copy("contact_label"), placeholder=localized.copy("contact_placeholder"))
+        # Options are shown translated but keep their English values for the recommender and leads
+        role = st.selectbox(localized.copy("stage_label"), config.STAGES, format_func=localized.text)
     with col_b:
-        challenge = st.selectbox("⚠️ Biggest Challenge", 
-                                 ["Low Confidence", "Stagnant Career", "Return to Work", "Public Speaking", 
-                                  "Work-Life Balance", "Leadership Skills"])
-        goal = st.text_area("🎯 Your 6-Month Goal", 
-                           placeholder="I want to become a confident team leader and get promoted to senior management...", 
+        challenge = st.selectbox(localized.copy("challenge_label"), config.CHALLENGES, format_func=localized.text)
+        goal = st.text_area(localized.copy("goal_label"), 
+                           placeholder=localized.copy("goal_placeholder"), 
                            height=100)
 
     st.markdown('</div>', unsafe_allow_html=True)
 
+    # Warm up the LLM client import in the background; stage 0 itself never calls the LLM
+    if config.PRELOAD_LLM:
+        preload_llm()
+
      # CTA Button
-    if st.button("✨ Get My Free AI-Powered Roadmap", use_container_width=True):
+    if st.button(localized.copy("cta_button"), use_container_width=True):
         if goal and name:
             st.session_state.user_data = {
                 "name": name, 
                 "role": role, 
                 "challenge": challenge, 
                 "goal": goal,
+                "contact": contact.strip() or None,
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             }
             st.session_state.stage = 1
             st.session_state.progress = 50
             st.rerun()
         else:
-            st.warning("⚠️ Please fill in your name and goal to continue.")
+            st.warning(localized.copy("form_incomplete"))
+    elif name and goal:
+        # Start the roadmap while the user is still on the form; stage 1 reuses it if nothing changes
+        core().speculator.speculate(st.session_state.session_id,
+                                    {"name": name, "role": role, "challenge": challenge, "goal": goal},
+                                    st.session_state.ab_test_version, st.session_state.language)
 
     # Success Stories Preview
     st.markdown('<div class="glass-card">', unsafe_allow_html=True)
-    st.markdown("### 🌟 Real Transformation Stories")
+    st.markdown(f"### {localized.copy('stories_title')}")
     
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.markdown("""
-        <div class="success-story">
-            <strong>Priya M. - Software Engineer</strong><br>
-            "From coding silently to leading a team of 12 in 6 months!"<br>
-            <small>📍 Bangalore • Leadership Accelerator</small>
-        </div>
-        """, unsafe_allow_html=True)
-    with col2:
-        st.markdown("""
-        <div class="success-story">
-            <strong>Sneha K. - Career Break (5 yrs)</strong><br>
-            "Landed Senior Manager role after restart program!"<br>
-            <small>📍 Mumbai • Career Restart Launchpad</small>
-        </div>
-        """, unsafe_allow_html=True)
-    with col3:
-        st.markdown("""
-        <div class="success-story">
-            <strong>Anita R. - Entrepreneur</strong><br>
-            "Scaled my startup from 2 to 45 employees with confidence!"<br>
-            <small>📍 Delhi • 10X Masterclass</small>
-        </div>
-        """, unsafe_allow_html=True)
+    for column, story in zip(st.columns(3), ["story_priya", "story_sneha", "story_anita"]):
+        with column:
+            st.markdown(f"""
+            <div class="success-story">
+                <strong>{localized.copy(story)}</strong><br>
+                "{localized.copy(story + '_quote')}"<br>
+                <small>{localized.copy(story + '_where')}</small>
+            </div>
+            """, unsafe_allow_html=True)
     
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -410,101 +232,141 @@ if st.session_state.stage == 0:
 # STAGE 1: AI RECOMMENDATION & ENGAGEMENT
 # -------------------------------------------------------------------------------------
 elif st.session_state.stage == 1:
-
     # Sidebar Analytics
     with st.sidebar:
         st.markdown("### 📊 Live Analytics Dashboard")
-        st.metric("Total Visits Today", st.session_state.visits)
-        st.metric("Conversions", st.session_state.conversions)
-        conversion_rate = (st.session_state.conversions / st.session_state.visits * 100) if st.session_state.visits > 0 else 0
+        today = core().analytics.rollup()["today"]["total"]
+        st.metric("Total Visits Today", today["visit"])
+        st.metric("Conversions", today["enroll"])
+        conversion_rate = (today["enroll"] / today["visit"] * 100) if today["visit"] > 0 else 0
         st.metric("Conversion Rate", f"{conversion_rate:.1f}%")
+        st.caption(f"🗺️ {today['roadmap']} roadmaps • 💬 {today['whatsapp']} WhatsApp chats started today")
         
-        st.markdown("---")
-        st.markdown("### 🧪 A/B Test Control")
-        old_version = st.session_state.ab_test_version
-        st.session_state.ab_test_version = st.radio(
-            "Version", ["A", "B"], 
-            index=0 if st.session_state.ab_test_version == "A" else 1,
-            help="A: Warm mentoring | B: Urgent FOMO"
-        )
-        if old_version != st.session_state.ab_test_version:
-            st.session_state.ai_response = ""  # Reset to regenerate
-            st.rerun()
-
-    # Generate AI Recommendation (Once)
-    # Generate AI Recommendation (Once)
-    if st.session_state.ai_response == "":
+        followups = core().followup_stats.snapshot()
+        if followups["faq_answers"] or followups["cache_answers"] or followups["llm_answers"]:
+            st.metric("Questions Answered without LLM", f"{followups['no_llm_rate'] * 100:.0f}%",
+                      help=f"{followups['faq_answers']} from FAQs, {followups['cache_answers']} from cache, "
+                           f"{followups['llm_answers']} from the LLM")
+            st.caption(f"Saved ≈ {followups['seconds_saved']:.1f}s of LLM latency and {followups['tokens_saved']} tokens")
+        health = core().resilience.stats()
+        if health["breaker"]["state"] != "closed":
+            st.warning(f"🛟 AI service degraded (circuit {health['breaker']['state'].replace('_', '-')}); "
+                       "serving cached and local answers")
+        roadmap_latency = health["latency"].get("roadmap_first_chunk")
+        if roadmap_latency and roadmap_latency["count"]:
+            st.caption(f"AI first response p50 {roadmap_latency['p50']:.2f}s • p95 {roadmap_latency['p95']:.2f}s "
+                       f"• timeout {health['timeouts']['roadmap_first_chunk']:.0f}s")
+        flights = core().flights.stats()
+        if flights["saved"]:
+            st.caption(f"🔗 {flights['saved']} duplicate roadmap requests shared one AI call")
         
-        # RATE LIMITING
-        if "last_call" in st.session_state and time.time() - st.session_state.last_call < 5:
-            st.warning("⏳ Please wait a few seconds before generating again...")
-            st.stop()
-            
-        st.session_state.last_call = time.time()
-
-        with st.spinner("✨ Asha is analyzing your profile and designing your roadmap..."):
-            time.sleep(1.5)  # Dramatic effect
-            
-            # Use cached function
-            st.session_state.ai_response = generate_roadmap(
-                st.session_state.user_data, 
-                st.session_state.ab_test_version, 
-                st.session_state.language
-            )
-            
-            # Extract match score
-            st.session_state.match_score = calculate_match_score(st.session_state.ai_response)
-            
-            # Extract recommended program
-            for prog in config.PROGRAMS_DB.keys():
-                if prog.lower() in st.session_state.ai_response.lower():
-                    st.session_state.recommended_program = prog
-                    break
-            
-            # Save Lead
-            st.session_state.user_data['program'] = st.session_state.recommended_program
-            save_lead(st.session_state.user_data)
+        st.markdown("---")
+        st.markdown("### 🧪 A/B Test Results")
+        st.caption(f"You are seeing version {st.session_state.ab_test_version}"
+                   f"{' (preview, not counted)' if st.session_state.ab_forced else ''} • A: Warm mentoring | B: Urgent FOMO")
+        results = core().experiments.results(EXPERIMENT)
+        st.dataframe([{"Version": variant, "Sessions": r["exposures"], "Enrolled": r["conversions"],
+                       "Rate": f"{r['rate'] * 100:.1f}%",
+                       "Lift": f"{r['lift'] * 100:+.1f}%" if r["lift"] is not None else "",
+                       "p": f"{r['p_value']:.3f}" if r["p_value"] is not None else ""}
+                      for variant, r in results["variants"].items()], hide_index=True, use_container_width=True)
+        if results["winner"]:
+            st.success(f"🏆 Version {results['winner']} converts better (always-valid p < {results['alpha']})")
+        else:
+            st.caption("No significant difference yet; safe to check after every session")
 
     # Progress Tracker
     st.markdown('<div class="progress-container">', unsafe_allow_html=True)
     st.markdown(f"""
-    ### 📈 Your Leadership Journey Progress
+    ### {localized.copy('progress_title')}
     <div style="display:flex; gap:20px; align-items:center;">
         <div style="flex:1;">
             <div class="progress-bar" style="width:{st.session_state.progress}%;"></div>
         </div>
-        <span style="color:#881337; font-weight:bold;">{st.session_state.progress}% Complete</span>
+        <span style="color:#881337; font-weight:bold;">{localized.copy('progress_complete', percent=st.session_state.progress)}</span>
     </div>
     """, unsafe_allow_html=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
     # Main AI Roadmap
     st.markdown('<div class="glass-card">', unsafe_allow_html=True)
-    st.markdown(f"## 🎉 {st.session_state.user_data['name']}'s Personalized Leadership Roadmap")
-    st.markdown(st.session_state.ai_response)
+    st.markdown(f"## {localized.copy('roadmap_title', name=st.session_state.user_data['name'])}")
+    timings = st.session_state.roadmap_timings
+    translated = False
+    if st.session_state.ai_response == "":
+        # Pick the program locally, then stream the narrative straight into the card
+        with tracer.span("roadmap.recommend"):
+            rec = recommend(st.session_state.user_data)
+        st.session_state.recommended_program = rec.program
+        st.session_state.match_score = rec.score
+        st.session_state.ai_response, st.session_state.roadmap_timings = generate_roadmap(
+            st.session_state.user_data, 
+            st.session_state.ab_test_version, 
+            st.session_state.language,
+            rec
+        )
+        st.session_state.roadmap_language = st.session_state.language
+        timings = st.session_state.roadmap_timings
+        
+        # Save Lead, straight from the structured roadmap
+        roadmap = st.session_state.roadmap_timings["roadmap"]
+        st.session_state.user_data['program'] = roadmap["program"]
+        st.session_state.user_data['alternate'] = roadmap["alternate"]
+        st.session_state.user_data['match_score'] = roadmap["score"]
+        save_lead(st.session_state.user_data)
+        core().analytics.record("roadmap", st.session_state.ab_test_version, st.session_state.language)
+        if not st.session_state.ab_forced and not st.session_state.get("ab_exposed"):
+            st.session_state.ab_exposed = True
+            core().experiments.expose(EXPERIMENT, st.session_state.session_id, st.session_state.ab_test_version)
+        shown = st.session_state.ai_response
+    elif st.session_state.language == st.session_state.get("roadmap_language", st.session_state.language):
+        st.markdown(st.session_state.ai_response)
+        shown = st.session_state.ai_response
+    else:
+        # Language switched after the roadmap was shown: translate it instead of generating a new one
+        translated = True
+        if st.session_state.language in st.session_state.localized_roadmaps:
+            st.markdown(st.session_state.localized_roadmaps[st.session_state.language][0])
+        else:
+            st.session_state.localized_roadmaps[st.session_state.language] = translate_roadmap(st.session_state.language)
+        shown, timings = st.session_state.localized_roadmaps[st.session_state.language]
+
+    if timings:
+        if translated and timings.get("degraded"):
+            st.caption(localized.copy("roadmap_partly_translated", language=st.session_state.roadmap_language))
+        elif timings.get("degraded"):
+            st.caption(localized.copy("roadmap_degraded"))
+        elif timings.get("cached"):
+            st.caption(localized.copy("roadmap_cached", seconds=f"{timings['total']:.3f}"))
+        elif timings.get("speculative"):
+            st.caption(localized.copy("roadmap_speculative", first=f"{timings['ttft']:.2f}"))
+        else:
+            st.caption(localized.copy("roadmap_streamed", first=f"{timings['ttft']:.2f}", total=f"{timings['total']:.2f}"))
     st.markdown('</div>', unsafe_allow_html=True)
 
     # Match Score & Quick Stats
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.markdown("### 🔥 AI Match Score")
+        st.markdown(f"### {localized.copy('match_title')}")
         st.markdown(f'<div class="match-score">{st.session_state.match_score}%</div>', unsafe_allow_html=True)
     with col2:
         st.markdown('<div class="stat-box">', unsafe_allow_html=True)
-        st.markdown("### 📚 Best Fit")
+        st.markdown(f"### {localized.copy('best_fit_title')}")
         st.markdown(f"**{st.session_state.recommended_program or 'Leadership Accelerator'}**")
-        st.markdown("6 Months • Live Sessions")
+        best_fit = localized.program(st.session_state.recommended_program
+                                if st.session_state.recommended_program in config.PROGRAMS_DB else "Leadership Accelerator")
+        st.markdown(f"{best_fit['duration']} • {localized.copy('best_fit_sessions')}")
         st.markdown('</div>', unsafe_allow_html=True)
     with col3:
         st.markdown('<div class="stat-box">', unsafe_allow_html=True)
-        st.markdown("### 🎯 Success Rate")
+        st.markdown(f"### {localized.copy('success_rate_title')}")
         st.markdown("**89%**")
-        st.markdown("Women achieved their goals")
+        st.markdown(localized.copy("success_rate_caption"))
         st.markdown('</div>', unsafe_allow_html=True)
 
     # Download Roadmap
     st.markdown('<div class="glass-card">', unsafe_allow_html=True)
-    st.markdown("### 📥 Save Your Roadmap")
+    st.markdown(f"### {localized.copy('save_title')}")
     
     roadmap_text = f"""
 IRON LADY - PERSONALIZED LEADERSHIP ROADMAP
@@ -518,7 +380,7 @@ Goal: {st.session_state.user_data['goal']}
 
 AI MATCH SCORE: {st.session_state.match_score}%
 
-{st.session_state.ai_response}
+{shown}
 
 ---
 Next Steps: WhatsApp +91 98765 43210 to speak with a counselor
@@ -526,7 +388,7 @@ Website: www.iamironlady.com
 """
     
     st.download_button(
-        label="📄 Download as TXT",
+        label=localized.copy("download_button"),
         data=roadmap_text,
         file_name=f"IronLady_Roadmap_{st.session_state.user_data['name'].replace(' ', '_')}.txt",
         mime="text/plain",
@@ -536,125 +398,129 @@ Website: www.iamironlady.com
 
     # FAQs Integration
     st.markdown('<div class="glass-card">', unsafe_allow_html=True)
-    st.markdown("### ❓ Quick Answers to Common Questions")
+    st.markdown(f"### {localized.copy('faq_title')}")
     
-    faq_tab1, faq_tab2 = st.tabs(["📋 All FAQs", "🔍 Search"])
+    faq_tab1, faq_tab2 = st.tabs([localized.copy("faq_tab_all"), localized.copy("faq_tab_search")])
     
     with faq_tab1:
-        for i, faq in enumerate(FAQS):
+        for i, faq in enumerate(core().localized_faqs(st.session_state.language)):
             with st.expander(f"**{faq['question']}**"):
                 st.markdown(faq['answer'])
     
     with faq_tab2:
-        search_term = st.text_input("🔍 Search FAQs", placeholder="e.g., EMI, certificate, online...")
+        search_term = st.text_input(localized.copy("faq_search_label"),
+                                    placeholder=localized.copy("faq_search_placeholder"))
         if search_term:
-            results = [faq for faq in FAQS if search_term.lower() in faq['question'].lower() or search_term.lower() in faq['answer'].lower()]
+            results = core().search_faqs(search_term, language=st.session_state.language)
             if results:
-                for faq in results:
+                for _, faq in results:
                     st.markdown(f"**Q: {faq['question']}**")
                     st.markdown(faq['answer'])
                     st.markdown("---")
             else:
-                st.info("No FAQs found. Try different keywords or ask Asha below!")
+                st.info(localized.copy("faq_no_results"))
     
     st.markdown('</div>', unsafe_allow_html=True)
 
     # Interactive Follow-up Chat
     st.markdown('<div class="glass-card">', unsafe_allow_html=True)
-    st.markdown("### 💬 Ask Asha Anything")
-    st.markdown("*Have questions about the program, schedule, or your roadmap? Ask away!*")
+    st.markdown(f"### {localized.copy('ask_title')}")
+    st.markdown(localized.copy("ask_subtitle"))
     
-    user_question = st.text_input("Your question:", placeholder="E.g., Can I join if I work full-time?", key="followup_q")
+    user_question = st.text_input(localized.copy("question_label"), placeholder=localized.copy("question_placeholder"),
+                                  key="followup_q")
     
-    if st.button("💡 Get Answer", use_container_width=True):
+    if st.button(localized.copy("ask_button"), use_container_width=True):
         if user_question:
             try:
-                client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-                
-                followup_prompt = f"""
-You are Asha, Iron Lady's AI mentor. The user asked: "{user_question}"
-
-Context:
-- User: {st.session_state.user_data['name']}
-- Recommended Program: {st.session_state.recommended_program}
-- Their Goal: {st.session_state.user_data['goal']}
-
-Answer warmly and specifically. If it's about logistics, be factual. If it's about confidence, be motivating.
-Language: {config.LANGUAGES[st.session_state.language]["name"]}
-"""
-                
-                with st.spinner("Asha is thinking..."):
-                    response = client.chat.completions.create(
-                        model="llama-3.1-8b-instant",
-                        messages=[{"role": "user", "content": followup_prompt}],
-                        temperature=0.6,
-                        max_tokens=400
+                notice = st.empty()
+                with st.spinner(localized.copy("ask_thinking")):
+                    result = core().answer_followup(
+                        user_question,
+                        st.session_state.user_data,
+                        st.session_state.recommended_program,
+                        st.session_state.language,
+                        queue_notice(notice)
                     )
-                    answer = response.choices[0].message.content
+                    notice.empty()
                     
-                    st.session_state.chat_history.append({"q": user_question, "a": answer})
+                    st.session_state.chat_history.append({"q": user_question, "a": result["answer"], "source": result["source"]})
                     
             except Exception as e:
-                st.error("Couldn't reach Asha right now. Please try WhatsApp support below.")
+                st.error(localized.copy("ask_failed"))
     
     # Display chat history
     if st.session_state.chat_history:
-        st.markdown("#### 💬 Conversation History")
+        st.markdown(f"#### {localized.copy('history_title')}")
         for chat in st.session_state.chat_history[-3:]:  # Show last 3
-            st.markdown(f'<div class="chat-message"><strong>You:</strong> {chat["q"]}</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="chat-message" style="border-left-color:#fbbf24;"><strong>Asha:</strong> {chat["a"]}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="chat-message"><strong>{localized.copy("chat_you")}</strong> {chat["q"]}</div>', unsafe_allow_html=True)
+            source = chat.get("source")
+            source = f' <small>{localized.copy("source_" + source)}</small>' if source in ("faq", "cache", "degraded") else ""
+            st.markdown(f'<div class="chat-message" style="border-left-color:#fbbf24;"><strong>{localized.copy("chat_asha")}</strong>{source} {chat["a"]}</div>', unsafe_allow_html=True)
     
     st.markdown('</div>', unsafe_allow_html=True)
 
     # Payment CTA
     st.markdown('<div class="glass-card" style="background: linear-gradient(135deg, #fef3c7, #fde68a);">', unsafe_allow_html=True)
-    st.markdown("### 💳 Limited Time Offer - Enroll Now!")
+    st.markdown(f"### {localized.copy('offer_title')}")
     
     col_p1, col_p2 = st.columns([2, 1])
     with col_p1:
-        discount_text = "⚡ FLASH SALE - 72% OFF!" if st.session_state.ab_test_version == "B" else "🎁 Special Offer - 70% OFF"
+        discount_text = localized.copy("offer_B" if st.session_state.ab_test_version == "B" else "offer_A")
         st.markdown(f"""
         **{discount_text}**  
         {st.session_state.recommended_program or 'Leadership Accelerator'}  
         ~~₹99,997~~ → **₹29,997**
         
-        ✅ Live Sessions • ✅ Mentorship • ✅ Certificate • ✅ Community Access
+        {localized.copy('offer_includes')}
         """)
         
         if st.session_state.ab_test_version == "B":
-            st.markdown("⚠️ **Only 3 seats left at this price!**")
+            st.markdown(localized.copy("offer_scarcity"))
     
     with col_p2:
-        if st.button("🛒 Enroll Now - ₹29,997", use_container_width=True, type="primary"):
-            st.session_state.conversions += 1
+        if st.button(localized.copy("enroll_button"), use_container_width=True, type="primary"):
+            if not st.session_state.get("enrolled"):
+                st.session_state.enrolled = True
+                core().analytics.record("enroll", st.session_state.ab_test_version, st.session_state.language)
+                if st.session_state.get("ab_exposed") and not st.session_state.get("ab_converted"):
+                    st.session_state.ab_converted = True
+                    core().experiments.convert(EXPERIMENT, st.session_state.session_id,
+                                               st.session_state.ab_test_version)
             st.balloons()
-            st.success("🎉 Welcome to Iron Lady! Check your email for next steps.")
-            st.info("📞 Our counselor will call you in 10 minutes to complete enrollment.")
+            st.success(localized.copy("enroll_success"))
+            st.info(localized.copy("enroll_callback"))
     
     st.markdown('</div>', unsafe_allow_html=True)
 
     # WhatsApp CTA
-    wa_link = get_whatsapp_link(st.session_state.user_data['name'], st.session_state.recommended_program)
+    with tracer.span("app.whatsapp_link"):
+        wa_link = get_whatsapp_link(st.session_state.user_data['name'], st.session_state.recommended_program)
     
     st.markdown(f"""
     <div style="background:linear-gradient(135deg,#25D366,#128C7E); 
                 padding:30px; border-radius:25px; color:white; text-align:center; margin-top:30px;">
-        <h2>📞 Speak to a Real Mentor in 60 Seconds</h2>
-        <p style="font-size:1.2rem;"><strong>Get Your Questions Answered LIVE</strong></p>
-        <a href="{wa_link}" target="_blank" style="
-            background:#fbbf24; padding:18px 50px; border-radius:50px; 
-            color:#881337; font-size:1.3rem; text-decoration:none; font-weight:700;
-            display:inline-block; margin-top:15px;">
-            💬 WhatsApp Asha Now (FREE)
-        </a>
-        <p style="margin-top:15px; font-size:0.9rem;">⚡ Avg. response time: 2 minutes</p>
+        <h2>{localized.copy('mentor_title')}</h2>
+        <p style="font-size:1.2rem;"><strong>{localized.copy('mentor_subtitle')}</strong></p>
+        <p style="margin-top:15px; font-size:0.9rem;">{localized.copy('mentor_response')}</p>
     </div>
     """, unsafe_allow_html=True)
+    # A plain link's click never reaches the server, so the first click is a button that counts it
+    _, col_wa, _ = st.columns([1, 2, 1])
+    with col_wa:
+        if not st.session_state.get("whatsapp_opened"):
+            if st.button(localized.copy("whatsapp_button"), use_container_width=True, type="primary"):
+                st.session_state.whatsapp_opened = True
+                core().analytics.record("whatsapp", st.session_state.ab_test_version, st.session_state.language)
+                st.rerun()
+        else:
+            st.link_button(localized.copy("whatsapp_open"), wa_link, use_container_width=True, type="primary")
 
     # Social Sharing
     st.markdown('<div class="glass-card">', unsafe_allow_html=True)
-    st.markdown("### 🌟 Share Your Roadmap")
+    st.markdown(f"### {localized.copy('share_title')}")
     
+    share_span = tracer.span("app.share_links")
     share_text = generate_share_text(st.session_state.user_data['name'], st.session_state.match_score)
     
     col_s1, col_s2, col_s3 = st.columns(3)
@@ -685,20 +551,24 @@ Language: {config.LANGUAGES[st.session_state.language]["name"]}
     # 3. Clipboard (JavaScript)
     # Escape single quotes for JS string: ' -> \'
     js_safe_text = share_text.replace("'", "\\'")
+    share_span.stop()
     
     with col_s1:
-        st.markdown(f'<a href="{linkedin_url}" target="_blank"><button style="background:#0077b5; color:white; padding:10px 20px; border:none; border-radius:10px; cursor:pointer; width:100%;">📘 Share on LinkedIn</button></a>', unsafe_allow_html=True)
+        st.markdown(f'<a href="{linkedin_url}" target="_blank"><button style="background:#0077b5; color:white; padding:10px 20px; border:none; border-radius:10px; cursor:pointer; width:100%;">{localized.copy("share_linkedin")}</button></a>', unsafe_allow_html=True)
     with col_s2:
-        st.markdown(f'<a href="{twitter_url}" target="_blank"><button style="background:#1DA1F2; color:white; padding:10px 20px; border:none; border-radius:10px; cursor:pointer; width:100%;">🐦 Share on Twitter</button></a>', unsafe_allow_html=True)
+        st.markdown(f'<a href="{twitter_url}" target="_blank"><button style="background:#1DA1F2; color:white; padding:10px 20px; border:none; border-radius:10px; cursor:pointer; width:100%;">{localized.copy("share_twitter")}</button></a>', unsafe_allow_html=True)
     with col_s3:
-        st.markdown(f'<button onclick="navigator.clipboard.writeText(\'{js_safe_text} https://iamironlady.com\')" style="background:#fb7185; color:white; padding:10px 20px; border:none; border-radius:10px; cursor:pointer; width:100%;">📋 Copy Text</button>', unsafe_allow_html=True)
+        st.markdown(f'<button onclick="navigator.clipboard.writeText(\'{js_safe_text} https://iamironlady.com\')" style="background:#fb7185; color:white; padding:10px 20px; border:none; border-radius:10px; cursor:pointer; width:100%;">{localized.copy("share_copy")}</button>', unsafe_allow_html=True)
     
     st.markdown('</div>', unsafe_allow_html=True)
 
     # Reset Button
-    if st.button("🔄 Start New Assessment", use_container_width=True):
+    if st.button(localized.copy("restart_button"), use_container_width=True):
+        # The session id, A/B arm and once-per-session enroll/WhatsApp flags survive, so a
+        # restarted assessment is not counted as another visit, exposure or conversion
         for key in list(st.session_state.keys()):
-            if key not in ['visits', 'conversions']:
+            if key not in ('session_id', 'enrolled', 'whatsapp_opened',
+                           'ab_test_version', 'ab_forced', 'ab_exposed', 'ab_converted'):
                 del st.session_state[key]
         st.rerun()
 
@@ -706,11 +576,13 @@ Language: {config.LANGUAGES[st.session_state.language]["name"]}
 # FOOTER
 # -------------------------------------------------------------------------------------
 st.markdown("---")
-st.markdown("""
+st.markdown(f"""
 <div style="text-align:center; color:#881337; padding:2rem;">
-    <strong>Iron Lady - Empowering Women Leaders Since 2019</strong><br>
+    <strong>{localized.copy('footer_tagline')}</strong><br>
     🌐 www.iamironlady.com | 📧 hello@iamironlady.com | 📞 +91 98765 43210<br>
-    <small>Powered by AI • Built with ❤️ for Women Who Lead</small>
+    <small>{localized.copy('footer_credit')}</small>
 </div>
 
 """, unsafe_allow_html=True)
+
+rerun_span.stop()
@@ -0,0 +1,252 @@
+"""Async batch roadmap generation, for pre-warming the shared roadmap cache.
+
+Reads profiles from a CSV (same columns as leads.csv) or a JSONL file and
+generates a roadmap for every profile x version x language, with bounded
+concurrency, token-bucket rate limiting and jittered retries on 429/5xx.
+Results go into the shared roadmap cache. Keys actually cached are appended
+to a journal file, so a crashed run picks up where it left off; a roadmap
+the cache refused (see RoadmapCache.put) is counted as uncached and tried
+again on the next run.
+
+Usage:
+    python batch.py leads.csv --concurrency 8 --rpm 300 --versions A,B
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import time
+
+from groq import APIConnectionError, APIStatusError, APITimeoutError
+
+import config
+import llm
+from prompts import build_roadmap_prompt, token_budget
+from ratelimit import SharedLimiter, estimate_tokens
+from recommender import build_roadmap, recommend
+from roadmap_cache import RoadmapCache, profile_key
+from roadmap_format import RESPONSE_FORMATS, json_name, merge_roadmap
+from utils import percentile
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def load_profiles(path):
+    """Read profiles from a CSV or JSONL file into user_data dicts"""
+    profiles = []
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.endswith(".jsonl"):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for row in rows:
+            row = {k.strip().lower(): (v or "").strip() for k, v in row.items() if k}
+            if row.get("name") and row.get("role") and row.get("challenge") and row.get("goal"):
+                profiles.append({
+                    "name": row["name"],
+                    "role": row["role"],
+                    "challenge": row["challenge"],
+                    "goal": row["goal"],
+                })
+    return profiles
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens=1):
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0, retry_after=None):
+    """Full-jitter exponential backoff, never shorter than Retry-After"""
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after")) if response is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class BatchStats:
+    def __init__(self):
+        self.done = 0
+        self.uncached = 0
+        self.failed = 0
+        self.skipped = 0
+        self.retries = 0
+        self.latencies = []
+        self.started = time.perf_counter()
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "generated": self.done,
+            "uncached": self.uncached,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "retries": self.retries,
+            "elapsed_s": round(elapsed, 2),
+            "roadmaps_per_min": round(self.done / elapsed * 60, 1) if elapsed else 0.0,
+            "p50_ms": round(percentile(self.latencies, 50) * 1000, 1),
+            "p95_ms": round(percentile(self.latencies, 95) * 1000, 1),
+        }
+
+
+async def generate_one(client, bucket, prompt, stats, max_attempts=5, limiter=None, max_tokens=1200):
+    """One roadmap completion with rate limiting and jittered retries.
+
+    With a ratelimit.SharedLimiter, calls also wait for the quota shared with
+    the live app, so a batch run cannot starve it.
+    """
+    for attempt in range(max_attempts):
+        await bucket.acquire()
+        if limiter is not None:
+            reserved = await asyncio.get_running_loop().run_in_executor(
+                None, limiter.acquire, estimate_tokens(prompt) + max_tokens)
+        start = time.perf_counter()
+        try:
+            out = await client.chat.completions.create(
+                model=config.LLM_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.7,
+                max_tokens=max_tokens,
+                **RESPONSE_FORMATS[config.ROADMAP_RESPONSE_FORMAT]
+            )
+            stats.latencies.append(time.perf_counter() - start)
+            if limiter is not None and out.usage:
+                limiter.settle(reserved, out.usage.total_tokens)
+            return out.choices[0].message.content
+        except (APIStatusError, APIConnectionError, APITimeoutError) as e:
+            status = getattr(e, "status_code", None)
+            retryable = status is None or status in RETRY_STATUSES
+            if not retryable or attempt == max_attempts - 1:
+                raise
+            stats.retries += 1
+            await asyncio.sleep(backoff_delay(attempt, retry_after=_retry_after(e)))
+
+
+def _load_journal(path):
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+async def run_batch(profiles, cache, client, concurrency=8, rpm=300,
+                    versions=("A",), languages=("English",), journal=None, max_attempts=5, limiter=None):
+    """Generate and cache roadmaps for every profile; returns BatchStats"""
+    stats = BatchStats()
+    finished = _load_journal(journal)
+    bucket = TokenBucket(rpm / 60.0, capacity=max(1, concurrency))
+    queue = asyncio.Queue()
+    seen = set()
+    for user_data in profiles:
+        for version in versions:
+            for language in languages:
+                key = profile_key(user_data, version, language)
+                if key in seen or key in finished or cache.contains(key):
+                    stats.skipped += 1
+                    continue
+                seen.add(key)
+                queue.put_nowait((key, user_data, version, language))
+
+    journal_file = open(journal, "a", encoding="utf-8") if journal else None
+
+    async def worker():
+        while True:
+            try:
+                key, user_data, version, language = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            rec = recommend(user_data)
+            try:
+                text = await generate_one(client, bucket, build_roadmap_prompt(user_data, version, language, rec),
+                                          stats, max_attempts, limiter,
+                                          token_budget("roadmap", language, version)["completion"])
+            except Exception as e:
+                stats.failed += 1
+                print(f"failed {user_data['name']} ({version}/{language}): {e}")
+                continue
+            # Cached in the same structured form the app stores (see Core.roadmap_chunks)
+            roadmap = merge_roadmap(text, build_roadmap(user_data, rec, version))
+            if not cache.put(key, json.dumps(roadmap, ensure_ascii=False), json_name(user_data["name"])):
+                stats.uncached += 1
+                continue
+            stats.done += 1
+            if journal_file:
+                journal_file.write(key + "\n")
+                journal_file.flush()
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        if journal_file:
+            journal_file.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("profiles", help="CSV or JSONL file of profiles")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rpm", type=float, default=300, help="max requests per minute")
+    parser.add_argument("--versions", default="A", help="comma-separated A/B versions")
+    parser.add_argument("--languages", default="English", help="comma-separated keys of config.LANGUAGES")
+    parser.add_argument("--journal", default=None, help="resume journal (default: <profiles>.done)")
+    parser.add_argument("--base-url", default=None, help="Groq endpoint, e.g. a local fake_groq.py")
+    parser.add_argument("--shared-quota", action="store_true",
+                        help="also respect config.RATE_LIMIT, the quota shared with the running app")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise SystemExit("GROQ_API_KEY is not set")
+
+    profiles = load_profiles(args.profiles)
+    settings = dict(config.LLM_CLIENT, pool_size=args.concurrency, max_retries=0)
+    client = llm.build_async_client(api_key, base_url=args.base_url, **settings)
+    cache = RoadmapCache(**config.ROADMAP_CACHE)
+    stats = asyncio.run(run_batch(
+        profiles, cache, client,
+        concurrency=args.concurrency,
+        rpm=args.rpm,
+        versions=args.versions.split(","),
+        languages=args.languages.split(","),
+        journal=args.journal or args.profiles + ".done",
+        limiter=SharedLimiter(**dict(config.RATE_LIMIT, max_wait=3600)) if args.shared_quota else None,
+    ))
+    print(json.dumps(stats.report(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1303 @@
+"""Benchmarks against a local fake Groq server (see fake_groq.py).
+
+Usage:
+    python bench.py client --calls 50
+    python bench.py batch --profiles 500 --concurrency 16
+    python bench.py leads --threads 16
+    python bench.py faq --faqs 10000
+    python bench.py startup --runs 20
+    python bench.py api --requests 2000 --concurrency 64
+    python bench.py limiter --sessions 160 --quota 120
+    python bench.py resilience --calls 300
+    python bench.py tracing --sessions 20
+    python bench.py load --sessions 40 --workers 4 --save-baseline bench_baseline.json
+    python bench.py load --sessions 40 --workers 4 --baseline bench_baseline.json
+    python bench.py replay --cassette llm_calls.jsonl --speed 1.0
+    python bench.py prompts --live 10
+    python bench.py speculation --sessions 40 --think 2.0 --change-rate 0.3
+    python bench.py columns --rows 10000000
+    python bench.py dedup --rows 1000000
+"""
+import argparse
+import statistics
+import time
+
+import fake_groq
+from utils import percentile
+
+
+def summarize(label, samples):
+    """Print mean/p50/p95 of latency samples given in seconds"""
+    ms = [s * 1000 for s in samples]
+    print(f"{label:<28} mean {statistics.mean(ms):8.2f} ms   "
+          f"p50 {percentile(ms, 50):8.2f} ms   p95 {percentile(ms, 95):8.2f} ms")
+    return {"mean_ms": statistics.mean(ms), "p50_ms": percentile(ms, 50), "p95_ms": percentile(ms, 95)}
+
+
+def _call(client):
+    client.chat.completions.create(
+        model="fake",
+        messages=[{"role": "user", "content": "Name: Bench"}],
+        max_tokens=400,
+    )
+
+
+def bench_client(args):
+    """Per-call latency: new Groq client per call vs one pooled client"""
+    from groq import Groq
+
+    import llm
+
+    server, url = fake_groq.serve(profile=fake_groq.Profile(latency=args.latency))
+    try:
+        fresh = []
+        for _ in range(args.calls):
+            start = time.perf_counter()
+            _call(Groq(api_key="bench", base_url=url))
+            fresh.append(time.perf_counter() - start)
+
+        client = llm.default_client("bench", base_url=url)
+        _call(client)  # open the pooled connection once
+        pooled = []
+        for _ in range(args.calls):
+            start = time.perf_counter()
+            _call(client)
+            pooled.append(time.perf_counter() - start)
+    finally:
+        server.shutdown()
+
+    print(f"{args.calls} calls, fake upstream latency {args.latency * 1000:.0f} ms")
+    before = summarize("new client per call", fresh)
+    after = summarize("pooled shared client", pooled)
+    print(f"saved per call (mean): {before['mean_ms'] - after['mean_ms']:.2f} ms")
+
+
+def bench_batch(args):
+    """Batch engine throughput and latency against a flaky fake upstream"""
+    import asyncio
+    import tempfile
+
+    import batch
+    import llm
+    from roadmap_cache import RoadmapCache
+
+    server, url = fake_groq.serve(profile=fake_groq.Profile(
+        latency=args.latency, error_rate=args.error_rate, error_status=503))
+    roles = ["Student", "Professional", "Manager", "Career Break", "Entrepreneur"]
+    profiles = [
+        {"name": f"Lead {i}", "role": roles[i % len(roles)], "challenge": "Low Confidence",
+         "goal": f"get promoted to team lead {i}"}
+        for i in range(args.profiles)
+    ]
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = RoadmapCache(path=f"{tmp}/bench.db")
+            client = llm.build_async_client("bench", base_url=url, pool_size=args.concurrency, max_retries=0)
+            stats = asyncio.run(batch.run_batch(
+                profiles, cache, client, concurrency=args.concurrency, rpm=args.rpm,
+                journal=f"{tmp}/bench.done"))
+    finally:
+        server.shutdown()
+    print(f"{args.profiles} profiles, concurrency {args.concurrency}, "
+          f"fake latency {args.latency * 1000:.0f} ms, error rate {args.error_rate:.0%}")
+    for name, value in stats.report().items():
+        print(f"  {name:<18} {value}")
+
+
+def bench_leads(args):
+    """Request-path cost of lead capture: CSV open/append vs queued LeadStore"""
+    import csv
+    import os
+    import tempfile
+    import threading
+    from datetime import datetime
+
+    from lead_store import LeadStore
+
+    lead = {"name": "Bench", "role": "Student", "challenge": "Low Confidence", "goal": "get a job",
+            "program": "Iron Lady Essentials"}
+
+    def csv_save(path):
+        file_exists = os.path.isfile(path)
+        with open(path, "a", newline="") as f:
+            writer = csv.writer(f)
+            if not file_exists:
+                writer.writerow(["Timestamp", "Name", "Role", "Challenge", "Goal", "Program"])
+            writer.writerow([datetime.now(), lead["name"], lead["role"], lead["challenge"],
+                             lead["goal"], lead["program"]])
+
+    def run(save):
+        samples = []
+        lock = threading.Lock()
+
+        def session():
+            local = []
+            for _ in range(args.writes):
+                start = time.perf_counter()
+                save()
+                local.append(time.perf_counter() - start)
+            with lock:
+                samples.extend(local)
+
+        threads = [threading.Thread(target=session) for _ in range(args.threads)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return samples
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = f"{tmp}/leads.csv"
+        before = run(lambda: csv_save(csv_path))
+        store = LeadStore(path=f"{tmp}/leads.db")
+        after = run(lambda: store.save(lead))
+        store.flush()
+        stored = store.counts()["saves"]
+        store.close()
+
+    total = args.threads * args.writes
+    print(f"{args.threads} threads x {args.writes} leads")
+    summarize("csv open + append", before)
+    summarize("LeadStore.save (queued)", after)
+    print(f"lead saves committed by the writer: {stored}/{total}")
+
+
+def bench_faq(args):
+    """FAQ search latency at scale: BM25 index vs linear substring scan"""
+    import json
+    import random
+
+    from faq_search import FAQIndex
+
+    with open("faqs.json", "r", encoding="utf-8") as f:
+        seed = json.load(f)
+    rng = random.Random(7)
+    words = sorted({w for faq in seed for w in (faq["question"] + " " + faq["answer"]).split()})
+    words += ["प्रमाणपत्र", "शुल्क", "కోర్సు", "సర్టిఫికేట్", "பயிற்சி", "சான்றிதழ்"]
+    # Long-tailed vocabulary so postings are as sparse as in a real corpus
+    words += ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(4, 10))) for _ in range(20000)]
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    faqs = list(seed)
+    while len(faqs) < args.faqs:
+        faqs.append({
+            "question": " ".join(rng.choices(words, weights, k=8)) + "?",
+            "answer": " ".join(rng.choices(words, weights, k=40)) + ".",
+        })
+
+    start = time.perf_counter()
+    index = FAQIndex(faqs)
+    build = time.perf_counter() - start
+
+    queries = ["EMI", "certificate", "certifcate", "live or recorded", "career brake",
+               "सर्टिफिकेट", "प्रमाणपत्र", "సర్టిఫికేట్", "சான்றிதழ்", "mentor sessions"]
+    indexed, scanned = [], []
+    for _ in range(args.rounds):
+        for q in queries:
+            start = time.perf_counter()
+            index.search(q)
+            indexed.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            [faq for faq in faqs if q.lower() in faq["question"].lower() or q.lower() in faq["answer"].lower()]
+            scanned.append(time.perf_counter() - start)
+
+    print(f"{len(faqs)} FAQs, index built in {build * 1000:.0f} ms, {len(index.vocab)} terms")
+    summarize("linear substring scan", scanned)
+    summarize("BM25 index (ranked, fuzzy)", indexed)
+
+
+def bench_startup(args):
+    """Cold start and per-rerun cost of app.py for stage 0 and stage 1 (no LLM calls)"""
+    import os
+    import sys
+
+    from streamlit.runtime.scriptrunner import script_runner
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import AppTest, local_script_runner
+
+    import config
+
+    # Share one compiled-script cache across runs, as the real server does
+    shared_cache = ScriptCache()
+    local_script_runner.ScriptCache = lambda: shared_cache
+
+    # Time the script execution itself; AppTest's own polling would dominate wall time
+    durations = []
+    original = script_runner.ScriptRunner._run_script
+
+    def timed(self, rerun_data):
+        start = time.perf_counter()
+        try:
+            return original(self, rerun_data)
+        finally:
+            durations.append(time.perf_counter() - start)
+
+    script_runner.ScriptRunner._run_script = timed
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    results = {}
+
+    # Keep the background SDK preload out of the picture so the import check is meaningful
+    config.PRELOAD_LLM = False
+    at = AppTest.from_file("app.py", default_timeout=60).run()
+    results["cold_start_ms"] = durations[-1] * 1000
+    results["groq_imported_at_stage_0"] = "groq" in sys.modules
+
+    for _ in range(args.runs):
+        at.run()
+    stage0 = durations[-args.runs:]
+
+    # Stage 1 with a roadmap already in session state, so no LLM call is made
+    at.session_state.stage = 1
+    at.session_state.user_data = {"name": "Bench", "role": "Manager", "challenge": "Leadership Skills",
+                                  "goal": "lead a bigger team", "timestamp": "2026-01-01 00:00:00",
+                                  "program": "Leadership Accelerator"}
+    at.session_state.ai_response = "### 🎯 Best Program Match: Leadership Accelerator"
+    at.session_state.recommended_program = "Leadership Accelerator"
+    at.session_state.match_score = 92
+    at.run()
+    results["first_stage_1_run_ms"] = durations[-1] * 1000
+    for _ in range(args.runs):
+        at.run()
+    stage1 = durations[-args.runs:]
+    script_runner.ScriptRunner._run_script = original
+
+    print(f"cold start (first run of app.py): {results['cold_start_ms']:.1f} ms")
+    print(f"groq imported during stage 0:     {results['groq_imported_at_stage_0']}")
+    results["stage_0_rerun"] = summarize("stage 0 rerun", stage0)
+    print(f"first stage 1 run:                {results['first_stage_1_run_ms']:.1f} ms")
+    results["stage_1_rerun"] = summarize("stage 1 rerun", stage1)
+    return results
+
+
+async def _http(reader, writer, method, path, body=None):
+    """One HTTP/1.1 keep-alive request; returns the status code.
+
+    A bare client keeps the load generator cheap next to the server under test.
+    """
+    import json
+
+    payload = json.dumps(body).encode("utf-8") if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    else:
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status
+
+
+def bench_api(args):
+    """Requests per second through the JSON API (api.py) under uvicorn, mixed endpoints"""
+    import asyncio
+    import os
+    import random
+    import shutil
+    import socket
+    import subprocess
+    import sys
+    import tempfile
+    from urllib.parse import quote
+
+    server, url = fake_groq.serve(profile=fake_groq.Profile(latency=args.latency))
+    tmp = tempfile.TemporaryDirectory()
+    shutil.copy("faqs.json", tmp.name)  # caches and lead store land in the temp dir too
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    env = dict(os.environ, GROQ_API_KEY="bench", GROQ_BASE_URL=url,
+               PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    api_server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--port", str(port), "--workers", str(args.workers),
+         "--log-level", "warning"], cwd=tmp.name, env=env)
+
+    rng = random.Random(11)
+    roles = ["Student", "Professional", "Manager", "Career Break", "Entrepreneur"]
+    questions = ["Is there an EMI option?", "Do I get a certificate?", "Can I join if I work full-time?",
+                 "How do I balance this with my kids' exams?", "What if I miss a live session?"]
+    terms = ["EMI", "certificate", "online", "career break", "mentor"]
+    plan = []
+    for i in range(args.requests):
+        profile = {"name": f"Lead {i}", "role": roles[i % len(roles)], "challenge": "Low Confidence",
+                   "goal": f"get promoted to team lead {rng.randrange(args.profiles)}"}
+        kind = rng.choices(["roadmap", "faqs", "followup", "leads"], [4, 3, 2, 1])[0]
+        if kind == "roadmap":
+            plan.append((kind, "POST", "/roadmap", dict(profile, stream=i % 2 == 0)))
+        elif kind == "faqs":
+            plan.append((kind, "GET", f"/faqs?q={quote(rng.choice(terms))}", None))
+        elif kind == "followup":
+            plan.append((kind, "POST", "/followup", {"question": rng.choice(questions), "name": profile["name"],
+                                                      "goal": profile["goal"], "program": "Leadership Accelerator"}))
+        else:
+            plan.append((kind, "POST", "/leads", dict(profile, program="Leadership Accelerator")))
+    samples = {kind: [] for kind in ("roadmap", "faqs", "followup", "leads")}
+    failures = []
+
+    async def drive():
+        for _ in range(200):
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.close()
+                break
+            except OSError:
+                await asyncio.sleep(0.05)
+        queue = list(reversed(plan))
+
+        async def worker():
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            while queue:
+                kind, method, path, body = queue.pop()
+                start = time.perf_counter()
+                status = await _http(reader, writer, method, path, body)
+                samples[kind].append(time.perf_counter() - start)
+                if status >= 400:
+                    failures.append((path, status))
+            writer.close()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        return time.perf_counter() - start
+
+    try:
+        elapsed = asyncio.run(drive())
+    finally:
+        api_server.terminate()
+        api_server.wait()
+        server.shutdown()
+        tmp.cleanup()
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {args.workers} uvicorn worker(s), "
+          f"{args.profiles} distinct goals, fake latency {args.latency * 1000:.0f} ms")
+    print(f"throughput: {args.requests / elapsed:.0f} requests/s, failures: {len(failures)}")
+    for kind, kind_samples in samples.items():
+        if kind_samples:
+            summarize(f"{kind} ({len(kind_samples)})", kind_samples)
+
+
+def bench_limiter(args):
+    """Concurrent sessions against a fake upstream quota, with and without the shared limiter"""
+    import os
+    import shutil
+    import tempfile
+    import threading
+
+    import config
+    from core import Core
+
+    os.environ["GROQ_API_KEY"] = "bench"
+    roles = ["Student", "Professional", "Manager", "Career Break", "Entrepreneur"]
+    results = {}
+    for label, rpm in (("no shared limiter", 10 ** 6), ("shared limiter", args.quota)):
+        server, url = fake_groq.serve(profile=fake_groq.Profile(latency=args.latency, rpm_limit=args.quota))
+        os.environ["GROQ_BASE_URL"] = url
+        tmp = tempfile.mkdtemp()
+        shutil.copy("faqs.json", tmp)
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        config.RATE_LIMIT.update(rpm=rpm, tpm=10 ** 9, queue_size=args.sessions, max_wait=120)
+        try:
+            core = Core()
+            outcomes = []
+            positions = []
+
+            def session(i):
+                user_data = {"name": f"Lead {i}", "role": roles[i % len(roles)],
+                             "challenge": "Low Confidence", "goal": f"grow into a leadership role {i}"}
+                timings = {}
+                "".join(core.roadmap_chunks(user_data, "A", "English", timings=timings,
+                                            on_wait=lambda position, eta: positions.append(position)))
+                outcomes.append((timings.get("ok", False), timings["total"]))
+
+            start = time.perf_counter()
+            threads = [threading.Thread(target=session, args=(i,)) for i in range(args.sessions)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+            server.shutdown()
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        print(f"{label}: {args.sessions} sessions, upstream quota {args.quota}/min")
+        print(f"  AI roadmaps {sum(ok for ok, _ in outcomes)}, fallbacks {sum(not ok for ok, _ in outcomes)}, "
+              f"upstream 429s {server.profile.rate_limited}, longest queue {max(positions, default=0)}, "
+              f"wall {elapsed:.1f}s")
+        results[label] = summarize("  time to roadmap", [total for _, total in outcomes])
+    return results
+
+
+def bench_resilience(args):
+    """Roadmap latency against a fake upstream with a slow tail (hedging off vs on), then an outage"""
+    import os
+    import shutil
+    import tempfile
+
+    import config
+    from core import Core
+
+    os.environ["GROQ_API_KEY"] = "bench"
+    cwd = os.getcwd()
+    tmp = tempfile.mkdtemp()
+    shutil.copy("faqs.json", tmp)
+    os.chdir(tmp)
+    config.RATE_LIMIT.update(rpm=10 ** 6, tpm=10 ** 9)
+    profile = fake_groq.Profile(latency=args.latency, slow_rate=args.slow_rate, slow_latency=args.slow_latency)
+    server, url = fake_groq.serve(profile=profile)
+    os.environ["GROQ_BASE_URL"] = url
+
+    def run(core, label, calls):
+        totals = []
+        for i in range(calls):
+            user_data = {"name": f"Lead {i}", "role": "Manager", "challenge": "Low Confidence",
+                         "goal": f"{label} goal {i}"}
+            timings = {}
+            "".join(core.roadmap_chunks(user_data, "A", "English", timings=timings))
+            totals.append((timings["ttft"], timings.get("degraded", False)))
+        return totals
+
+    try:
+        for label, hedge in (("no hedging", None), ("hedged after p95", 95)):
+            config.RESILIENCE.update(hedge_percentile=hedge)
+            core = Core()
+            run(core, f"warmup {label}", config.RESILIENCE["min_samples"])
+            results = run(core, label, args.calls)
+            stats = core.resilience.stats()["counters"]
+            print(f"{label}: {args.calls} roadmaps, {args.slow_rate:.0%} of upstream calls "
+                  f"{args.slow_latency:.1f}s slow, extra upstream calls {stats['hedges']}, "
+                  f"hedge wins {stats['hedge_wins']}")
+            ttfts = [ttft for ttft, _ in results]
+            summarize("  time to first words", ttfts)
+            print(f"  p99 {percentile([t * 1000 for t in ttfts], 99):.2f} ms")
+
+        profile.error_rate = 1.0
+        before = profile.requests
+        results = run(core, "outage", args.outage_calls)
+        breaker = core.resilience.stats()["breaker"]
+        print(f"outage: {args.outage_calls} roadmaps with the upstream failing, "
+              f"{profile.requests - before} upstream requests, breaker {breaker['state']} "
+              f"after {breaker['trips']} trip(s), {breaker['short_circuited']} calls short-circuited")
+        summarize("  time to degraded roadmap", [ttft for ttft, _ in results])
+    finally:
+        os.chdir(cwd)
+        server.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def bench_tracing(args):
+    """Cost of a span with tracing off and on, then a traced stage 0 -> stage 1 breakdown"""
+    import os
+    import shutil
+    import tempfile
+
+    from streamlit.testing.v1 import AppTest
+
+    import config
+    from tracing import tracer
+
+    def loop(body, n):
+        start = time.perf_counter()
+        for _ in range(n):
+            body()
+        return (time.perf_counter() - start) / n
+
+    def traced():
+        with tracer.span("bench.step") as span:
+            span.set(tokens=1)
+
+    n = args.spans
+    bare = loop(lambda: None, n)
+    tracer.enabled = False
+    off = loop(traced, n)
+    tracer.enabled = True
+    on = loop(traced, n)
+    tracer.clear()
+    print(f"span overhead: off {(off - bare) * 1e9:.0f} ns, on {(on - bare) * 1e9:.0f} ns per span")
+
+    app = os.path.abspath("app.py")
+    cwd = os.getcwd()
+    tmp = tempfile.mkdtemp()
+    for name in ("faqs.json", "style.css"):
+        shutil.copy(name, tmp)
+    os.chdir(tmp)
+    config.RATE_LIMIT.update(rpm=10 ** 6, tpm=10 ** 9)
+    server, url = fake_groq.serve(profile=fake_groq.Profile(latency=args.latency))
+    os.environ.update(GROQ_API_KEY="bench", GROQ_BASE_URL=url)
+    try:
+        for i in range(args.sessions):
+            at = AppTest.from_file(app, default_timeout=60).run()
+            at.text_input[0].input(f"Bench {i}")
+            at.text_area[0].input(f"lead a team of {i}")
+            at.button[0].click().run()
+            at.run()
+        print(f"{args.sessions} sessions, stage 0 -> stage 1 -> rerun:")
+        for name, stats in tracer.summary().items():
+            tokens = f"   tokens {stats['tokens']}" if "tokens" in stats else ""
+            print(f"  {name:<24} n {stats['count']:4d}   p50 {stats['p50'] * 1000:8.2f} ms   "
+                  f"p95 {stats['p95'] * 1000:8.2f} ms   p99 {stats['p99'] * 1000:8.2f} ms{tokens}")
+    finally:
+        tracer.enabled = False
+        os.chdir(cwd)
+        server.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {"span_off_ns": (off - bare) * 1e9, "span_on_ns": (on - bare) * 1e9, "steps": tracer.summary()}
+
+
+def bench_replay(args):
+    """Re-run recorded LLM traffic offline through Core; compare latency and tokens with the recording"""
+    import os
+    import shutil
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    import cassette
+    import config
+    from core import Core
+
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    cwd = os.getcwd()
+    tmp = tempfile.mkdtemp()
+    path = os.path.abspath(args.cassette) if args.cassette else os.path.join(tmp, "llm_calls.jsonl")
+    config.RATE_LIMIT.update(rpm=10 ** 6, tpm=10 ** 9)
+
+    def fresh_dir(name):
+        # New caches and lead store, so the rerun starts as cold as the recording did
+        os.chdir(cwd)
+        workdir = os.path.join(tmp, name)
+        os.mkdir(workdir)
+        shutil.copy("faqs.json", workdir)
+        os.chdir(workdir)
+
+    try:
+        if not args.cassette:
+            server, url = fake_groq.serve(profile=fake_groq.Profile(latency=args.latency))
+            os.environ["GROQ_BASE_URL"] = url
+            config.LLM_CASSETTE.update(mode="record", path=path, redact=False)  # synthetic profiles only
+            fresh_dir("record")
+            core = Core()
+            for i in range(args.sessions):
+                user_data = {"name": f"Lead {i}", "role": LOAD_ROLES[i % len(LOAD_ROLES)],
+                             "challenge": LOAD_CHALLENGES[i % len(LOAD_CHALLENGES)],
+                             "goal": f"lead a team of {i % 10 + 2} people"}
+                rec = core.roadmap(user_data, "A", "English")
+                core.answer_followup(f"How do I start on week one as a {user_data['role'].lower()}?",
+                                     user_data, rec["program"], "English")
+            core.cassette.writer.close()
+            server.shutdown()
+            print(f"recorded {args.sessions} sessions against the fake upstream into {path}")
+
+        entries = cassette.load_entries(path)
+        config.LLM_CASSETTE.update(mode="replay", path=path, speed=args.speed)
+        fresh_dir("replay")
+        core = Core()
+
+        def rerun(entry):
+            inputs = entry["inputs"]
+            start = time.perf_counter()
+            if inputs["kind"] == "roadmap":
+                user_data = {k: inputs[k] for k in ("name", "role", "challenge", "goal")}
+                core.roadmap(user_data, inputs["version"], inputs["language"])
+            else:
+                user_data = {"name": inputs["name"], "goal": inputs["goal"]}
+                core.answer_followup(inputs["question"], user_data, inputs["program"], inputs["language"])
+            return inputs["kind"], time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            reruns = list(pool.map(rerun, entries))
+        elapsed = time.perf_counter() - start
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    recorded = cassette.summarize(entries)
+    stats = core.cassette.stats()
+    print(f"replayed {len(entries)} recorded calls at {args.speed:g}x latency in {elapsed:.1f}s: "
+          f"{stats['hits']} LLM calls served from the recording, {stats['misses']} misses")
+    print(f"prompt tokens: recorded {stats['recorded_prompt_tokens']}, with current prompts "
+          f"{stats['replayed_prompt_tokens']}; completion tokens {stats['completion_tokens']}")
+    results = {}
+    for kind, s in recorded.items():
+        print(f"{kind}: recorded {s['calls']} calls, {s['tokens']} tokens, latency p50 {s['latency_p50'] * 1000:.1f} ms "
+              f"p95 {s['latency_p95'] * 1000:.1f} ms")
+        results[kind] = summarize("  rerun latency", [t for k, t in reruns if k == kind])
+    return results
+
+
+LOAD_ROLES = ["Student", "Professional", "Manager", "Career Break", "Entrepreneur"]
+LOAD_CHALLENGES = ["Low Confidence", "Stagnant Career", "Return to Work", "Public Speaking",
+                   "Work-Life Balance", "Leadership Skills"]
+LOAD_QUESTIONS = ["Is EMI available?", "Can I join if I work full-time?",
+                  "How will this help me {goal}?", "What should I do in week one to {goal}?"]
+LOAD_STEPS = ["stage 0", "roadmap", "follow-up", "enroll", "session"]
+
+
+def _rss_mb():
+    """Resident memory of this process in MB"""
+    import os
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # peak, not current
+
+
+def _load_session(app, i):
+    """One user: stage 0 -> roadmap (stage 1) -> follow-up question -> enroll. Returns (AppTest, outcome)."""
+    from streamlit.testing.v1 import AppTest
+
+    goal = f"lead a team of {i % 50 + 2} people"
+    steps = {}
+    began = start = time.perf_counter()
+    at = AppTest.from_file(app, default_timeout=120).run()
+    steps["stage 0"] = time.perf_counter() - start
+
+    at.text_input[0].input(f"Load {i}")
+    at.selectbox[1].select(LOAD_ROLES[i % len(LOAD_ROLES)])
+    at.selectbox[2].select(LOAD_CHALLENGES[i % len(LOAD_CHALLENGES)])
+    at.text_area[0].input(goal)
+    start = time.perf_counter()
+    at.button[0].click().run()
+    steps["roadmap"] = time.perf_counter() - start
+
+    [t for t in at.text_input if t.key == "followup_q"][0].input(
+        LOAD_QUESTIONS[i % len(LOAD_QUESTIONS)].format(goal=goal))
+    start = time.perf_counter()
+    [b for b in at.button if "Get Answer" in b.label][0].click().run()
+    steps["follow-up"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    [b for b in at.button if "Enroll Now" in b.label][0].click().run()
+    steps["enroll"] = time.perf_counter() - start
+    steps["session"] = time.perf_counter() - began
+
+    if at.exception:
+        raise RuntimeError(f"session {i}: {at.exception[0].value}")
+    history = at.session_state.chat_history
+    return at, {"steps": steps, "degraded": bool(at.session_state.roadmap_timings.get("degraded")),
+                "answer": history[-1]["source"] if history else None,
+                "enrolled": bool(at.session_state.enrolled)}
+
+
+def _flush_leads():
+    # Runs as a Streamlit script (AppTest.from_function) to reach the worker's shared Core
+    import streamlit as st
+
+    from resources import core
+
+    core().lead_store.flush()
+    st.session_state.leads = core().lead_store.stats()
+
+
+def _load_worker(app, workdir, worker, sessions):
+    """Run `sessions` sessions one after another in this process; AppTest is not thread-safe"""
+    import os
+
+    from streamlit.testing.v1 import AppTest
+
+    import config
+    from tracing import tracer
+
+    os.chdir(workdir)
+    config.RATE_LIMIT.update(rpm=10 ** 6, tpm=10 ** 9)
+    _load_session(app, -1 - worker)  # imports, caches and the pooled client
+    tracer.enabled = True
+    rss = _rss_mb()
+    alive = []  # keep sessions in memory, as the server does until they expire
+    outcomes = []
+    started = time.time()
+    for i in range(sessions):
+        at, outcome = _load_session(app, worker * sessions + i)
+        alive.append(at)
+        outcomes.append(outcome)
+    finished = time.time()
+    grown = _rss_mb() - rss
+    leads = AppTest.from_function(_flush_leads).run().session_state.leads
+    return {
+        "outcomes": outcomes,
+        "started": started,
+        "finished": finished,
+        "memory_per_session_mb": grown / sessions if sessions else 0.0,
+        "lead_saves": [s["seconds"] for s in tracer.samples if s["name"] == "lead.save"],
+        "leads": leads,
+    }
+
+
+def _compare_baseline(results, path, tolerance):
+    """Print current vs baseline metrics; returns the names of regressed metrics"""
+    import json
+
+    with open(path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = []
+    print(f"vs baseline {path} (tolerance {tolerance:.0%}):")
+    for name, value in results.items():
+        base = baseline.get(name)
+        if not isinstance(value, (int, float)) or not isinstance(base, (int, float)):
+            continue
+        higher_is_better = name.endswith("_per_s")
+        change = (value - base) / base if base else (0.0 if value == base else float("inf"))
+        worse = -change if higher_is_better else change
+        flag = ""
+        if worse > tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif worse < -tolerance:
+            flag = "  improved"
+        print(f"  {name:<30} {base:10.2f} -> {value:10.2f}  ({change:+.0%}){flag}")
+    return regressions
+
+
+def bench_load(args):
+    """Simulated sessions (stage 0 -> roadmap -> follow-up -> enroll) through app.py in parallel workers"""
+    import json
+    import multiprocessing
+    import os
+    import shutil
+    import sys
+    import tempfile
+
+    from lead_store import LeadStore
+
+    app = os.path.abspath("app.py")
+    tmp = tempfile.mkdtemp()
+    for name in ("faqs.json", "style.css"):
+        shutil.copy(name, tmp)
+    profile = fake_groq.Profile(latency=args.latency, chunk_delay=args.chunk_delay, error_rate=args.error_rate)
+    server, url = fake_groq.serve(profile=profile)
+    os.environ.update(GROQ_API_KEY="bench", GROQ_BASE_URL=url)
+    shares = [args.sessions // args.workers + (w < args.sessions % args.workers) for w in range(args.workers)]
+    try:
+        # Separate processes, like Streamlit replicas, sharing the SQLite caches and lead database
+        with multiprocessing.get_context("spawn").Pool(args.workers) as pool:
+            workers = pool.starmap(_load_worker, [(app, tmp, w, n) for w, n in enumerate(shares)])
+        committed = LeadStore(path=os.path.join(tmp, "leads.db")).counts()["saves"]
+    finally:
+        server.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    outcomes = [o for w in workers for o in w["outcomes"]]
+    elapsed = max(w["finished"] for w in workers) - min(w["started"] for w in workers)
+    leads = [w["leads"] for w in workers]
+    batches = sum(l["batches"] for l in leads)
+    results = {"sessions_per_s": len(outcomes) / elapsed}
+    print(f"{len(outcomes)} sessions in {args.workers} worker processes, fake latency "
+          f"{args.latency * 1000:.0f} ms, error rate {args.error_rate:.0%}")
+    print(f"throughput: {results['sessions_per_s']:.2f} sessions/s, upstream requests {profile.requests}, "
+          f"degraded roadmaps {sum(o['degraded'] for o in outcomes)}, enrolled {sum(o['enrolled'] for o in outcomes)}")
+    sources = {}
+    for o in outcomes:
+        sources[o["answer"]] = sources.get(o["answer"], 0) + 1
+    print("follow-up answers: " + ", ".join(f"{k} {v}" for k, v in sorted(sources.items(), key=str)))
+    for step in LOAD_STEPS:
+        ms = [o["steps"][step] * 1000 for o in outcomes]
+        key = step.replace(" ", "_").replace("-", "_")
+        for pct in (50, 95, 99):
+            results[f"{key}_p{pct}_ms"] = percentile(ms, pct)
+        print(f"  {step:<12} p50 {results[f'{key}_p50_ms']:9.1f} ms   p95 {results[f'{key}_p95_ms']:9.1f} ms   "
+              f"p99 {results[f'{key}_p99_ms']:9.1f} ms")
+    results["memory_per_session_mb"] = statistics.mean(w["memory_per_session_mb"] for w in workers)
+    print(f"memory per session: {results['memory_per_session_mb']:.2f} MB (RSS growth with sessions kept alive)")
+    saves = [s * 1000 for w in workers for s in w["lead_saves"]]
+    results["lead_save_p99_ms"] = percentile(saves, 99)
+    results["lead_commit_ms_per_batch"] = sum(l["write_seconds"] for l in leads) * 1000 / batches if batches else 0.0
+    print(f"lead writes: save() p99 {results['lead_save_p99_ms']:.3f} ms on the request path, "
+          f"{batches} commits averaging {results['lead_commit_ms_per_batch']:.1f} ms, "
+          f"{sum(l['retries'] for l in leads)} lock retries, {committed} lead saves committed "
+          f"(expected {args.sessions + args.workers} incl. warm-up)")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline saved to {args.save_baseline}")
+    if args.baseline:
+        regressions = _compare_baseline(results, args.baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed: {', '.join(regressions)}")
+            sys.exit(1)
+    return results
+
+
+def bench_speculation(args):
+    """Time from submit to first words and full roadmap, without and with speculative generation"""
+    import os
+    import random
+    import shutil
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    import config
+    from core import Core
+
+    os.environ["GROQ_API_KEY"] = "bench"
+    cwd = os.getcwd()
+    tmp = tempfile.mkdtemp()
+    config.RATE_LIMIT.update(rpm=10 ** 6, tpm=10 ** 9)
+    config.SPECULATION.update(max_inflight=args.concurrency, max_wasted_per_hour=args.max_wasted)
+    profile = fake_groq.Profile(latency=args.latency, chunk_delay=args.chunk_delay)
+    server, url = fake_groq.serve(profile=profile)
+    os.environ["GROQ_BASE_URL"] = url
+    rng = random.Random(7)
+    plans = [(rng.uniform(0, args.think), rng.random() < args.change_rate) for _ in range(args.sessions)]
+
+    def session(core, label, i):
+        user_data = {"name": f"Lead {i}", "role": LOAD_ROLES[i % len(LOAD_ROLES)],
+                     "challenge": LOAD_CHALLENGES[i % len(LOAD_CHALLENGES)], "goal": f"{label} goal {i}"}
+        think, changes = plans[i]
+        session_id = f"{label}-{i}"
+        if label == "speculative":
+            core.speculator.speculate(session_id, user_data, "A", "English")
+            if changes:
+                # Edits the goal after the speculation started, just before submitting
+                time.sleep(think / 2)
+                user_data = dict(user_data, goal=user_data["goal"] + " and mentor others")
+                core.speculator.speculate(session_id, user_data, "A", "English")
+                time.sleep(think / 2)
+            else:
+                time.sleep(think)
+        else:
+            time.sleep(think)
+        timings = {}
+
+        def fresh():
+            return core.roadmap_chunks(user_data, "A", "English", timings=timings)
+
+        spec = core.speculator.claim(session_id, user_data, "A", "English")
+        submitted = time.perf_counter()
+        for _ in (spec.stream(fresh, timings) if spec else fresh()):
+            pass
+        return timings["ttft"], time.perf_counter() - submitted
+
+    results = {}
+    try:
+        for label in ("baseline", "speculative"):
+            os.chdir(cwd)
+            os.makedirs(os.path.join(tmp, label))
+            shutil.copy("faqs.json", os.path.join(tmp, label))
+            os.chdir(os.path.join(tmp, label))
+            config.SPECULATION.update(enabled=label == "speculative")
+            core = Core()
+            before = profile.requests
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                runs = list(pool.map(lambda i: session(core, label, i), range(args.sessions)))
+            time.sleep(args.latency * 2)  # let cancelled generations wind down before counting
+            print(f"{label}: {args.sessions} sessions, think time up to {args.think:.1f}s, "
+                  f"upstream requests {profile.requests - before}")
+            results[label] = {"ttft": summarize("  submit -> first words", [t for t, _ in runs]),
+                              "total": summarize("  submit -> full roadmap", [t for _, t in runs])}
+        stats = core.speculator.stats()
+        print(f"speculation: {stats['started']} started, {stats['hits']} used, {stats['cancelled']} cancelled, "
+              f"{stats['wasted']} wasted LLM calls (cap {args.max_wasted}/h, {stats['capped']} not started), "
+              f"{stats['saved_per_hit']:.2f}s of generation done before each submit")
+        saved = results["baseline"]["ttft"]["mean_ms"] - results["speculative"]["ttft"]["mean_ms"]
+        print(f"perceived time to first words saved (mean): {saved:.1f} ms")
+    finally:
+        os.chdir(cwd)
+        server.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+    return results
+
+
+LEGACY_ROADMAP_PROMPT = """
+You are Asha, an AI Leadership Architect for Iron Lady. Speak in {lang}.
+
+User Profile:
+- Name: {name}
+- Current Stage: {role}
+- Challenge: {challenge}
+- Goal: {goal}
+
+Available Programs:
+{programs}
+
+Recommended Program (already selected, do not change it): {program} - {score}% match
+Alternate Option: {alternate}
+
+Tone: {tone}
+
+Respond with a single JSON object and nothing else (no markdown fences), keys in this order:
+{{
+  "program": "{program}",
+  "score": {score},
+  "why": "why this program fits, with an emotional connection to their goal; use their name",
+  "alternate": "{alternate}",
+  "steps": ["3 steps of their transformation plan, specific to their profile"],
+  "outcomes": ["specific, measurable expected outcomes"],
+  "comparison": [{{"aspect": "Duration", "best": "...", "alternate": "..."}}, {{"aspect": "Focus", ...}}, {{"aspect": "Price", ...}}],
+  "cta": "an emotional call to action using their name"
+}}
+Write the values in {lang} (markdown allowed inside them); keep the keys in English.
+"""
+LEGACY_MAX_TOKENS = 1200
+
+
+def _legacy_roadmap_prompt(user_data, version, language, rec):
+    """The roadmap prompt before compaction: every program, pretty-printed, rebuilt on each call"""
+    import json
+
+    import config
+
+    tone = "urgent sales with FOMO and scarcity" if version == "B" else "warm supportive mentoring"
+    return LEGACY_ROADMAP_PROMPT.format(
+        lang=config.LANGUAGES[language]["name"], programs=json.dumps(config.PROGRAMS_DB, indent=2), tone=tone,
+        program=rec.program, score=rec.score, alternate=rec.alternate, **user_data)
+
+
+def _stream_roadmap(client, prompt, max_tokens):
+    """One streamed roadmap call: (ttft, total, upstream total tokens)"""
+    import config
+
+    start = time.perf_counter()
+    ttft = used = None
+    stream = client.chat.completions.create(model=config.LLM_MODEL, messages=[{"role": "user", "content": prompt}],
+                                            temperature=0.7, max_tokens=max_tokens, stream=True)
+    for chunk in stream:
+        if ttft is None and chunk.choices and chunk.choices[0].delta.content:
+            ttft = time.perf_counter() - start
+        usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+        if usage is not None:
+            used = usage.total_tokens
+    return ttft or time.perf_counter() - start, time.perf_counter() - start, used
+
+
+def bench_prompts(args):
+    """Roadmap prompt size and build time before and after compaction; --live also times real calls"""
+    import os
+
+    import config
+    import prompts
+    from recommender import recommend
+    from tokenizer import count_tokens
+
+    profiles = [{"name": f"Lead {i}", "role": role, "challenge": challenge, "goal": f"lead a team of {i % 10 + 2}"}
+                for i, (role, challenge) in enumerate((r, c) for r in LOAD_ROLES for c in LOAD_CHALLENGES)]
+    print(f"{len(profiles)} profiles x versions A/B per language; tokens counted locally (tokenizer.py)")
+    print(f"{'language':<10} {'legacy prompt':>14} {'compact prompt':>15} {'saved':>7} "
+          f"{'max_tokens':>16} {'build legacy':>13} {'build compact':>14}")
+    results = {}
+    for language in config.LANGUAGES:
+        legacy, compact, legacy_s, compact_s = [], [], [], []
+        for user_data in profiles:
+            rec = recommend(user_data)
+            for version in ("A", "B"):
+                start = time.perf_counter()
+                text = _legacy_roadmap_prompt(user_data, version, language, rec)
+                legacy_s.append(time.perf_counter() - start)
+                legacy.append(count_tokens(text))
+                start = time.perf_counter()
+                text = prompts.build_roadmap_prompt(user_data, version, language, rec)
+                compact_s.append(time.perf_counter() - start)
+                compact.append(count_tokens(text))
+        before, after = statistics.mean(legacy), statistics.mean(compact)
+        budget = prompts.token_budget("roadmap", language, "A")["completion"]
+        print(f"{language:<10} {before:14.0f} {after:15.0f} {1 - after / before:7.0%} "
+              f"{LEGACY_MAX_TOKENS:>7} -> {budget:<6} {statistics.mean(legacy_s) * 1e6:10.1f} us "
+              f"{statistics.mean(compact_s) * 1e6:11.1f} us")
+        results[language] = {"legacy_tokens": before, "compact_tokens": after, "max_tokens": budget}
+
+    if not args.live:
+        print("latency: run with --live N and GROQ_API_KEY set (GROQ_BASE_URL for another endpoint) "
+              "to time real calls")
+        return results
+
+    import llm
+
+    client = llm.default_client(os.environ["GROQ_API_KEY"], base_url=os.getenv("GROQ_BASE_URL"))
+    timings = {"legacy": [], "compact": []}
+    for i in range(args.live):
+        user_data = profiles[i % len(profiles)]
+        rec = recommend(user_data)
+        # Alternate the two prompts so upstream load affects both alike
+        timings["legacy"].append(_stream_roadmap(
+            client, _legacy_roadmap_prompt(user_data, "A", "English", rec), LEGACY_MAX_TOKENS))
+        timings["compact"].append(_stream_roadmap(
+            client, prompts.build_roadmap_prompt(user_data, "A", "English", rec),
+            prompts.token_budget("roadmap", "English", "A")["completion"]))
+    print(f"{args.live} live English roadmap calls per prompt against {config.LLM_MODEL}")
+    for name, calls in timings.items():
+        used = [u for _, _, u in calls if u]
+        summarize(f"{name} first token", [t for t, _, _ in calls])
+        summarize(f"{name} total", [t for _, t, _ in calls])
+        if used:
+            print(f"{name:<28} upstream tokens per call {statistics.mean(used):.0f}")
+    return results
+
+
+def bench_columns(args):
+    """Sales reports over a large lead history: CSV scan per report vs memory-mapped columns"""
+    import csv
+    import os
+    import random
+    import tempfile
+    from collections import Counter
+    from datetime import datetime, timedelta
+
+    import config
+    from lead_columns import LeadColumns
+    from lead_store import CSV_HEADER
+
+    rng = random.Random(7)
+    programs = list(config.PROGRAMS_DB)
+    first = datetime(2026, 1, 1)
+    step = timedelta(days=args.days) / args.rows
+    since = (first + timedelta(days=args.days - 30)).strftime("%Y-%m-%d")
+    target = programs[0]
+
+    def scan(csv_path, report):
+        counts = Counter()
+        with open(csv_path, "r", newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader)
+            for row in reader:
+                if report == "program":
+                    counts[row[5]] += 1
+                elif report == "role x challenge":
+                    counts[row[2], row[3]] += 1
+                elif row[0] >= since and row[5] == target:
+                    counts[row[0][:10]] += 1
+        return counts
+
+    def query(columns, report):
+        if report == "program":
+            return columns.count("program")
+        if report == "role x challenge":
+            return columns.count(["role", "challenge"])
+        return columns.count("day", since=since, where={"program": target})
+
+    reports = ["program", "role x challenge", f"{target} by day, last 30 days"]
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "leads.csv")
+        start = time.perf_counter()
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADER)
+            for i in range(args.rows):
+                program, alternate = rng.sample(programs, 2)
+                writer.writerow([first + step * i, f"Lead {i}", rng.choice(LOAD_ROLES), rng.choice(LOAD_CHALLENGES),
+                                 "grow into a leadership role", program, alternate, rng.randint(40, 98)])
+        print(f"{args.rows} leads over {args.days} days written in {time.perf_counter() - start:.1f}s "
+              f"({os.path.getsize(csv_path) / 1e6:.0f} MB CSV)")
+
+        scanned = {}
+        for report in reports:
+            start = time.perf_counter()
+            expected = scan(csv_path, report)
+            scanned[report] = (time.perf_counter() - start, expected)
+
+        columns = LeadColumns(os.path.join(tmp, "columns"))
+        start = time.perf_counter()
+        columns.ingest_csv(csv_path)
+        ingest = time.perf_counter() - start
+        print(f"ingested into columns in {ingest:.1f}s ({columns.stats()['bytes'] / 1e6:.0f} MB on disk)")
+
+        start = time.perf_counter()
+        columns = LeadColumns(os.path.join(tmp, "columns"))
+        columns.column("timestamp")
+        print(f"opened (memory-mapped) in {(time.perf_counter() - start) * 1000:.2f} ms")
+        for report in reports:
+            samples = []
+            for _ in range(args.rounds):
+                start = time.perf_counter()
+                result = query(columns, report)
+                samples.append(time.perf_counter() - start)
+            seconds, expected = scanned[report]
+            same = {(k if isinstance(k, tuple) else (k,)): v for k, v in result.items()} == \
+                {(k if isinstance(k, tuple) else (k,)): v for k, v in expected.items()}
+            print(f"{report:<46} CSV scan {seconds * 1000:9.0f} ms   columns p50 "
+                  f"{percentile(samples, 50) * 1000:8.2f} ms   {'same counts' if same else 'COUNTS DIFFER'}")
+
+        with open(csv_path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            for i in range(args.append):
+                writer.writerow([first + timedelta(days=args.days), f"New {i}", "Manager", "Public Speaking",
+                                 "lead a team", target, programs[1], 80])
+        start = time.perf_counter()
+        added = columns.ingest_csv(csv_path)
+        print(f"incremental ingest of {added} new rows: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def bench_dedup(args):
+    """Lead dedup: upsert throughput on save, and the bulk pass over a table or CSV full of repeats"""
+    import csv
+    import os
+    import random
+    import sqlite3
+    import tempfile
+
+    from lead_store import CSV_HEADER, LeadStore, dedup_csv
+
+    rng = random.Random(7)
+    people = max(1, int(args.rows * (1 - args.repeats)))
+
+    def lead(i):
+        person = rng.randrange(people) if i >= people else i
+        return [f"2026-01-01 00:00:{i % 60:02d}", f"Lead {person}", LOAD_ROLES[person % len(LOAD_ROLES)],
+                rng.choice(LOAD_CHALLENGES), "grow into a leadership role", "Leadership Accelerator",
+                "Iron Lady Essentials", rng.randint(40, 98), f"lead{person}@example.com"]
+
+    rows = [lead(i) for i in range(args.rows)]
+    with tempfile.TemporaryDirectory() as tmp:
+        # Rows as an older LeadStore (one row per save, no fingerprints) left them, with contacts
+        db = os.path.join(tmp, "leads.db")
+        conn = sqlite3.connect(db)
+        conn.execute("CREATE TABLE leads (id INTEGER PRIMARY KEY, timestamp TEXT NOT NULL, name TEXT, role TEXT,"
+                     " challenge TEXT, goal TEXT, program TEXT, alternate TEXT, match_score INTEGER, contact TEXT)")
+        conn.executemany("INSERT INTO leads (timestamp, name, role, challenge, goal, program, alternate, match_score,"
+                         " contact) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.commit()
+        conn.close()
+        store = LeadStore(path=db, queue_size=args.saves + 1, batch_size=500)
+        start = time.perf_counter()
+        before, after = store.dedup()
+        print(f"database dedup: {before} rows -> {after} leads in {time.perf_counter() - start:.2f}s")
+
+        csv_path = os.path.join(tmp, "leads.csv")
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADER)
+            writer.writerows(rows)
+        start = time.perf_counter()
+        before, after = dedup_csv(csv_path)
+        print(f"CSV dedup:      {before} rows -> {after} leads in {time.perf_counter() - start:.2f}s")
+
+        store.flush()  # the writer has loaded the fingerprint index
+        for label, offset in (("repeat leads (update)", 0), ("new leads (insert)", args.rows)):
+            start = time.perf_counter()
+            for i in range(args.saves):
+                row = rows[i % people]
+                store.save({"name": row[1] if not offset else f"New {offset + i}", "role": row[2],
+                            "challenge": row[3], "goal": row[4], "program": row[5], "alternate": row[6],
+                            "match_score": row[7], "contact": row[8] if not offset else None})
+            store.flush()
+            elapsed = time.perf_counter() - start
+            print(f"{label:<24} {args.saves / elapsed:8.0f} saves/s through the writer")
+        print(f"leads: {store.counts()}, writer: {store.stats()}")
+        store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("client", help=bench_client.__doc__)
+    p.add_argument("--calls", type=int, default=50)
+    p.add_argument("--latency", type=float, default=0.01)
+    p.set_defaults(func=bench_client)
+
+    p = sub.add_parser("batch", help=bench_batch.__doc__)
+    p.add_argument("--profiles", type=int, default=500)
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--rpm", type=float, default=60000)
+    p.add_argument("--latency", type=float, default=0.05)
+    p.add_argument("--error-rate", type=float, default=0.05)
+    p.set_defaults(func=bench_batch)
+
+    p = sub.add_parser("leads", help=bench_leads.__doc__)
+    p.add_argument("--threads", type=int, default=16)
+    p.add_argument("--writes", type=int, default=200)
+    p.set_defaults(func=bench_leads)
+
+    p = sub.add_parser("faq", help=bench_faq.__doc__)
+    p.add_argument("--faqs", type=int, default=10000)
+    p.add_argument("--rounds", type=int, default=20)
+    p.set_defaults(func=bench_faq)
+
+    p = sub.add_parser("startup", help=bench_startup.__doc__)
+    p.add_argument("--runs", type=int, default=20)
+    p.set_defaults(func=bench_startup)
+
+    p = sub.add_parser("api", help=bench_api.__doc__)
+    p.add_argument("--requests", type=int, default=2000)
+    p.add_argument("--concurrency", type=int, default=64)
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--profiles", type=int, default=100)
+    p.add_argument("--latency", type=float, default=0.05)
+    p.set_defaults(func=bench_api)
+
+    p = sub.add_parser("limiter", help=bench_limiter.__doc__)
+    p.add_argument("--sessions", type=int, default=160)
+    p.add_argument("--quota", type=int, default=120, help="fake upstream requests per minute")
+    p.add_argument("--latency", type=float, default=0.2)
+    p.set_defaults(func=bench_limiter)
+
+    p = sub.add_parser("resilience", help=bench_resilience.__doc__)
+    p.add_argument("--calls", type=int, default=300)
+    p.add_argument("--outage-calls", type=int, default=50)
+    p.add_argument("--latency", type=float, default=0.05)
+    p.add_argument("--slow-rate", type=float, default=0.03)
+    p.add_argument("--slow-latency", type=float, default=1.5)
+    p.set_defaults(func=bench_resilience)
+
+    p = sub.add_parser("tracing", help=bench_tracing.__doc__)
+    p.add_argument("--spans", type=int, default=200000)
+    p.add_argument("--sessions", type=int, default=20)
+    p.add_argument("--latency", type=float, default=0.05)
+    p.set_defaults(func=bench_tracing)
+
+    p = sub.add_parser("replay", help=bench_replay.__doc__)
+    p.add_argument("--cassette", help="recorded llm_calls.jsonl; without it, a fake-upstream session is recorded first")
+    p.add_argument("--speed", type=float, default=1.0, help="replay latency multiplier (0 = instant)")
+    p.add_argument("--concurrency", type=int, default=1)
+    p.add_argument("--sessions", type=int, default=30)
+    p.add_argument("--latency", type=float, default=0.05)
+    p.set_defaults(func=bench_replay)
+
+    p = sub.add_parser("load", help=bench_load.__doc__)
+    p.add_argument("--sessions", type=int, default=40)
+    p.add_argument("--workers", type=int, default=4, help="app processes, like Streamlit replicas")
+    p.add_argument("--latency", type=float, default=0.05)
+    p.add_argument("--chunk-delay", type=float, default=0.005, help="seconds between streamed chunks")
+    p.add_argument("--error-rate", type=float, default=0.0)
+    p.add_argument("--save-baseline", metavar="PATH", help="write the metrics as a JSON baseline")
+    p.add_argument("--baseline", metavar="PATH", help="compare against a saved baseline; exit 1 on regression")
+    p.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown before flagging")
+    p.set_defaults(func=bench_load)
+
+    p = sub.add_parser("speculation", help=bench_speculation.__doc__)
+    p.add_argument("--sessions", type=int, default=40)
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--think", type=float, default=2.0, help="max seconds between the form being filled and submit")
+    p.add_argument("--change-rate", type=float, default=0.3, help="share of users who edit the goal before submit")
+    p.add_argument("--max-wasted", type=int, default=60, help="wasted speculative calls allowed per hour")
+    p.add_argument("--latency", type=float, default=0.4)
+    p.add_argument("--chunk-delay", type=float, default=0.02)
+    p.set_defaults(func=bench_speculation)
+
+    p = sub.add_parser("prompts", help=bench_prompts.__doc__)
+    p.add_argument("--live", type=int, default=0, metavar="N", help="also time N real calls per prompt")
+    p.set_defaults(func=bench_prompts)
+
+    p = sub.add_parser("columns", help=bench_columns.__doc__)
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.add_argument("--days", type=int, default=180)
+    p.add_argument("--rounds", type=int, default=5)
+    p.add_argument("--append", type=int, default=1000, help="rows appended for the incremental ingest")
+    p.set_defaults(func=bench_columns)
+
+    p = sub.add_parser("dedup", help=bench_dedup.__doc__)
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.add_argument("--repeats", type=float, default=0.3, help="share of rows that repeat an earlier lead")
+    p.add_argument("--saves", type=int, default=20000)
+    p.set_defaults(func=bench_dedup)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
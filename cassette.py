@@ -0,0 +1,375 @@
+"""Record and replay LLM calls.
+
+In "record" mode every roadmap stream and follow-up completion is appended
+to a JSONL log (config.LLM_CASSETTE["path"], llm_calls.jsonl by default)
+with its inputs, prompt, parameters, response text, token usage, time to
+first token and total latency. A background thread does the writing and
+rotates the file at `max_bytes`, keeping `backups` old files (path.1, ...).
+
+With `redact` on (the default), the user's name, goal and question are
+replaced by placeholders in the logged inputs, prompt and response, and the
+entry is found again by a hash of the original inputs. The model can still
+restate personal details in its own words, and a translated roadmap carries
+the goal, so keep record mode off real users' traffic where that matters.
+
+In "replay" mode no request leaves the process: each call is answered from
+the log by its inputs (profile, version and language; or question, program
+and language), after the recorded latency times `speed` (0 = instant).
+Prompt tokens are re-estimated from the prompt actually sent, so a replay
+shows what a prompt change does to cost. A call with no recording raises
+CassetteMiss, and the caller degrades as if the LLM had failed.
+
+Usage:
+    python cassette.py summary llm_calls.jsonl [other.jsonl ...]
+"""
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+
+from ratelimit import estimate_tokens
+from utils import percentile
+
+_STOP = object()
+
+# Personal input fields and the placeholders logged in their place, longest text first
+REDACTED = {"roadmap": "⟦ROADMAP⟧", "question": "⟦QUESTION⟧", "goal": "⟦GOAL⟧", "name": "⟦NAME⟧"}
+
+
+class CassetteMiss(Exception):
+    """Replay found no recorded response for these inputs"""
+
+
+def cassette_key(inputs):
+    """Stable lookup key for a call's inputs"""
+    return json.dumps(inputs, sort_keys=True, ensure_ascii=False)
+
+
+def _digest(inputs):
+    return hashlib.sha256(cassette_key(inputs).encode("utf-8")).hexdigest()
+
+
+def redact(text, inputs):
+    """`text` with the personal input values (REDACTED) swapped for their placeholders"""
+    for field, placeholder in REDACTED.items():
+        value = str(inputs.get(field) or "").strip()
+        if value:
+            text = re.sub(r"(?<!\w)" + re.escape(value) + r"(?!\w)", lambda m: placeholder, text)
+    return text
+
+
+def restore(text, inputs):
+    """Undo redact() with the inputs of the call being replayed"""
+    for field, placeholder in REDACTED.items():
+        if inputs.get(field):
+            text = text.replace(placeholder, str(inputs[field]).strip())
+    return text
+
+
+def _prompt(params):
+    return "\n".join(m["content"] for m in params["messages"])
+
+
+def _params(params):
+    return {k: v for k, v in params.items() if k != "messages"}
+
+
+class JsonlWriter:
+    """Appends JSON lines from a background thread and rotates the file by size"""
+
+    def __init__(self, path, max_bytes=50 * 1024 * 1024, backups=5, queue_size=10000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.written = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._writer = threading.Thread(target=self._run, name="cassette-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def write(self, entry):
+        """Queue an entry; never blocks the caller (entries are dropped if the writer falls behind)"""
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            lines = []
+            item = self._queue.get()
+            while True:
+                if item is _STOP:
+                    stopping = True
+                else:
+                    lines.append(json.dumps(item, ensure_ascii=False, separators=(",", ":")) + "\n")
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if lines:
+                self._append("".join(lines))
+                self.written += len(lines)
+
+    def _append(self, text):
+        data = text.encode("utf-8")
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        if size and size + len(data) > self.max_bytes:
+            self._rotate()
+        with open(self.path, "ab") as f:
+            f.write(data)
+
+    def _rotate(self):
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+        for n in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{n}"):
+                os.replace(f"{self.path}.{n}", f"{self.path}.{n + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def close(self):
+        """Write everything queued and stop the writer thread"""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+
+class _RecordedStream:
+    """Passes a streaming response through, recording it once it has been read to the end"""
+
+    def __init__(self, stream, started, finish):
+        self._stream = stream
+        self._started = started
+        self._finish = finish
+
+    def __iter__(self):
+        parts = []
+        ttft = usage = None
+        for chunk in self._stream:
+            x_groq = getattr(chunk, "x_groq", None)
+            if getattr(x_groq, "usage", None) is not None:
+                usage = x_groq.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                if ttft is None:
+                    ttft = time.perf_counter() - self._started
+                parts.append(chunk.choices[0].delta.content)
+            yield chunk
+        # Streams closed early (e.g. a losing hedge) are not recorded
+        self._finish("".join(parts), usage, ttft)
+
+    def close(self):
+        self._stream.close()
+
+
+class Recorder:
+    """Calls upstream and logs every completed call"""
+
+    replaying = False
+
+    def __init__(self, path="llm_calls.jsonl", max_bytes=50 * 1024 * 1024, backups=5, queue_size=10000,
+                 redact=True):
+        self.writer = JsonlWriter(path, max_bytes, backups, queue_size)
+        self.redact = redact
+
+    def create(self, call, inputs, params):
+        """Run call(params) (a chat completion) and record it under `inputs`"""
+        started = time.perf_counter()
+        scrub = (lambda text: redact(text, inputs)) if self.redact else (lambda text: text)
+        logged = {k: REDACTED[k] if self.redact and k in REDACTED and v else v for k, v in inputs.items()}
+        entry = {"ts": round(time.time(), 3), "key": _digest(inputs), "inputs": logged,
+                 "prompt": scrub(_prompt(params)), "params": _params(params)}
+        try:
+            response = call(params)
+        except Exception as e:
+            self.writer.write(dict(entry, error=f"{type(e).__name__}: {e}",
+                                   latency=round(time.perf_counter() - started, 4)))
+            raise
+
+        def finish(text, usage, ttft):
+            latency = time.perf_counter() - started
+            self.writer.write(dict(entry, response=scrub(text), usage=_usage(usage),
+                                   ttft=round(ttft if ttft is not None else latency, 4),
+                                   latency=round(latency, 4)))
+
+        if params.get("stream"):
+            return _RecordedStream(response, started, finish)
+        finish(response.choices[0].message.content, response.usage, None)
+        return response
+
+    def stats(self):
+        return {"mode": "record", "path": self.writer.path, "written": self.writer.written,
+                "dropped": self.writer.dropped, "redact": self.redact}
+
+
+def _usage(usage):
+    if usage is None:
+        return None
+    return {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens}
+
+
+def load_entries(path):
+    """Entries of a log and its rotated backups, oldest first"""
+    paths = []
+    n = 1
+    while os.path.exists(f"{path}.{n}"):
+        paths.insert(0, f"{path}.{n}")
+        n += 1
+    if os.path.exists(path):
+        paths.append(path)
+    entries = []
+    for p in paths:
+        with open(p, "r", encoding="utf-8") as f:
+            entries.extend(json.loads(line) for line in f if line.strip())
+    return entries
+
+
+class _ReplayedStream:
+    """Re-chunks a recorded response with its recorded timing"""
+
+    def __init__(self, entry, usage, speed):
+        self._entry = entry
+        self._usage = usage
+        self._speed = speed
+        self._closed = False
+
+    def __iter__(self):
+        text = self._entry["response"]
+        pieces = [text[i:i + 24] for i in range(0, len(text), 24)] or [""]
+        time.sleep(self._entry["ttft"] * self._speed)
+        gap = max(0.0, self._entry["latency"] - self._entry["ttft"]) * self._speed / len(pieces)
+        for i, piece in enumerate(pieces):
+            if self._closed:
+                return
+            if i:
+                time.sleep(gap)
+            delta = SimpleNamespace(content=piece)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], x_groq=None)
+        yield SimpleNamespace(choices=[], x_groq=SimpleNamespace(usage=self._usage))
+
+    def close(self):
+        self._closed = True
+
+
+class Replayer:
+    """Answers calls from a recorded log instead of the upstream"""
+
+    replaying = True
+
+    def __init__(self, path="llm_calls.jsonl", speed=1.0):
+        self.path = path
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._recorded = {}
+        for entry in load_entries(path):
+            if "response" in entry or "error" in entry:
+                # Found by the original inputs, and for redacted entries also by the logged ones
+                # (bench.py replay reruns a log from its entries)
+                for key in {entry.get("key") or _digest(entry["inputs"]), _digest(entry["inputs"])}:
+                    self._recorded.setdefault(key, deque()).append(entry)
+        self.counters = {"hits": 0, "misses": 0, "recorded_prompt_tokens": 0, "replayed_prompt_tokens": 0,
+                         "completion_tokens": 0}
+
+    def create(self, call, inputs, params):
+        """Replay the recorded call for `inputs`; repeated inputs cycle through their recordings"""
+        with self._lock:
+            recordings = self._recorded.get(_digest(inputs))
+            if not recordings:
+                self.counters["misses"] += 1
+                raise CassetteMiss(f"no recorded call for {inputs.get('kind')} inputs")
+            entry = recordings[0]
+            recordings.rotate(-1)
+            self.counters["hits"] += 1
+        if "error" in entry:
+            time.sleep(entry["latency"] * self.speed)
+            raise RuntimeError(f"replayed error: {entry['error']}")
+
+        entry = dict(entry, response=restore(entry["response"], inputs))
+        recorded = entry.get("usage") or {}
+        prompt_tokens = estimate_tokens(_prompt(params))
+        completion_tokens = recorded.get("completion_tokens", estimate_tokens(entry["response"]))
+        usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                total_tokens=prompt_tokens + completion_tokens)
+        with self._lock:
+            self.counters["recorded_prompt_tokens"] += recorded.get("prompt_tokens", 0)
+            self.counters["replayed_prompt_tokens"] += prompt_tokens
+            self.counters["completion_tokens"] += completion_tokens
+        if params.get("stream"):
+            return _ReplayedStream(entry, usage, self.speed)
+        time.sleep(entry["latency"] * self.speed)
+        message = SimpleNamespace(content=entry["response"])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, mode="replay", path=self.path, speed=self.speed)
+
+
+def from_config(mode=None, path="llm_calls.jsonl", max_bytes=50 * 1024 * 1024, backups=5, queue_size=10000,
+                speed=1.0, redact=True):
+    """Recorder, Replayer or None (calls go straight upstream) for config.LLM_CASSETTE"""
+    if mode == "record":
+        return Recorder(path, max_bytes, backups, queue_size, redact)
+    if mode == "replay":
+        return Replayer(path, speed)
+    if mode is not None:
+        raise ValueError(f"unknown cassette mode: {mode}")
+    return None
+
+
+def summarize(entries):
+    """Calls, errors, tokens and latency per call kind"""
+    kinds = {}
+    for entry in entries:
+        kinds.setdefault(entry["inputs"].get("kind", "?"), []).append(entry)
+    summary = {}
+    for kind, calls in sorted(kinds.items()):
+        ok = [c for c in calls if "response" in c]
+        tokens = [c["usage"]["total_tokens"] for c in ok if c.get("usage")]
+        summary[kind] = {
+            "calls": len(calls),
+            "errors": len(calls) - len(ok),
+            "tokens": sum(tokens),
+            "tokens_per_call": sum(tokens) / len(tokens) if tokens else 0.0,
+            "ttft_p50": percentile([c["ttft"] for c in ok], 50),
+            "ttft_p95": percentile([c["ttft"] for c in ok], 95),
+            "latency_p50": percentile([c["latency"] for c in ok], 50),
+            "latency_p95": percentile([c["latency"] for c in ok], 95),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["summary"])
+    parser.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+
+    for path in args.paths:
+        entries = load_entries(path)
+        if not entries:
+            print(f"{path}: no recorded calls", file=sys.stderr)
+            continue
+        print(f"{path}: {len(entries)} calls")
+        for kind, s in summarize(entries).items():
+            print(f"  {kind:<9} calls {s['calls']:5d}  errors {s['errors']:4d}  tokens {s['tokens']:8d} "
+                  f"({s['tokens_per_call']:.0f}/call)  ttft p50 {s['ttft_p50']:.2f}s p95 {s['ttft_p95']:.2f}s  "
+                  f"latency p50 {s['latency_p50']:.2f}s p95 {s['latency_p95']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
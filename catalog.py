@@ -0,0 +1,376 @@
+"""Localized programs, FAQs and page copy, precomputed into a versioned catalog.
+
+`python catalog.py build` translates every source string (the PROGRAMS_DB
+descriptions, faqs.json and the page copy in COPY) into each language of
+config.LANGUAGES with the LLM, and writes the results to config.CATALOG's
+JSON file. Builds are incremental: only strings missing from the catalog
+are sent, and strings no longer in the source are dropped. Commit the file
+along with the source change that needed it; `check` exits non-zero while
+any language is missing strings, or while app.py writes page text itself
+instead of taking it from COPY (literal_copy()), so a deploy or CI step can
+refuse to ship an English-only page.
+
+At runtime the catalog is read once per process (get()) and never calls the
+LLM. Anything not translated yet is shown in English. Restart the app to
+pick up a rebuilt catalog.
+
+Usage:
+    python catalog.py build            # translate new and changed strings
+    python catalog.py build --force    # translate everything again
+    python catalog.py status           # translated strings per language
+    python catalog.py check            # like status, but fails if anything is untranslated
+"""
+import argparse
+import ast
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from functools import lru_cache
+
+import config
+from tokenizer import count_tokens
+
+# Bump when the file layout changes; files in another format are ignored and rebuilt
+CATALOG_FORMAT = 1
+
+# PROGRAMS_DB fields shown to users; the rest are names, prices and recommender input
+PROGRAM_FIELDS = ("duration", "focus", "outcomes")
+
+# Static page copy, by the place it is used in app.py. {fields} are filled in by Catalog.copy().
+COPY = {
+    "busy_warning": "⚠️ Asha is busy right now, so here is your backup roadmap. Try again in a few minutes "
+                    "for a fully personalised one.",
+    "queue_notice": "⏳ Many women are building their roadmaps right now. You're #{position} in line "
+                    "(about {seconds}s).",
+    "app_title": "👑 Iron Lady Navigator",
+    "app_subtitle": "AI-Powered Leadership Path Designer",
+    "language_label": "🌐 Language",
+    # Stage 0
+    "welcome_title": "🎯 Transform Your Leadership Journey in 3 Minutes",
+    "welcome_text": "Asha, your AI Leadership Architect, will analyze your profile and design a personalized "
+                    "roadmap to success.",
+    "badge_ai": "🤖 AI-Powered",
+    "badge_languages": "🌍 Multi-Language",
+    "badge_success": "📊 92% Success Rate",
+    "badge_instant": "⚡ Instant Results",
+    "form_title": "🌸 Tell Asha About Yourself",
+    "name_label": "👩 Your Name",
+    "name_placeholder": "Anjali Sharma",
+    "contact_label": "📱 Email or Phone (optional)",
+    "contact_placeholder": "anjali@example.com",
+    "stage_label": "📊 Current Stage",
+    "challenge_label": "⚠️ Biggest Challenge",
+    "goal_label": "🎯 Your 6-Month Goal",
+    "goal_placeholder": "I want to become a confident team leader and get promoted to senior management...",
+    "cta_button": "✨ Get My Free AI-Powered Roadmap",
+    "form_incomplete": "⚠️ Please fill in your name and goal to continue.",
+    "stories_title": "🌟 Real Transformation Stories",
+    "story_priya": "Priya M. - Software Engineer",
+    "story_priya_quote": "From coding silently to leading a team of 12 in 6 months!",
+    "story_priya_where": "📍 Bangalore • Leadership Accelerator",
+    "story_sneha": "Sneha K. - Career Break (5 yrs)",
+    "story_sneha_quote": "Landed Senior Manager role after restart program!",
+    "story_sneha_where": "📍 Mumbai • Career Restart Launchpad",
+    "story_anita": "Anita R. - Entrepreneur",
+    "story_anita_quote": "Scaled my startup from 2 to 45 employees with confidence!",
+    "story_anita_where": "📍 Delhi • 10X Masterclass",
+    # Stage 1
+    "progress_title": "📈 Your Leadership Journey Progress",
+    "progress_complete": "{percent}% Complete",
+    "roadmap_title": "🎉 {name}'s Personalized Leadership Roadmap",
+    "roadmap_partly_translated": "🛟 Our AI coach is busy, so parts of this roadmap are still in {language}",
+    "roadmap_degraded": "🛟 Our AI coach is busy, so this roadmap comes from saved and locally computed "
+                        "recommendations",
+    "roadmap_cached": "⚡ Served from cache in {seconds}s",
+    "roadmap_speculative": "⚡ Prepared while you filled in the form • First words in {first}s",
+    "roadmap_streamed": "⚡ First words in {first}s • Full roadmap in {total}s",
+    "match_title": "🔥 AI Match Score",
+    "best_fit_title": "📚 Best Fit",
+    "best_fit_sessions": "Live Sessions",
+    "success_rate_title": "🎯 Success Rate",
+    "success_rate_caption": "Women achieved their goals",
+    "save_title": "📥 Save Your Roadmap",
+    "download_button": "📄 Download as TXT",
+    "faq_title": "❓ Quick Answers to Common Questions",
+    "faq_tab_all": "📋 All FAQs",
+    "faq_tab_search": "🔍 Search",
+    "faq_search_label": "🔍 Search FAQs",
+    "faq_search_placeholder": "e.g., EMI, certificate, online...",
+    "faq_no_results": "No FAQs found. Try different keywords or ask Asha below!",
+    "ask_title": "💬 Ask Asha Anything",
+    "ask_subtitle": "*Have questions about the program, schedule, or your roadmap? Ask away!*",
+    "question_label": "Your question:",
+    "question_placeholder": "E.g., Can I join if I work full-time?",
+    "ask_button": "💡 Get Answer",
+    "ask_thinking": "Asha is thinking...",
+    "ask_failed": "Couldn't reach Asha right now. Please try WhatsApp support below.",
+    "history_title": "💬 Conversation History",
+    "chat_you": "You:",
+    "chat_asha": "Asha:",
+    "source_faq": "📚 from our FAQs",
+    "source_cache": "⚡ instant answer",
+    "source_degraded": "🛟 quick answer while Asha is busy",
+    "offer_title": "💳 Limited Time Offer - Enroll Now!",
+    "offer_A": "🎁 Special Offer - 70% OFF",
+    "offer_B": "⚡ FLASH SALE - 72% OFF!",
+    "offer_includes": "✅ Live Sessions • ✅ Mentorship • ✅ Certificate • ✅ Community Access",
+    "offer_scarcity": "⚠️ **Only 3 seats left at this price!**",
+    "enroll_button": "🛒 Enroll Now - ₹29,997",
+    "enroll_success": "🎉 Welcome to Iron Lady! Check your email for next steps.",
+    "enroll_callback": "📞 Our counselor will call you in 10 minutes to complete enrollment.",
+    "mentor_title": "📞 Speak to a Real Mentor in 60 Seconds",
+    "mentor_subtitle": "Get Your Questions Answered LIVE",
+    "mentor_response": "⚡ Avg. response time: 2 minutes",
+    "whatsapp_button": "💬 WhatsApp Asha Now (FREE)",
+    "whatsapp_open": "💬 Open WhatsApp Chat",
+    "share_title": "🌟 Share Your Roadmap",
+    "share_linkedin": "📘 Share on LinkedIn",
+    "share_twitter": "🐦 Share on Twitter",
+    "share_copy": "📋 Copy Text",
+    "restart_button": "🔄 Start New Assessment",
+    "footer_tagline": "Iron Lady - Empowering Women Leaders Since 2019",
+    "footer_credit": "Powered by AI • Built with ❤️ for Women Who Lead",
+}
+
+
+def source_strings(faqs):
+    """Every string the catalog translates, in a stable order without repeats"""
+    strings = []
+    for info in config.PROGRAMS_DB.values():
+        for field in PROGRAM_FIELDS:
+            value = info[field]
+            strings.extend(value if isinstance(value, list) else [value])
+    strings += config.STAGES + config.CHALLENGES
+    for faq in faqs:
+        strings += [faq["question"], faq["answer"]]
+    strings.extend(COPY.values())
+    return list(dict.fromkeys(strings))
+
+
+def source_hash(strings):
+    """Short hash of the source strings, to tell whether a catalog is current"""
+    raw = json.dumps(strings, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def parse_translations(text, count):
+    """The JSON array of `count` non-empty strings in a model reply, or None"""
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end < start:
+        return None
+    try:
+        values = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(values, list) or len(values) != count:
+        return None
+    if not all(isinstance(v, str) and v.strip() for v in values):
+        return None
+    return values
+
+
+def read(path):
+    """The catalog file as a dict; an empty catalog if it is missing, unreadable or in another format"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = None
+    if not isinstance(data, dict) or data.get("format") != CATALOG_FORMAT:
+        return {"format": CATALOG_FORMAT, "version": 0, "source": None, "built": None, "languages": {}}
+    return data
+
+
+def write(path, data):
+    """Replace the catalog file in one step, so readers never see half of it"""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+class Catalog:
+    """The catalog's translations into one language; English for anything missing"""
+
+    def __init__(self, language, strings):
+        self.language = language
+        self.strings = strings
+
+    def text(self, source):
+        """`source` in this language, or unchanged if it has no translation"""
+        return self.strings.get(source, source)
+
+    def copy(self, key, **fields):
+        """The page copy COPY[key] in this language, with its {fields} filled in"""
+        text = self.text(COPY[key])
+        if not fields:
+            return text
+        try:
+            return text.format(**fields)
+        except (KeyError, IndexError, ValueError):
+            return COPY[key].format(**fields)  # the translation lost or broke a field
+
+    def program(self, name):
+        """PROGRAMS_DB[name] with its descriptive fields in this language"""
+        info = dict(config.PROGRAMS_DB[name])
+        for field in PROGRAM_FIELDS:
+            value = info[field]
+            info[field] = [self.text(v) for v in value] if isinstance(value, list) else self.text(value)
+        return info
+
+    def faqs(self, faqs):
+        """`faqs` in this language, each tagged with it"""
+        return [{"question": self.text(faq["question"]), "answer": self.text(faq["answer"]),
+                 "language": self.language} for faq in faqs]
+
+    def translated_faqs(self, faqs):
+        """Like faqs(), but only the entries whose question and answer are both translated"""
+        return [localized for faq, localized in zip(faqs, self.faqs(faqs))
+                if faq["question"] in self.strings and faq["answer"] in self.strings]
+
+
+@lru_cache(maxsize=None)
+def _languages(path):
+    return read(path)["languages"]
+
+
+@lru_cache(maxsize=None)
+def get(language, path=None):
+    """The Catalog for `language`, read from disk once per process"""
+    path = config.CATALOG["path"] if path is None else path
+    return Catalog(language, _languages(path).get(language, {}))
+
+
+# Streamlit calls that put their string arguments on the page
+UI_CALLS = {"markdown", "write", "caption", "title", "header", "subheader", "info", "warning", "error", "success",
+            "toast", "spinner", "expander", "tabs", "metric", "button", "link_button", "download_button",
+            "text_input", "text_area", "selectbox", "radio"}
+UI_KEYWORDS = ("label", "placeholder", "help")
+# Page text deliberately left out of COPY: setup errors only the operator sees
+ENGLISH_ONLY = {"🔑 Please set GROQ_API_KEY in your .env file"}
+_NOT_WORDS = re.compile(r"<[^>]*>|\{[^}]*\}|\S+@\S+|\S+://\S+|www\.\S+")
+
+
+def _texts(node):
+    """Literal strings in an argument; an f-string with its fields as {}"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        yield node.value
+    elif isinstance(node, ast.JoinedStr):
+        yield "".join(part.value if isinstance(part, ast.Constant) else "{}" for part in node.values)
+    elif isinstance(node, (ast.List, ast.Tuple)):
+        for item in node.elts:
+            yield from _texts(item)
+
+
+def _ui_calls(node):
+    for child in ast.iter_child_nodes(node):
+        if isinstance(child, ast.With) and any(ast.unparse(item.context_expr) == "st.sidebar"
+                                               for item in child.items):
+            continue  # the sidebar is the operator's dashboard
+        if isinstance(child, ast.Call) and isinstance(child.func, ast.Attribute) and child.func.attr in UI_CALLS:
+            yield child
+        yield from _ui_calls(child)
+
+
+def literal_copy(path="app.py"):
+    """Page text written into `path` rather than taken from COPY: [(line, text)].
+
+    Looks at the strings passed to Streamlit display calls outside the
+    sidebar. A string counts if words are left once HTML tags, {fields},
+    URLs and email addresses are removed.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    found = []
+    for call in _ui_calls(tree):
+        args = call.args + [k.value for k in call.keywords if k.arg in UI_KEYWORDS]
+        for text in (t for arg in args for t in _texts(arg)):
+            if text not in ENGLISH_ONLY and re.search(r"[^\W\d_]{2}", _NOT_WORDS.sub(" ", text)):
+                found.append((call.lineno, text))
+    return found
+
+
+def _batches(strings, budget):
+    """Consecutive runs of `strings` of about `budget` tokens each"""
+    batch, tokens = [], 0
+    for text in strings:
+        n = count_tokens(text)
+        if batch and tokens + n > budget:
+            yield batch
+            batch, tokens = [], 0
+        batch.append(text)
+        tokens += n
+    if batch:
+        yield batch
+
+
+def build(core, faqs, path, languages=None, force=False, log=print):
+    """Translate the source strings missing from the catalog at `path` and save it.
+
+    Batches that fail or come back unusable are left out and logged; running
+    the build again retries just those. Returns the saved catalog.
+    """
+    strings = source_strings(faqs)
+    data = read(path)
+    languages = languages or [language for language in config.LANGUAGES if language != "English"]
+    changed = False
+    for language in languages:
+        done = {} if force else data["languages"].get(language, {})
+        kept = {text: done[text] for text in strings if text in done}
+        todo = [text for text in strings if text not in kept]
+        for batch in _batches(todo, config.CATALOG["batch_tokens"]):
+            try:
+                kept.update(zip(batch, core.translate_strings(batch, language)))
+            except Exception as e:
+                log(f"{language}: {len(batch)} strings not translated ({e}); build again to retry")
+        changed = changed or kept != data["languages"].get(language, {})
+        data["languages"][language] = {text: kept[text] for text in strings if text in kept}
+        log(f"{language}: {len(kept)}/{len(strings)} strings")
+    source = source_hash(strings)
+    if changed or data["source"] != source:
+        data.update(version=data["version"] + 1, source=source, built=time.strftime("%Y-%m-%d %H:%M:%S"))
+        write(path, data)
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["build", "status", "check"])
+    parser.add_argument("--path", default=config.CATALOG["path"])
+    parser.add_argument("--faqs", default="faqs.json")
+    parser.add_argument("--app", default="app.py", help="page source that must take its text from COPY (check)")
+    parser.add_argument("--languages", nargs="+", choices=[l for l in config.LANGUAGES if l != "English"])
+    parser.add_argument("--force", action="store_true", help="translate strings already in the catalog again")
+    args = parser.parse_args()
+
+    with open(args.faqs, "r", encoding="utf-8") as f:
+        faqs = json.load(f)
+    if args.command == "build":
+        from core import Core  # deferred: status needs no LLM client
+        data = build(Core(faq_path=args.faqs), faqs, args.path, args.languages, args.force)
+    else:
+        data = read(args.path)
+        strings = source_strings(faqs)
+        complete = True
+        for language in args.languages or [l for l in config.LANGUAGES if l != "English"]:
+            done = data["languages"].get(language, {})
+            count = sum(1 for text in strings if text in done)
+            complete = complete and count == len(strings)
+            print(f"{language}: {count}/{len(strings)} strings")
+    print(f"Catalog version {data['version']}, built {data['built'] or 'never'}")
+    if args.command == "check":
+        literals = literal_copy(args.app)
+        for line, text in literals:
+            print(f"{args.app}:{line}: page text outside catalog.COPY: {text!r}")
+        if literals:
+            sys.exit(f"{args.app} writes page text itself; move it into catalog.COPY")
+        if not complete:
+            sys.exit(f"{args.path} is missing translations; run `python catalog.py build`")
+
+
+if __name__ == "__main__":
+    main()
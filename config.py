@@ -7,6 +7,11 @@ LANGUAGES = {
     "தமிழ்": {"name": "தமிழ்", "code": "ta"}
 }
 
+# Stage 0 form options; recommender.py and PROGRAMS_DB "ideal_for" use these values
+STAGES = ["Student", "Professional", "Manager", "Career Break", "Entrepreneur"]
+CHALLENGES = ["Low Confidence", "Stagnant Career", "Return to Work", "Public Speaking", "Work-Life Balance",
+              "Leadership Skills"]
+
 PROGRAMS_DB = {
     "Leadership Accelerator": {
         "duration": "6 Months",
@@ -49,3 +54,161 @@ BUSINESS_INFO = {
     "email": "hello@iamironlady.com",
     "phone": "+91 98765 43210"
 }
+
+# Shared roadmap cache (SQLite, shared by all Streamlit workers)
+ROADMAP_CACHE = {
+    "path": "roadmap_cache.db",
+    "ttl": 86400,          # seconds
+    "max_entries": 5000    # least recently used roadmaps are evicted beyond this
+}
+
+# LLM settings
+LLM_MODEL = "llama-3.1-8b-instant"
+LLM_ROADMAPS = True  # False serves locally rendered roadmaps with no LLM call (e.g. under load)
+PRELOAD_LLM = True   # import the Groq SDK in the background during stage 0
+# Ask Groq to enforce JSON roadmaps: None (prompt only), "json_object" or "json_schema" (models that support it)
+ROADMAP_RESPONSE_FORMAT = None
+
+# Token budgets per LLM call, counted locally (tokenizer.py). A roadmap prompt over budget
+# drops the extra candidate programs, then shortens the user's goal; "completion" is max_tokens.
+TOKEN_BUDGETS = {
+    "roadmap": {"prompt": 600, "completion": 800},
+    "followup": {"prompt": 250, "completion": 400},
+    "translate": {"prompt": 900, "completion": 800},  # a shown roadmap into another language
+    "catalog": {"prompt": 600, "completion": 1200},   # one batch of catalog strings (catalog.py build)
+    "languages": {"हिंदी": 1.5, "తెలుగు": 1.5, "தமிழ்": 1.5},  # completion multipliers: more tokens per word
+    "versions": {"A": 1.0, "B": 1.0}                          # completion multipliers per A/B tone
+}
+
+# Localized programs, FAQs and page copy (catalog.py); built offline with `python catalog.py build`
+CATALOG = {
+    "path": "catalog.json",  # versioned; loaded once per process, English is shown for anything missing
+    "batch_tokens": 300      # source tokens per translation call during a build
+}
+
+# Follow-up questions matching a FAQ at least this closely (TF-IDF cosine, 0-1) skip the LLM
+FAQ_ANSWER_THRESHOLD = 0.55
+
+# With the LLM unavailable, a FAQ matching at least this closely is still better than nothing
+DEGRADED_FAQ_THRESHOLD = 0.25
+
+# Semantic cache of follow-up answers, shared across users
+ANSWER_CACHE = {
+    "threshold": 0.85,                # cosine similarity needed to reuse an answer
+    "max_bytes": 8 * 1024 * 1024,     # least recently used answers are evicted beyond this
+    "path": "answer_cache.db",        # None keeps the cache in memory only
+    "ttl": 7 * 86400                  # seconds persisted answers are reloaded for
+}
+
+# Shared Groq client: one per process, HTTP keep-alive connections are pooled
+LLM_CLIENT = {
+    "pool_size": 20,          # max open connections
+    "keepalive": 20,          # idle connections kept for reuse
+    "keepalive_expiry": 60.0, # seconds an idle connection stays open
+    "timeout": 30.0,          # seconds per request
+    "connect_timeout": 5.0,
+    "max_retries": 2
+}
+
+# Lead store (SQLite, written in batches by a background thread)
+LEAD_STORE = {
+    "path": "leads.db",
+    "queue_size": 10000,     # leads pending for the writer; more are dropped (LeadStore.dropped)
+    "batch_size": 200,       # leads per transaction
+    "flush_interval": 0.5,   # seconds the writer waits for more leads
+    "merge_window": 3600.0   # dedup: seconds within which one form saved again without a contact is one lead
+}
+
+# Columnar copy of the leads for reports (lead_columns.py)
+LEAD_COLUMNS = {
+    "path": "leads_columns"  # directory of memory-mapped column files
+}
+
+# Coalesce identical in-flight roadmap generations (one LLM call, the rest wait)
+SINGLE_FLIGHT = {
+    "path": "roadmap_cache.db",  # lease table shared by worker processes; None = this process only
+    "timeout": 60.0,             # seconds a follower waits before generating its own roadmap
+    "lease": 120.0,              # seconds before a silent leader is presumed dead
+    "poll_interval": 0.05        # first poll delay for followers in other processes (doubles to 0.5s)
+}
+
+# Shared Groq quota for every worker process (SQLite token buckets + wait queue)
+RATE_LIMIT = {
+    "path": "ratelimit.db",
+    "rpm": 30,              # requests per minute (Groq free tier for llama-3.1-8b-instant)
+    "tpm": 6000,            # tokens per minute, prompt + completion
+    "headroom": 0.9,        # fraction of the quota actually used
+    "queue_size": 100,      # callers allowed to wait; the next one gets the fallback
+    "max_wait": 45.0        # seconds a caller waits before falling back
+}
+
+# Generate the roadmap in the background once stage 0 has a name and goal (speculation.py, per process)
+SPECULATION = {
+    "enabled": True,
+    "max_inflight": 4,           # background generations at once; only spare LLM quota is used
+    "max_wasted_per_hour": 60,   # LLM calls for roadmaps nobody claimed; speculation pauses beyond this
+    "claim_ttl": 600.0           # seconds a speculation waits for its user to submit
+}
+
+# Dashboard event counters (analytics.py): per-thread buffers flushed to SQLite shared by worker processes
+ANALYTICS = {
+    "path": "analytics.db",
+    "flush_interval": 1.0,  # seconds between flushes; counts show up within two of these
+    "refresh": 2.0          # seconds the dashboard reuses its last rollup
+}
+
+# A/B experiments (experiments.py): hash-bucketed variants, exposure/conversion log shared by worker processes
+EXPERIMENTS = {
+    "path": "experiments.db",
+    "experiments": {
+        "roadmap_tone": {"A": 50, "B": 50}  # variant weights; the first is the control (prompts.TONES)
+    },
+    "alpha": 0.05,              # significance level of the sequential test
+    "mixture_variance": 1e-4,   # prior variance of the rate difference (about 1 point)
+    "min_exposures": 100,       # per variant before the test starts looking
+    "queue_size": 10000,        # events waiting for the writer; more are dropped
+    "batch_size": 500,          # events per transaction
+    "flush_interval": 0.5,      # seconds the writer waits for more events
+    "refresh": 2.0              # seconds results() are reused
+}
+
+# Adaptive timeouts, hedged requests and circuit breaker for LLM calls (per process)
+RESILIENCE = {
+    "timeout_percentile": 99,   # timeout = multiplier x this percentile of recent latency...
+    "timeout_multiplier": 2.0,
+    "min_timeout": 5.0,         # ...but never below this (seconds)
+    "max_timeout": 30.0,        # ...nor above this, which is also used until min_samples calls are seen
+    "min_samples": 20,
+    "hedge_percentile": 95,     # send a second request once the first has waited this long
+    "hedge_min_delay": 0.5,
+    "failure_threshold": 0.5,   # breaker opens when this share of the last `window` calls failed
+    "window": 20,
+    "min_calls": 5,
+    "reset_timeout": 30.0,      # seconds open before a trial call
+    "threads": 16
+}
+
+# Record/replay of LLM calls (cassette.py)
+LLM_CASSETTE = {
+    "mode": None,                   # "record" logs every call, "replay" answers from the log offline
+    "path": "llm_calls.jsonl",
+    "max_bytes": 50 * 1024 * 1024,  # rotate to llm_calls.jsonl.1 beyond this
+    "backups": 5,                   # rotated files kept
+    "queue_size": 10000,            # calls waiting for the writer thread; more are dropped
+    "speed": 1.0,                   # replay latency multiplier (0 = instant)
+    "redact": True                  # log names, goals and questions as placeholders; off only for synthetic traffic
+}
+
+# Request tracing (tracing.py): per-step timings in a ring buffer, shown on the admin view (?view=admin)
+TRACING = {
+    "enabled": False,          # off: spans are no-ops
+    "buffer_size": 10000,      # most recent samples kept in memory
+    "jsonl_path": None,        # e.g. "traces.jsonl" to also append every sample to a file
+    "flush_every": 200         # samples per append to jsonl_path
+}
+
+# Headless JSON API (api.py)
+API = {
+    "threads": 32,               # worker threads for cache, LLM and lead calls
+    "max_body": 64 * 1024        # bytes accepted per request body
+}
@@ -0,0 +1,523 @@
+"""Roadmap, follow-up, FAQ and lead logic shared by the Streamlit app and the HTTP API.
+
+Nothing here depends on Streamlit. Keep one Core per process: the app builds
+it with st.cache_resource (resources.core), api.py at startup.
+"""
+import hmac
+import itertools
+import json
+import os
+import threading
+import time
+
+import cassette
+import catalog
+import config
+from analytics import Analytics
+from answer_cache import AnswerCache
+from experiments import Experiments
+from faq_search import FAQIndex
+from followup import FollowupStats, answer_followup
+from lead_store import LeadStore
+from prompts import build_catalog_prompt, build_roadmap_prompt, build_translation_prompt, token_budget
+from ratelimit import SharedLimiter
+from resilience import CircuitOpen, Resilience
+from recommender import build_roadmap, recommend
+from roadmap_cache import NAME_PLACEHOLDER, RoadmapCache, anonymize, localized_key, profile_key
+from roadmap_format import (FIXED, RESPONSE_FORMATS, SCHEMA, RoadmapParser, SectionRenderer, json_name,
+                            render_markdown)
+from singleflight import FlightError, SingleFlight
+from speculation import Speculator
+from tokenizer import TokenMeter, count_tokens
+from tracing import tracer
+
+
+def env_api_key():
+    """Groq API key from the environment"""
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise ValueError("GROQ_API_KEY not found in environment.")
+    return api_key
+
+
+def env_admin_token():
+    """Operator token from the environment; None leaves the operator views disabled"""
+    return os.getenv("ADMIN_TOKEN") or None
+
+
+def token_matches(given, expected):
+    """Whether `given` is the operator token, compared in constant time; never when none is set"""
+    if not given or not expected:
+        return False
+    return hmac.compare_digest(given.encode("utf-8"), expected.encode("utf-8"))
+
+
+def fallback_roadmap(user_data, rec, version):
+    """Backup roadmap shown when the AI service is unavailable: (roadmap, markdown)"""
+    roadmap = build_roadmap(user_data, rec, version)
+    return roadmap, "\n### ⚠️ AI Service Busy - Using Backup Roadmap\n" + render_markdown(roadmap)
+
+
+class SpeculationSkipped(Exception):
+    """A speculative roadmap found no spare LLM quota"""
+
+
+class Core:
+    """Process-wide services: LLM client, caches, FAQ index and lead store"""
+
+    def __init__(self, api_key=env_api_key, faq_path="faqs.json"):
+        self._api_key = api_key
+        self._client = None
+        self._client_lock = threading.Lock()
+        self.roadmap_cache = RoadmapCache(**config.ROADMAP_CACHE)
+        self.lead_store = LeadStore(**config.LEAD_STORE)
+        with open(faq_path, "r", encoding="utf-8") as f:
+            self.faqs = json.load(f)
+        # Translated FAQs (catalog.py) are indexed too, so questions in any language can match them
+        self.faq_index = FAQIndex(self.faqs + [faq for language in config.LANGUAGES if language != "English"
+                                               for faq in catalog.get(language).translated_faqs(self.faqs)])
+        self.followup_stats = FollowupStats()
+        self.token_meter = TokenMeter()
+        self.answer_cache = AnswerCache(**config.ANSWER_CACHE)
+        self.flights = SingleFlight(**config.SINGLE_FLIGHT)
+        self.limiter = SharedLimiter(**config.RATE_LIMIT)
+        self.resilience = Resilience(**config.RESILIENCE)
+        self.cassette = cassette.from_config(**config.LLM_CASSETTE)
+        self.speculator = Speculator(self, **config.SPECULATION)
+        self.analytics = Analytics(**config.ANALYTICS)
+        self.experiments = Experiments(**config.EXPERIMENTS)
+
+    def client(self):
+        """The pooled Groq client, built on first use"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    import llm  # deferred: pulls in groq and httpx
+                    self._client = llm.default_client(self._api_key())
+        return self._client
+
+    def roadmap_chunks(self, user_data, version, language, rec=None, timings=None, on_error=None,
+                       on_wait=None, speculative=False):
+        """Yield the roadmap as markdown sections: from the cache, the LLM stream or locally.
+
+        Sections are yielded as soon as their fields are complete in the
+        model's JSON. `timings` receives ttft/total seconds, "ok", "cached",
+        "coalesced" (another caller was already generating the same profile),
+        "degraded" and "roadmap", the structured roadmap (roadmap_format.SCHEMA).
+        While the call is queued for LLM quota, `on_wait(position, eta_seconds)`
+        is called. On an LLM error or a full queue, `on_error(exception)` is
+        called and the best roadmap available without the LLM is yielded
+        instead; while the circuit breaker is open no call is made.
+
+        A `speculative` call (speculation.py) only uses quota that is free
+        right now and never queues. If it cannot call the LLM it yields
+        nothing, and its failures are not passed on to identical requests
+        waiting for it: they generate their own roadmap.
+        """
+        if rec is None:
+            with tracer.span("roadmap.recommend"):
+                rec = recommend(user_data)
+        timings = {} if timings is None else timings
+        start = time.perf_counter()
+
+        if not config.LLM_ROADMAPS:
+            roadmap = build_roadmap(user_data, rec, version)
+        else:
+            key = profile_key(user_data, version, language)
+            with tracer.span("roadmap.cache_get"):
+                roadmap = self._cached_roadmap(key, user_data['name'])
+        if roadmap is not None:
+            elapsed = time.perf_counter() - start
+            timings.update(ttft=elapsed, total=elapsed, ok=True, cached=True, roadmap=roadmap)
+            yield render_markdown(roadmap)
+            return
+
+        timings["cached"] = False
+        flight = self.flights.begin(key)
+        if not flight.leader:
+            timings["coalesced"] = True
+            try:
+                ready = flight.wait()
+            except FlightError as e:
+                # The identical request just failed upstream; don't hammer it again
+                timings["ok"] = False
+                if speculative:
+                    return
+                timings["degraded"] = True
+                if on_error:
+                    on_error(e)
+                timings["ttft"] = timings["total"] = time.perf_counter() - start
+                timings["roadmap"], text = self.degraded_roadmap(user_data, version, language, rec)
+                yield text
+                return
+            roadmap = self._cached_roadmap(key, user_data['name']) if ready else None
+            if roadmap is not None:
+                elapsed = time.perf_counter() - start
+                timings.update(ttft=elapsed, total=elapsed, ok=True, cached=True, roadmap=roadmap)
+                yield render_markdown(roadmap)
+                return
+            # Timed out, or the leader's roadmap could not be shared: generate our own
+
+        # The recommender's choice is final; the model writes everything else
+        renderer = SectionRenderer({"program": rec.program, "score": rec.score, "alternate": rec.alternate})
+        shared, error = False, None
+        try:
+            with tracer.span("roadmap.prompt"):
+                prompt = build_roadmap_prompt(user_data, version, language, rec)
+            inputs = {"kind": "roadmap", "name": user_data['name'], "role": user_data['role'],
+                      "challenge": user_data['challenge'], "goal": user_data['goal'], "version": version,
+                      "language": language}
+            max_tokens = token_budget("roadmap", language, version)["completion"]
+            yield from self._stream_sections(prompt, max_tokens, inputs, renderer, timings, start, on_wait,
+                                             speculative)
+            # Fields the model left out or got wrong come from the local roadmap
+            missing = [f for f in SCHEMA["required"] if f not in renderer.roadmap]
+            rest = renderer.finish(build_roadmap(user_data, rec, version))
+            if rest:
+                yield rest
+            timings["ok"] = True
+            timings["roadmap"] = renderer.roadmap
+            if missing:
+                timings["filled"] = missing
+            with tracer.span("roadmap.cache_put"):
+                shared = self.roadmap_cache.put(key, json.dumps(renderer.roadmap, ensure_ascii=False),
+                                                json_name(user_data['name']))
+        except Exception as e:
+            error = e
+        finally:
+            # Also runs if the consumer stops early, so followers never wait on a dead leader
+            if flight.leader:
+                flight.finish(shared, None if speculative else error)
+            timings["total"] = time.perf_counter() - start
+
+        if error is not None and speculative and not renderer.rendered:
+            timings["ok"] = False
+            timings["skipped" if isinstance(error, SpeculationSkipped) else "failed"] = True
+            return
+        if error is not None:
+            timings["ok"] = False
+            timings["degraded"] = True
+            if on_error and not isinstance(error, CircuitOpen):
+                on_error(error)
+            timings.setdefault("ttft", time.perf_counter() - start)
+            if renderer.rendered:
+                # Part of the roadmap is already on screen: complete it locally
+                yield renderer.finish(build_roadmap(user_data, rec, version))
+                timings["roadmap"] = renderer.roadmap
+            else:
+                timings["roadmap"], text = self.degraded_roadmap(user_data, version, language, rec)
+                yield text
+            timings["total"] = time.perf_counter() - start
+
+    def _stream_sections(self, prompt, max_tokens, inputs, renderer, timings, start, on_wait=None,
+                         speculative=False, value=None):
+        """Stream one JSON roadmap completion through `renderer`, yielding its sections as they are ready.
+
+        Queues for LLM quota (or, if `speculative`, takes only spare quota),
+        sets timings["ttft"] and records the tokens used. `value(v)`, if
+        given, rewrites each parsed field value before it is rendered.
+        Raises on any LLM error; the stream is closed if it fails or the
+        consumer stops early (e.g. a cancelled speculation). Every call's
+        quota, hedges included, is settled however it ends.
+        """
+        kind = inputs["kind"]
+        prompt_tokens = count_tokens(prompt)
+        tokens = prompt_tokens + max_tokens
+        with tracer.span(f"{kind}.queue"):
+            if not speculative:
+                reserved = self.limiter.acquire(tokens, on_wait)
+            else:
+                reserved = self.resilience.breaker.healthy() and self.limiter.try_acquire(tokens)
+                if not reserved:
+                    raise SpeculationSkipped("no spare LLM quota")
+
+        def discard(opened):
+            # A losing hedge is closed after its first chunk: about the prompt was used
+            opened[0].close()
+            self.limiter.settle(reserved, prompt_tokens)
+
+        llm_span = tracer.span(f"{kind}.llm", language=inputs["language"], version=inputs.get("version"))
+        llm_start = time.perf_counter()
+        stream, chunks = self._limited_call(
+            f"{kind}_first_chunk",
+            lambda timeout: self._open_roadmap_stream(prompt, max_tokens, timeout, inputs),
+            tokens, reserved, discard,
+        )
+        finished = False
+        parser = RoadmapParser()
+        used = finish_reason = None
+        try:
+            tracer.record(f"{kind}.llm_first_chunk", time.perf_counter() - llm_start)
+            timings["ttft"] = time.perf_counter() - start
+            yield renderer.add(None, None)  # the header needs nothing from the model
+            for chunk in chunks:
+                usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+                if usage is not None:
+                    used = usage.total_tokens
+                if not chunk.choices:
+                    continue
+                finish_reason = getattr(chunk.choices[0], "finish_reason", None) or finish_reason
+                piece = chunk.choices[0].delta.content
+                if piece:
+                    for field, parsed in parser.feed(piece):
+                        section = renderer.add(field, value(parsed) if value else parsed)
+                        if section:
+                            yield section
+            finished = True
+        finally:
+            if not finished:
+                stream.close()
+            # A stream cut short never reports usage: charge what it sent so far
+            self.limiter.settle(reserved, used if used is not None else prompt_tokens + count_tokens(parser.buffer))
+        llm_span.set(tokens=used)
+        llm_span.stop()
+        self.token_meter.record(kind, prompt_tokens, count_tokens(parser.buffer), used,
+                                truncated=finish_reason == "length")
+
+    def localized_roadmap_chunks(self, roadmap, name, language, timings=None, on_error=None, on_wait=None):
+        """Yield a roadmap already shown to the user translated into `language`, as markdown sections.
+
+        `roadmap` is the structured roadmap (timings["roadmap"] of
+        roadmap_chunks) personalised for `name`. Translations are cached
+        under the roadmap with the name swapped out and the target language,
+        so each roadmap costs one LLM call per language, shared by every user
+        who got it, and switching back to a language is instant. `timings`
+        and the callbacks work as for roadmap_chunks. If the LLM fails, the
+        untranslated roadmap fills in whatever has not been shown yet.
+        """
+        timings = {} if timings is None else timings
+        start = time.perf_counter()
+        personal = json_name(name)
+        template, _ = anonymize(json.dumps(roadmap, ensure_ascii=False, sort_keys=True), personal)
+        key = localized_key(template, language)
+        with tracer.span("translate.cache_get"):
+            cached = self._cached_roadmap(key, name)
+        if cached is not None:
+            elapsed = time.perf_counter() - start
+            timings.update(ttft=elapsed, total=elapsed, ok=True, cached=True, roadmap=cached)
+            yield render_markdown(cached)
+            return
+
+        timings["cached"] = False
+        renderer = SectionRenderer({field: roadmap[field] for field in FIXED})
+        error = None
+
+        def personalise(value):
+            # The model only ever sees the placeholder
+            return json.loads(json.dumps(value, ensure_ascii=False).replace(NAME_PLACEHOLDER, personal))
+
+        try:
+            source = json.loads(template)
+            prompt = build_translation_prompt({f: v for f, v in source.items() if f not in FIXED}, language)
+            inputs = {"kind": "translate", "roadmap": template, "language": language}
+            # The source roadmap is about as long as the translation
+            max_tokens = token_budget("translate", language)["completion"]
+            yield from self._stream_sections(prompt, max_tokens, inputs, renderer, timings, start, on_wait,
+                                             value=personalise)
+            missing = [f for f in SCHEMA["required"] if f not in renderer.roadmap]
+            rest = renderer.finish(roadmap)
+            if rest:
+                yield rest
+            timings["ok"] = True
+            timings["roadmap"] = renderer.roadmap
+            if missing:
+                timings["filled"] = missing  # left in the source language, so not cached
+            else:
+                # The model never saw the name, so a reply without the placeholder leaks nothing
+                text, _ = anonymize(json.dumps(renderer.roadmap, ensure_ascii=False), personal)
+                with tracer.span("translate.cache_put"):
+                    self.roadmap_cache.put(key, text)
+        except Exception as e:
+            error = e
+        finally:
+            timings["total"] = time.perf_counter() - start
+
+        if error is not None:
+            timings["ok"] = False
+            timings["degraded"] = True
+            if on_error and not isinstance(error, CircuitOpen):
+                on_error(error)
+            timings.setdefault("ttft", time.perf_counter() - start)
+            yield renderer.finish(roadmap) if renderer.rendered else render_markdown(roadmap)
+            timings["roadmap"] = renderer.roadmap if renderer.rendered else roadmap
+            timings["total"] = time.perf_counter() - start
+
+    def translate_strings(self, strings, language):
+        """`strings` translated into `language` by the LLM, in order (for catalog.py builds).
+
+        Raises ValueError if the reply is not a JSON array of as many strings.
+        """
+        inputs = {"kind": "catalog", "strings": strings, "language": language}
+        text, _ = self._complete(build_catalog_prompt(strings, language),
+                                 token_budget("catalog", language)["completion"], 0.2, inputs)
+        translations = catalog.parse_translations(text, len(strings))
+        if translations is None:
+            raise ValueError(f"expected a JSON array of {len(strings)} strings")
+        return translations
+
+    def _cached_roadmap(self, key, name):
+        """The structured roadmap cached under `key`, personalised for `name`, or None"""
+        text = self.roadmap_cache.get(key, json_name(name))
+        if text is None:
+            return None
+        try:
+            return json.loads(text)
+        except ValueError:
+            return None
+
+    def _create(self, timeout, inputs, **params):
+        """One chat completion, recorded or replayed when config.LLM_CASSETTE says so"""
+        def call(params):
+            return self.client().with_options(timeout=timeout).chat.completions.create(**params)
+
+        if self.cassette is None:
+            return call(params)
+        return self.cassette.create(call, inputs, params)
+
+    def _open_roadmap_stream(self, prompt, max_tokens, timeout, inputs):
+        """Start a roadmap stream; returns (stream, chunks) once its first chunk has arrived"""
+        stream = self._create(
+            timeout, inputs,
+            model=config.LLM_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.7,
+            max_tokens=max_tokens,
+            stream=True,
+            **RESPONSE_FORMATS[config.ROADMAP_RESPONSE_FORMAT]
+        )
+        chunks = iter(stream)
+        first = next(chunks, None)
+        if first is None:
+            raise RuntimeError("empty response stream")
+        return stream, itertools.chain([first], chunks)
+
+    def degraded_roadmap(self, user_data, version, language, rec):
+        """Best roadmap available without the LLM: (roadmap, markdown).
+
+        A cached roadmap for the same profile in the other A/B version or in
+        English, else the locally rendered one for the recommended program.
+        """
+        other = "B" if version == "A" else "A"
+        for alt_version, alt_language in ((other, language), (version, "English"), (other, "English")):
+            if (alt_version, alt_language) == (version, language):
+                continue
+            roadmap = self._cached_roadmap(profile_key(user_data, alt_version, alt_language), user_data['name'])
+            if roadmap is not None:
+                return roadmap, render_markdown(roadmap)
+        return fallback_roadmap(user_data, rec, version)
+
+    def _limited_call(self, op, start, tokens, reserved, discard):
+        """resilience.call() for a call holding `reserved` limiter tokens.
+
+        A hedge takes its own quota. Any call that raises gets its quota
+        back, and `discard(result)` settles each losing response; the
+        caller settles the winner once its usage is known.
+        """
+        def attempt(timeout):
+            try:
+                return start(timeout)
+            except Exception:
+                self.limiter.settle(reserved, 0)
+                raise
+
+        try:
+            return self.resilience.call(op, attempt, can_hedge=lambda: self.limiter.try_acquire(tokens),
+                                        close=discard)
+        except CircuitOpen:
+            self.limiter.settle(reserved, 0)  # refused before any call was made
+            raise
+
+    def _complete(self, prompt, max_tokens, temperature, inputs, on_wait=None):
+        """One non-streaming completion through the limiter and resilience layer: (text, tokens)"""
+        prompt_tokens = count_tokens(prompt)
+        tokens = prompt_tokens + max_tokens
+        with tracer.span("followup.queue"):
+            reserved = self.limiter.acquire(tokens, on_wait)
+
+        def start(timeout):
+            return self._create(
+                timeout, inputs,
+                model=config.LLM_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+
+        def discard(response):
+            self.limiter.settle(reserved, response.usage.total_tokens if response.usage else None)
+
+        with tracer.span("followup.llm") as span:
+            response = self._limited_call("followup", start, tokens, reserved, discard)
+            used = response.usage.total_tokens if response.usage else 0
+            span.set(tokens=used)
+        self.limiter.settle(reserved, used or None)
+        text = response.choices[0].message.content
+        self.token_meter.record(inputs["kind"], prompt_tokens, count_tokens(text), used,
+                                truncated=getattr(response.choices[0], "finish_reason", None) == "length")
+        return text, used
+
+    def roadmap(self, user_data, version, language):
+        """Complete roadmap with its recommendation, for non-streaming callers"""
+        rec = recommend(user_data)
+        timings = {}
+        text = "".join(self.roadmap_chunks(user_data, version, language, rec, timings))
+        return {
+            "roadmap": text,
+            "structured": timings.get("roadmap"),
+            "program": rec.program,
+            "alternate": rec.alternate,
+            "match_score": rec.score,
+            "cached": timings.get("cached", False),
+            "coalesced": timings.get("coalesced", False),
+            "ok": timings.get("ok", False),
+            "ttft": timings.get("ttft"),
+            "total": timings.get("total"),
+        }
+
+    def answer_followup(self, question, user_data, program, language, on_wait=None):
+        """Follow-up answer from the FAQs, the answer cache or the LLM"""
+        inputs = {"kind": "followup", "question": question, "name": user_data['name'], "goal": user_data['goal'],
+                  "program": program, "language": language}
+
+        def complete(prompt, max_tokens, temperature):
+            return self._complete(prompt, max_tokens, temperature, inputs, on_wait)
+
+        with tracer.span("followup.answer") as span:
+            result = answer_followup(question, user_data, program, language, complete,
+                                     self.faq_index, self.followup_stats, self.answer_cache)
+            span.set(source=result["source"])
+        return result
+
+    def localized_faqs(self, language):
+        """The FAQs in `language` from the catalog, English where not yet translated"""
+        return catalog.get(language).faqs(self.faqs)
+
+    def search_faqs(self, query, limit=5, language=None):
+        """Ranked FAQ matches: [(score, faq)]; with a `language`, matches in it come first"""
+        with tracer.span("faq.search"):
+            results = self.faq_index.search(query, limit)
+        if language is not None:
+            results.sort(key=lambda match: match[1].get("language", "English") != language)
+        return results
+
+    def stats(self):
+        """Cache, coalescing, follow-up and lead writer counters for this process"""
+        return {
+            "roadmap_cache": self.roadmap_cache.stats(),
+            "answer_cache": self.answer_cache.stats(),
+            "flights": self.flights.stats(),
+            "rate_limit": self.limiter.stats(),
+            "resilience": self.resilience.stats(),
+            "followups": self.followup_stats.snapshot(),
+            "leads": self.lead_store.stats(),
+            "cassette": self.cassette.stats() if self.cassette is not None else None,
+            "tokens": self.token_meter.stats(),
+            "speculation": self.speculator.stats(),
+            "analytics": self.analytics.stats(),
+            "experiments": self.experiments.stats(),
+        }
+
+    def save_lead(self, data):
+        """Queue a lead for the background writer"""
+        with tracer.span("lead.save"):
+            self.lead_store.save(data)
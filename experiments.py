@@ -0,0 +1,315 @@
+"""A/B experiments: deterministic assignment, event log and sequential results.
+
+Each session is bucketed by a hash of its id (assign()), so the variant is
+fixed from the first page load and needs no storage to stay stable.
+Exposures (the user saw their variant's roadmap) and conversions (the user
+clicked Enroll) are appended to an event log in SQLite, shared by worker
+processes, by a batching writer thread as in lead_store.py.
+
+The same transaction that appends a batch also folds it into a per-experiment
+projection: running exposure and conversion counts per variant, and an
+always-valid p-value per variant against the control (the first variant).
+That p-value comes from a mixture sequential probability ratio test, so the
+results can be checked after every event without inflating false positives.
+Each event costs O(1) and results() reads one row, however long the log; the
+projection can be rebuilt from the log at any time.
+
+Usage:
+    python experiments.py report    # current results of every experiment
+    python experiments.py rebuild   # recompute the results from the event log
+"""
+import argparse
+import atexit
+import hashlib
+import json
+import math
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+import config
+
+EXPOSURE = "exposure"
+CONVERSION = "conversion"
+_STOP = object()
+
+
+def assign(experiment, unit_id, variants):
+    """The variant for `unit_id`: the same id always gets the same one.
+
+    `variants` maps each variant to its weight; the first is the control.
+    """
+    digest = hashlib.sha256(f"{experiment}:{unit_id}".encode()).digest()
+    point = int.from_bytes(digest[:8], "big") / 2 ** 64 * sum(variants.values())
+    for variant, weight in variants.items():
+        point -= weight
+        if point < 0:
+            return variant
+    return variant
+
+
+def always_valid_p(exposed_a, converted_a, exposed_b, converted_b, mixture_variance):
+    """1 / the mSPRT likelihood ratio for a difference in conversion rate, capped at 1.
+
+    Normal approximation with a N(0, mixture_variance) prior on the
+    difference; the running minimum of this is an always-valid p-value.
+    """
+    if not exposed_a or not exposed_b:
+        return 1.0
+    rate_a, rate_b = converted_a / exposed_a, converted_b / exposed_b
+    variance = rate_a * (1 - rate_a) / exposed_a + rate_b * (1 - rate_b) / exposed_b
+    if variance <= 0:
+        return 1.0
+    diff = rate_b - rate_a
+    log_ratio = (0.5 * math.log(variance / (variance + mixture_variance))
+                 + diff * diff * mixture_variance / (2 * variance * (variance + mixture_variance)))
+    return math.exp(-log_ratio) if log_ratio > 0 else 1.0
+
+
+class Projection:
+    """Running results of one experiment, updated one event at a time"""
+
+    def __init__(self, variants, state=None):
+        self.variants = list(variants)
+        self.control = self.variants[0]
+        state = state or {}
+        self.last_id = state.get("last_id", 0)
+        self.counts = {v: list(state.get("counts", {}).get(v, (0, 0))) for v in self.variants}
+        self.p_values = {v: state.get("p_values", {}).get(v, 1.0) for v in self.variants[1:]}
+
+    def apply(self, event_id, variant, kind, mixture_variance, min_exposures):
+        self.last_id = event_id
+        counts = self.counts.get(variant)
+        if counts is None:
+            return  # a variant since removed from the config
+        counts[0 if kind == EXPOSURE else 1] += 1
+        # Only this variant's comparison changed (or all of them, for the control)
+        for other in (self.p_values if variant == self.control else (variant,)):
+            control, treated = self.counts[self.control], self.counts[other]
+            if min(control[0], treated[0]) >= min_exposures:
+                p = always_valid_p(control[0], control[1], treated[0], treated[1], mixture_variance)
+                self.p_values[other] = min(self.p_values[other], p)
+
+    def state(self):
+        return {"last_id": self.last_id, "counts": self.counts, "p_values": self.p_values}
+
+
+class Experiments:
+    """Variant assignment, the shared event log and its running results"""
+
+    def __init__(self, path="experiments.db", experiments=None, alpha=0.05, mixture_variance=1e-4,
+                 min_exposures=100, queue_size=10000, batch_size=500, flush_interval=0.5, refresh=2.0):
+        self.path = path
+        self.experiments = experiments or {}
+        self.alpha = alpha
+        self.mixture_variance = mixture_variance
+        self.min_exposures = min_exposures
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.refresh = refresh
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self._results = {}  # experiment -> (monotonic time, results)
+        self._queue = queue.Queue(maxsize=queue_size)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            " id INTEGER PRIMARY KEY, ts REAL NOT NULL, experiment TEXT NOT NULL,"
+            " unit TEXT NOT NULL, variant TEXT NOT NULL, kind TEXT NOT NULL)"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS projections (experiment TEXT PRIMARY KEY, state TEXT NOT NULL)")
+        conn.close()
+        self._writer = threading.Thread(target=self._run, name="experiment-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self):
+        # Autocommit: _write and rebuild open their own IMMEDIATE transactions
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def assign(self, experiment, unit_id):
+        """This unit's variant of a configured experiment"""
+        return assign(experiment, unit_id, self.experiments[experiment])
+
+    def expose(self, experiment, unit_id, variant):
+        """Log that the unit has seen its variant; call once per unit"""
+        self._log(experiment, unit_id, variant, EXPOSURE)
+
+    def convert(self, experiment, unit_id, variant):
+        """Log the unit's conversion; call once per unit, after expose()"""
+        self._log(experiment, unit_id, variant, CONVERSION)
+
+    def _log(self, experiment, unit_id, variant, kind):
+        try:
+            self._queue.put_nowait((time.time(), experiment, unit_id, variant, kind))
+        except queue.Full:
+            self.dropped += 1  # results are best effort; the page must not block on them
+
+    def _run(self):
+        conn = self._connect()
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            while True:
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+                if stopping or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            try:
+                if batch:
+                    self._write(conn, batch)
+            except Exception as e:
+                # A bad batch must not kill the writer: every later event and flush() depends on it
+                self.dropped += len(batch)
+                print(f"experiment-writer: dropped {len(batch)} events: {e!r}", file=sys.stderr)
+            finally:
+                for _ in range(len(batch) + (1 if stopping else 0)):
+                    self._queue.task_done()
+        conn.close()
+
+    def _write(self, conn, batch):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            projections = {}
+            for event in batch:
+                event_id = conn.execute(
+                    "INSERT INTO events (ts, experiment, unit, variant, kind) VALUES (?, ?, ?, ?, ?)",
+                    event).lastrowid
+                experiment = event[1]
+                if experiment not in self.experiments:
+                    continue  # logged, but only configured experiments have results
+                if experiment not in projections:
+                    projections[experiment] = self._load(conn, experiment)
+                projections[experiment].apply(event_id, event[3], event[4], self.mixture_variance,
+                                              self.min_exposures)
+            self._save(conn, projections)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.written += len(batch)
+        self.batches += 1
+
+    def _load(self, conn, experiment):
+        row = conn.execute("SELECT state FROM projections WHERE experiment = ?", (experiment,)).fetchone()
+        return Projection(self.experiments[experiment], json.loads(row[0]) if row else None)
+
+    def _save(self, conn, projections):
+        conn.executemany(
+            "INSERT OR REPLACE INTO projections (experiment, state) VALUES (?, ?)",
+            [(experiment, json.dumps(p.state())) for experiment, p in projections.items()],
+        )
+
+    def flush(self):
+        """Block until every logged event has been committed"""
+        self._queue.join()
+
+    def results(self, experiment):
+        """Per variant: exposures, conversions, rate, lift over the control and always-valid p-value.
+
+        "winner" is the variant significantly better than the control, the
+        control if a variant is significantly worse, or None while undecided.
+        Cached for `refresh` seconds.
+        """
+        cached = self._results.get(experiment)
+        if cached and time.monotonic() - cached[0] < self.refresh:
+            return cached[1]
+        conn = self._connect()
+        try:
+            projection = self._load(conn, experiment)
+        finally:
+            conn.close()
+        control = projection.counts[projection.control]
+        control_rate = control[1] / control[0] if control[0] else 0.0
+        variants, winner = {}, None
+        for variant, (exposures, conversions) in projection.counts.items():
+            rate = conversions / exposures if exposures else 0.0
+            p_value = projection.p_values.get(variant)
+            variants[variant] = {
+                "exposures": exposures,
+                "conversions": conversions,
+                "rate": round(rate, 4),
+                "lift": round(rate / control_rate - 1, 4) if variant != projection.control and control_rate else None,
+                "p_value": round(p_value, 4) if p_value is not None else None,
+            }
+            if p_value is not None and p_value < self.alpha:
+                better = variant if rate > control_rate else projection.control
+                if winner is None or variants[winner]["rate"] < variants[better]["rate"]:
+                    winner = better
+        results = {"control": projection.control, "variants": variants, "winner": winner,
+                   "events": projection.last_id, "alpha": self.alpha}
+        self._results[experiment] = (time.monotonic(), results)
+        return results
+
+    def rebuild(self, chunk=100000):
+        """Recompute every projection from the event log; returns the number of events replayed"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            projections = {name: Projection(variants) for name, variants in self.experiments.items()}
+            replayed, last_id = 0, 0
+            while True:
+                rows = conn.execute("SELECT id, experiment, variant, kind FROM events WHERE id > ? ORDER BY id LIMIT ?",
+                                    (last_id, chunk)).fetchall()
+                if not rows:
+                    break
+                for event_id, experiment, variant, kind in rows:
+                    if experiment in projections:
+                        projections[experiment].apply(event_id, variant, kind, self.mixture_variance,
+                                                      self.min_exposures)
+                replayed += len(rows)
+                last_id = rows[-1][0]
+            conn.execute("DELETE FROM projections")
+            self._save(conn, projections)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        self._results.clear()
+        return replayed
+
+    def stats(self):
+        """Writer counters: events committed, batches, events dropped (queue full or write failed) and queue length"""
+        return {"written": self.written, "batches": self.batches, "dropped": self.dropped,
+                "pending": self._queue.qsize()}
+
+    def close(self):
+        """Flush and stop the writer thread"""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["report", "rebuild"])
+    parser.add_argument("--db", default=config.EXPERIMENTS["path"])
+    args = parser.parse_args()
+
+    experiments = Experiments(**dict(config.EXPERIMENTS, path=args.db))
+    if args.command == "rebuild":
+        print(f"Replayed {experiments.rebuild()} events")
+    for name in experiments.experiments:
+        print(json.dumps({name: experiments.results(name)}, indent=2))
+    experiments.close()
+
+
+if __name__ == "__main__":
+    main()
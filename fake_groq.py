@@ -0,0 +1,226 @@
+"""Local fake of the Groq chat-completions API for benchmarks and load tests.
+
+Run it with ``python fake_groq.py --port 8765`` and point the app at it with
+``GROQ_BASE_URL=http://127.0.0.1:8765``.
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = """### 🎯 {name}, your Best Program Match: {program} ({score}% match)
+
+**Why This Program**: It builds the strategic leadership and executive presence your goal needs.
+
+**Alternate Option**: Iron Lady Essentials
+
+**3-Step Transformation Plan**
+1. Build confidence with weekly live sessions
+2. Lead a stretch project at work
+3. Present your results to senior leadership
+
+**Expected Outcomes**: Senior Leadership Role, Team Management, Executive Presence
+
+| | Leadership Accelerator | Iron Lady Essentials |
+|---|---|---|
+| Duration | 6 Months | 4 Weeks |
+
+You are ready for this. Let's begin today!
+"""
+
+# Answer to roadmap prompts, which ask for a JSON object (roadmap_format.SCHEMA)
+DEFAULT_JSON_REPLY = """{
+  "program": "{program}",
+  "score": {score},
+  "why": "{name}, it builds the strategic leadership and executive presence your goal needs.",
+  "alternate": "Iron Lady Essentials",
+  "steps": ["Build confidence with weekly live sessions", "Lead a stretch project at work",
+            "Present your results to senior leadership"],
+  "outcomes": ["Senior Leadership Role", "Team Management", "Executive Presence"],
+  "comparison": [
+    {"aspect": "Duration", "best": "6 Months", "alternate": "4 Weeks"},
+    {"aspect": "Focus", "best": "Strategic Leadership", "alternate": "Foundational Skills"},
+    {"aspect": "Price", "best": "Premium", "alternate": "Accessible"}
+  ],
+  "cta": "You are ready for this, {name}. Let's begin today!"
+}
+"""
+
+
+class Profile:
+    """Latency, streaming and error behaviour of the fake upstream"""
+
+    def __init__(self, latency=0.05, ttft=None, chunk_delay=0.005, error_rate=0.0,
+                 error_status=503, reply=DEFAULT_REPLY, rpm_limit=None, slow_rate=0.0, slow_latency=2.0,
+                 json_reply=DEFAULT_JSON_REPLY):
+        self.latency = latency
+        self.ttft = latency if ttft is None else ttft
+        self.slow_rate = slow_rate        # share of requests stuck in a latency tail...
+        self.slow_latency = slow_latency  # ...of this many seconds before the first byte
+        self.chunk_delay = chunk_delay
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.reply = reply
+        self.json_reply = json_reply
+        self.rpm_limit = rpm_limit  # like Groq: the request quota refills continuously over a minute
+        self.requests = 0
+        self.rate_limited = 0
+        self.allowance = rpm_limit or 0
+        self.checked = time.monotonic()
+        self.lock = threading.Lock()
+
+    def over_quota(self):
+        """Spend one request of quota; True (answer 429) if none is left"""
+        if self.rpm_limit is None:
+            return False
+        with self.lock:
+            now = time.monotonic()
+            self.allowance = min(self.rpm_limit, self.allowance + (now - self.checked) * self.rpm_limit / 60)
+            self.checked = now
+            if self.allowance < 1:
+                self.rate_limited += 1
+                return True
+            self.allowance -= 1
+            return False
+
+
+def _chunks(text, size=24):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def _usage(prompt, reply):
+    prompt_tokens = max(1, len(prompt) // 4)
+    completion_tokens = max(1, len(reply) // 4)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def make_handler(profile):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            with profile.lock:
+                profile.requests += 1
+
+            if not self.path.endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": "not found"}})
+                return
+            if profile.over_quota():
+                self._send_json(429, {"error": {"message": "fake rate limit reached", "type": "tokens"}})
+                return
+            if random.random() < profile.error_rate:
+                time.sleep(profile.ttft)
+                self._send_json(profile.error_status, {"error": {"message": "fake upstream error"}})
+                return
+
+            if random.random() < profile.slow_rate:
+                time.sleep(profile.slow_latency)
+            prompt = "".join(m.get("content", "") for m in request.get("messages", []))
+            name = re.search(r"Name: (.+)", prompt)
+            pick = re.search(r"Recommended Program[^:]*: (.+?) - (\d+)% match", prompt)
+            name = name.group(1).strip() if name else "there"
+            if "JSON object" in prompt:
+                template, name = profile.json_reply, json.dumps(name, ensure_ascii=False)[1:-1]
+            else:
+                template = profile.reply
+            reply = (template
+                     .replace("{name}", name)
+                     .replace("{program}", pick.group(1) if pick else "Leadership Accelerator")
+                     .replace("{score}", pick.group(2) if pick else "91"))
+            created = int(time.time())
+            base = {"id": "chatcmpl-fake", "created": created, "model": request.get("model", "fake")}
+
+            if not request.get("stream"):
+                time.sleep(profile.latency)
+                self._send_json(200, dict(base, object="chat.completion", choices=[{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop",
+                }], usage=_usage(prompt, reply)))
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def send_event(payload):
+                data = f"data: {payload}\n\n".encode("utf-8")
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            time.sleep(profile.ttft)
+            for piece in _chunks(reply):
+                send_event(json.dumps(dict(base, object="chat.completion.chunk", choices=[{
+                    "index": 0, "delta": {"content": piece}, "finish_reason": None,
+                }])))
+                time.sleep(profile.chunk_delay)
+            send_event(json.dumps(dict(base, object="chat.completion.chunk", choices=[{
+                "index": 0, "delta": {}, "finish_reason": "stop",
+            }], x_groq={"usage": _usage(prompt, reply)})))
+            send_event("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients dropping pooled keep-alive connections is normal under load
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def serve(port=0, profile=None):
+    """Start the fake server on a background thread; returns (server, base_url)"""
+    profile = profile or Profile()
+    server = _Server(("127.0.0.1", port), make_handler(profile))
+    server.daemon_threads = True
+    server.profile = profile
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds before a full reply")
+    parser.add_argument("--ttft", type=float, default=None, help="seconds before the first streamed chunk")
+    parser.add_argument("--chunk-delay", type=float, default=0.005)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--rpm-limit", type=int, default=None, help="answer 429 beyond this many requests/min")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of requests with a latency tail")
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    args = parser.parse_args()
+    server, url = serve(args.port, Profile(args.latency, args.ttft, args.chunk_delay,
+                                           args.error_rate, args.error_status, rpm_limit=args.rpm_limit,
+                                           slow_rate=args.slow_rate, slow_latency=args.slow_latency))
+    print(f"Fake Groq listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,159 @@
+"""Ranked FAQ search.
+
+An inverted index with BM25 scoring, built once when faqs.json is loaded.
+Tokenization keeps Indic combining marks inside words (Hindi, Telugu, Tamil
+and the other Brahmic scripts), and query terms that are misspelled or still
+being typed are expanded to indexed terms by prefix and character-trigram
+similarity.
+"""
+import bisect
+import heapq
+import json
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+# Word characters plus the Indic blocks (U+0900-U+0DFF), whose vowel signs and
+# viramas are combining marks that \w alone would split words on.
+_TOKEN = re.compile(r"[\w\u0900-\u0DFF\u200c\u200d]+")
+_JOINERS = str.maketrans("", "", "\u200c\u200d")
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "am", "i", "do", "does", "can", "of", "to", "in", "on",
+    "for", "and", "or", "if", "it", "my", "me", "we", "you", "your", "our", "there", "what",
+    "which", "with", "be", "will", "at", "as", "this", "that", "any", "get", "have", "has",
+}
+
+QUESTION_BOOST = 2  # question words count this many times towards term frequency
+
+
+def tokenize(text):
+    """Lowercased, NFC-normalized tokens with Indic words kept whole"""
+    text = unicodedata.normalize("NFC", text.lower())
+    tokens = []
+    for token in _TOKEN.findall(text):
+        token = token.translate(_JOINERS).strip("_")
+        if token and token not in STOPWORDS:
+            # Fold simple English plurals ("options" -> "option")
+            if len(token) > 4 and token.endswith("s") and not token.endswith("ss") and token.isascii():
+                token = token[:-1]
+            tokens.append(token)
+    return tokens
+
+
+def _trigrams(term):
+    padded = f" {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FAQIndex:
+    """BM25 inverted index over FAQ questions and answers"""
+
+    def __init__(self, faqs, k1=1.5, b=0.75, fuzzy_threshold=0.45):
+        self.faqs = faqs
+        self.k1 = k1
+        self.b = b
+        self.fuzzy_threshold = fuzzy_threshold
+
+        postings = defaultdict(list)
+        self.doc_len = []
+        for doc_id, faq in enumerate(faqs):
+            terms = tokenize(faq["question"]) * QUESTION_BOOST + tokenize(faq["answer"])
+            self.doc_len.append(len(terms))
+            for term, tf in Counter(terms).items():
+                postings[term].append((doc_id, tf))
+        self.postings = dict(postings)
+        self.avgdl = (sum(self.doc_len) / len(self.doc_len)) if self.doc_len else 0.0
+
+        n = len(faqs)
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+        self.question_vectors = [self._unit_vector(Counter(tokenize(faq["question"]))) for faq in faqs]
+        self.vocab = sorted(self.postings)
+        self.trigram_index = defaultdict(list)
+        self.trigram_count = {}
+        for term in self.vocab:
+            grams = _trigrams(term)
+            self.trigram_count[term] = len(grams)
+            for gram in grams:
+                self.trigram_index[gram].append(term)
+
+    def _unit_vector(self, weights):
+        vector = {term: weight * self.idf.get(term, 0.0) for term, weight in weights.items()}
+        norm = math.sqrt(sum(v * v for v in vector.values()))
+        return {term: v / norm for term, v in vector.items()} if norm else {}
+
+    @classmethod
+    def from_file(cls, path="faqs.json"):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _expand(self, term):
+        """Indexed terms matching a query term, with a weight in (0, 1]"""
+        matches = {}
+        if term in self.postings:
+            matches[term] = 1.0
+        if len(term) < 3:
+            return matches
+
+        # Prefix matches, for words still being typed ("certif" -> "certificate")
+        i = bisect.bisect_left(self.vocab, term)
+        while i < len(self.vocab) and self.vocab[i].startswith(term):
+            matches.setdefault(self.vocab[i], 0.9)
+            i += 1
+
+        # Typo tolerance via trigram Jaccard similarity, only for unknown terms
+        if term in self.postings:
+            return matches
+        grams = _trigrams(term)
+        shared = Counter()
+        for gram in grams:
+            for candidate in self.trigram_index.get(gram, ()):
+                shared[candidate] += 1
+        for candidate, common in shared.items():
+            similarity = common / (len(grams) + self.trigram_count[candidate] - common)
+            if similarity >= self.fuzzy_threshold:
+                matches[candidate] = max(matches.get(candidate, 0.0), 0.8 * similarity)
+        return matches
+
+    def search(self, query, limit=5):
+        """Best-matching FAQs for a query, highest score first: [(score, faq)]"""
+        weights = {}
+        for term in tokenize(query):
+            for match, weight in self._expand(term).items():
+                weights[match] = max(weights.get(match, 0.0), weight)
+
+        scores = defaultdict(float)
+        k1, b, avgdl = self.k1, self.b, self.avgdl or 1.0
+        for term, weight in weights.items():
+            idf = self.idf[term] * weight
+            for doc_id, tf in self.postings[term]:
+                norm = tf + k1 * (1 - b + b * self.doc_len[doc_id] / avgdl)
+                scores[doc_id] += idf * tf * (k1 + 1) / norm
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(score, self.faqs[doc_id]) for doc_id, score in best]
+
+    def best_match(self, query):
+        """FAQ whose question is most similar to `query`: (confidence, faq).
+
+        Confidence is the TF-IDF cosine similarity between the query and the
+        FAQ question, in [0, 1]. Returns (0.0, None) when nothing overlaps.
+        """
+        weights = {}
+        for term in tokenize(query):
+            for match, weight in self._expand(term).items():
+                weights[match] = max(weights.get(match, 0.0), weight)
+        query_vector = self._unit_vector(weights)
+
+        candidates = {doc_id for term in query_vector for doc_id, _ in self.postings[term]}
+        best, best_score = None, 0.0
+        for doc_id in candidates:
+            doc_vector = self.question_vectors[doc_id]
+            score = sum(w * doc_vector.get(term, 0.0) for term, w in query_vector.items())
+            if score > best_score:
+                best, best_score = doc_id, score
+        return (best_score, self.faqs[best]) if best is not None else (0.0, None)
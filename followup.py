@@ -0,0 +1,102 @@
+"""Answers for "Ask Asha Anything" follow-up questions.
+
+FAQ first: a question that closely matches a FAQ in the user's language is
+answered straight from faqs.json. Next comes the semantic answer cache, and
+only the long tail reaches the LLM. When the LLM is unavailable the user gets
+a degraded answer (a looser FAQ match or the program's key facts) instead of
+an error.
+"""
+import threading
+import time
+
+import config
+from prompts import build_followup_prompt, token_budget
+
+
+class FollowupStats:
+    """Process-wide counters for the FAQ, cache and LLM answer paths"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.answers = {"faq": 0, "cache": 0, "llm": 0, "degraded": 0}
+        self.seconds = {"faq": 0.0, "cache": 0.0, "llm": 0.0, "degraded": 0.0}
+        self.llm_tokens = 0
+
+    def record(self, source, seconds, tokens=0):
+        with self._lock:
+            self.answers[source] += 1
+            self.seconds[source] += seconds
+            self.llm_tokens += tokens
+
+    def snapshot(self):
+        """Counts plus latency and tokens saved, estimated from the LLM averages"""
+        with self._lock:
+            total = sum(self.answers.values())
+            llm = self.answers["llm"]
+            avg_llm = self.seconds["llm"] / llm if llm else 0.0
+            avg_tokens = self.llm_tokens / llm if llm else 0.0
+            saved = 0.0
+            for source in ("faq", "cache"):
+                if self.answers[source]:
+                    avg = self.seconds[source] / self.answers[source]
+                    saved += self.answers[source] * max(0.0, avg_llm - avg)
+            skipped = self.answers["faq"] + self.answers["cache"]
+            return {
+                "faq_answers": self.answers["faq"],
+                "cache_answers": self.answers["cache"],
+                "llm_answers": llm,
+                "degraded_answers": self.answers["degraded"],
+                "faq_rate": self.answers["faq"] / total if total else 0.0,
+                "no_llm_rate": skipped / total if total else 0.0,
+                "avg_llm_seconds": avg_llm,
+                "seconds_saved": saved,
+                "tokens_saved": round(skipped * avg_tokens),
+            }
+
+
+def degraded_answer(program, faq, confidence, language):
+    """Answer without the LLM: a looser FAQ match, else the program's key facts"""
+    if faq is not None and confidence >= config.DEGRADED_FAQ_THRESHOLD and faq.get("language", "English") == language:
+        return faq["answer"]
+    info = config.PROGRAMS_DB.get(program)
+    if info is None:
+        return ("Asha is busy right now. Message us on WhatsApp and our team will answer you personally.")
+    return (f"Asha is busy right now, so here are the essentials: **{program}** runs for {info['duration']} "
+            f"and focuses on {info['focus']}. Outcomes: {', '.join(info['outcomes'])}. "
+            f"Fee: {info['price']}. Message us on WhatsApp for anything else.")
+
+
+def answer_followup(question, user_data, program, language, complete, index, stats,
+                    cache=None, threshold=None):
+    """Answer a follow-up question from the FAQs or answer cache, else via the LLM.
+
+    `complete(prompt, max_tokens, temperature)` makes the LLM call and
+    returns (text, tokens); it is only called on a FAQ and cache miss. If it
+    fails, a degraded answer is returned. Returns a dict with the answer text
+    and its source ("faq", "cache", "llm" or "degraded").
+    """
+    threshold = config.FAQ_ANSWER_THRESHOLD if threshold is None else threshold
+    start = time.perf_counter()
+
+    confidence, faq = index.best_match(question)
+    if faq is not None and confidence >= threshold and faq.get("language", "English") == language:
+        stats.record("faq", time.perf_counter() - start)
+        return {"answer": faq["answer"], "source": "faq", "confidence": confidence}
+
+    if cache is not None:
+        cached = cache.get(question, program, language, user_data['name'], user_data['goal'])
+        if cached is not None:
+            stats.record("cache", time.perf_counter() - start)
+            return {"answer": cached, "source": "cache", "confidence": confidence}
+
+    prompt = build_followup_prompt(question, user_data, program, language)
+    try:
+        answer, tokens = complete(prompt, token_budget("followup", language)["completion"], 0.6)
+    except Exception:
+        stats.record("degraded", time.perf_counter() - start)
+        return {"answer": degraded_answer(program, faq, confidence, language), "source": "degraded",
+                "confidence": confidence}
+    stats.record("llm", time.perf_counter() - start, tokens)
+    if cache is not None:
+        cache.put(question, program, language, answer, user_data['name'], user_data['goal'])
+    return {"answer": answer, "source": "llm", "confidence": confidence}
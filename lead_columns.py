@@ -0,0 +1,364 @@
+"""Columnar copy of the lead history for sales reports.
+
+Every save of a lead is ingested from the lead_history table of leads.db (or
+the rows of a leads CSV) into one file per column
+under a directory: timestamps as int64 microseconds, role, challenge, program
+and alternate as uint16 codes into per-column dictionaries, and the match
+score as int8 (-1 when unknown). Free text (name, goal) is left out. Reports
+memory-map the files, so opening even months of leads reads almost nothing,
+and counts are numpy bincounts over the codes instead of a CSV re-parse.
+
+lead_history is append-only, unlike the leads table, where a repeat save
+updates a row and dedup deletes rows, so nothing already ingested goes stale.
+
+Ingestion is incremental: meta.json records the row count and how far each
+source has been read (history id for a database, byte offset for a CSV), and is
+replaced atomically after every chunk, so readers in other processes never
+see a half-written chunk and an interrupted ingest resumes where it stopped.
+A source that is now shorter than that position (a recreated database, a
+rewritten CSV) is refused rather than silently skipped; `ingest --rebuild`
+starts the copy over.
+
+Usage:
+    python lead_columns.py ingest                  # new saves from leads.db
+    python lead_columns.py ingest --rebuild        # drop the columns and ingest everything again
+    python lead_columns.py ingest --csv leads.csv  # new rows of a CSV
+    python lead_columns.py report --by role program --since 2026-01-01
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+from datetime import date, datetime
+
+import numpy as np
+
+import config
+
+CATEGORIES = ("role", "challenge", "program", "alternate")
+TIME_GROUPS = {"day": "datetime64[D]", "month": "datetime64[M]"}
+DTYPES = dict({"timestamp": np.int64, "match_score": np.int8}, **{c: np.uint16 for c in CATEGORIES})
+CHUNK = 1_000_000
+_US_PER_DAY = 86_400_000_000
+
+
+class _Codes(dict):
+    """Value -> code, adding unseen values"""
+
+    def __missing__(self, value):
+        code = self[value] = len(self)
+        return code
+
+
+def _microseconds(value):
+    """datetime, date or ISO string -> int64 microseconds since the epoch (naive, like leads.db)"""
+    if isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    return int(np.datetime64(value, "us").astype(np.int64))
+
+
+class LeadColumns:
+    """Memory-mapped lead columns with incremental append and group-by counts"""
+
+    def __init__(self, path="leads_columns"):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.meta = {"rows": 0, "sorted": True, "max_timestamp": None, "sources": {},
+                     "dictionaries": {c: [] for c in CATEGORIES}}
+        self._columns = None
+        self._loaded_mtime = None
+        self.reload()
+
+    def _file(self, column):
+        return os.path.join(self.path, f"{column}.bin")
+
+    def reload(self):
+        """Pick up rows appended since the last load (by any process)"""
+        meta_path = os.path.join(self.path, "meta.json")
+        if not os.path.exists(meta_path):
+            return
+        mtime = os.stat(meta_path).st_mtime_ns
+        if mtime == self._loaded_mtime:
+            return
+        with open(meta_path, "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self._loaded_mtime = mtime
+        self._columns = None
+
+    @property
+    def rows(self):
+        return self.meta["rows"]
+
+    def column(self, name):
+        """One column as a read-only array (memory-mapped)"""
+        if self._columns is None:
+            self._columns = {}
+            for column, dtype in DTYPES.items():
+                if self.rows:
+                    self._columns[column] = np.memmap(self._file(column), dtype=dtype, mode="r", shape=(self.rows,))
+                else:
+                    self._columns[column] = np.empty(0, dtype=dtype)
+        return self._columns[name]
+
+    # -- ingestion ------------------------------------------------------------------
+
+    def reset(self):
+        """Drop every column and the ingest positions"""
+        for name in list(DTYPES) + ["meta.json"]:
+            path = self._file(name) if name in DTYPES else os.path.join(self.path, name)
+            if os.path.exists(path):
+                os.remove(path)
+        self.meta = {"rows": 0, "sorted": True, "max_timestamp": None, "sources": {},
+                     "dictionaries": {c: [] for c in CATEGORIES}}
+        self._loaded_mtime = None
+        self._columns = None
+
+    def append(self, rows, source=None, position=None):
+        """Append (timestamp, role, challenge, program, alternate, match_score) rows.
+
+        `source` and `position` record how far that source has been read,
+        committed together with the rows.
+        """
+        codes = {c: _Codes((v, i) for i, v in enumerate(self.meta["dictionaries"][c])) for c in CATEGORIES}
+        n = len(rows)
+        if not n:
+            return 0
+        timestamps = np.array([row[0] for row in rows], dtype="datetime64[us]").astype(np.int64)
+        columns = {"timestamp": timestamps,
+                   "match_score": np.fromiter((-1 if row[5] in (None, "") else int(row[5]) for row in rows),
+                                              dtype=np.int8, count=n)}
+        for i, column in enumerate(CATEGORIES, 1):
+            index = codes[column]
+            columns[column] = np.fromiter((index[row[i] or ""] for row in rows), dtype=np.int64, count=n)
+            if len(index) > np.iinfo(np.uint16).max:
+                raise ValueError(f"too many distinct values for {column}: {len(index)}")
+        for column, values in columns.items():
+            size = self.rows * np.dtype(DTYPES[column]).itemsize
+            with open(self._file(column), "ab") as f:
+                f.truncate(size)  # drop whatever an interrupted append left past the last commit
+                values.astype(DTYPES[column]).tofile(f)
+
+        meta = dict(self.meta, rows=self.rows + n,
+                    dictionaries={c: list(codes[c]) for c in CATEGORIES},
+                    sources=dict(self.meta["sources"]))
+        previous_max = self.meta["max_timestamp"]
+        meta["sorted"] = bool(self.meta["sorted"] and (n < 2 or (np.diff(timestamps) >= 0).all())
+                              and (previous_max is None or timestamps[0] >= previous_max))
+        meta["max_timestamp"] = int(max(timestamps.max(), previous_max if previous_max is not None else timestamps.max()))
+        if source is not None:
+            meta["sources"][source] = position
+        for column in DTYPES:
+            with open(self._file(column), "ab") as f:
+                os.fsync(f.fileno())
+        tmp = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.path, "meta.json"))
+        self.meta = meta
+        self._loaded_mtime = None
+        self._columns = None
+        return n
+
+    def ingest_store(self, db_path):
+        """Append the saves logged to a lead_store database's lead_history since the last ingest.
+
+        Leads saved before lead_history existed are logged to it by
+        `python lead_store.py dedup`.
+        """
+        path = os.path.abspath(db_path)
+        if f"db:{path}" in self.meta["sources"]:
+            raise ValueError(f"{self.path} was copied from the leads table, which no longer keeps every save;"
+                             " rebuild it with `python lead_columns.py ingest --rebuild`")
+        source = f"history:{path}"
+        last_id = self.meta["sources"].get(source, 0)
+        conn = sqlite3.connect(db_path)
+        added = 0
+        try:
+            if last_id > conn.execute("SELECT coalesce(max(id), 0) FROM lead_history").fetchone()[0]:
+                raise _rewritten(db_path)
+            cursor = conn.execute("SELECT id, timestamp, role, challenge, program, alternate, match_score"
+                                  " FROM lead_history WHERE id > ? ORDER BY id", (last_id,))
+            while True:
+                rows = cursor.fetchmany(CHUNK)
+                if not rows:
+                    break
+                added += self.append([row[1:] for row in rows], source, rows[-1][0])
+        finally:
+            conn.close()
+        return added
+
+    def ingest_csv(self, csv_path):
+        """Append rows of a leads CSV (lead_store.CSV_HEADER layout) past the last ingested byte"""
+        source = f"csv:{os.path.abspath(csv_path)}"
+        offset = self.meta["sources"].get(source, 0)
+        consumed = [offset]
+
+        def lines(f):
+            for line in f:
+                if not line.endswith(b"\n"):
+                    return  # a row still being written
+                consumed[0] += len(line)
+                yield line.decode("utf-8")
+
+        if offset > os.path.getsize(csv_path):
+            raise _rewritten(csv_path)
+        added = 0
+        with open(csv_path, "rb") as f:
+            f.seek(offset)
+            reader = csv.reader(lines(f))
+            if offset == 0:
+                next(reader, None)
+            batch = []
+            for row in reader:
+                if not row:
+                    continue
+                row += [""] * (8 - len(row))  # older CSVs stop at Program
+                batch.append((row[0], row[2], row[3], row[5], row[6], row[7]))
+                if len(batch) == CHUNK:
+                    added += self.append(batch, source, consumed[0])
+                    batch = []
+            added += self.append(batch, source, consumed[0])
+        return added
+
+    # -- queries --------------------------------------------------------------------
+
+    def _window(self, since, until):
+        """A slice when the timestamps are sorted, else a boolean mask; None for everything"""
+        if since is None and until is None:
+            return None
+        timestamps = self.column("timestamp")
+        lo = _microseconds(since) if since is not None else None
+        hi = _microseconds(until) if until is not None else None
+        if self.meta["sorted"]:
+            start = 0 if lo is None else int(np.searchsorted(timestamps, lo, "left"))
+            stop = len(timestamps) if hi is None else int(np.searchsorted(timestamps, hi, "left"))
+            return slice(start, stop)
+        mask = np.ones(len(timestamps), dtype=bool)
+        if lo is not None:
+            mask &= timestamps >= lo
+        if hi is not None:
+            mask &= timestamps < hi
+        return mask
+
+    def _group(self, name, values):
+        """(codes, labels) for a group-by column; `values(column)` gives the selected rows"""
+        if name in CATEGORIES:
+            return values(name), self.meta["dictionaries"][name]
+        if name in TIME_GROUPS:
+            timestamps = values("timestamp")
+            if name == "day":
+                periods = timestamps // _US_PER_DAY
+            else:
+                periods = timestamps.astype("datetime64[us]").astype("datetime64[M]").astype(np.int64)
+            if not len(periods):
+                return periods, []
+            # Periods are a dense range, so they can be codes without sorting
+            first = int(periods.min())
+            labels = np.arange(first, int(periods.max()) + 1).astype(TIME_GROUPS[name])
+            return periods - first, [str(v) for v in labels]
+        if name == "match_score":
+            return values(name).astype(np.int64) + 1, [None] + list(range(np.iinfo(np.int8).max + 1))
+        raise ValueError(f"unknown column: {name}")
+
+    def count(self, by=(), since=None, until=None, where=None):
+        """Lead counts grouped by `by` columns, largest first.
+
+        `by` takes any of CATEGORIES, "match_score", "day" and "month".
+        `since` (inclusive) and `until` (exclusive) bound the timestamp;
+        `where` maps categorical columns to a value or list of values.
+        Returns {group: count}, keyed by the value, or by a tuple of values
+        for several columns; with no `by`, the total as an int.
+        """
+        self.reload()
+        by = (by,) if isinstance(by, str) else tuple(by)
+        window = self._window(since, until)
+        mask = None
+        for column, wanted in (where or {}).items():
+            wanted = [wanted] if isinstance(wanted, str) else list(wanted)
+            index = {v: i for i, v in enumerate(self.meta["dictionaries"][column])}
+            codes = self.column(column) if window is None else self.column(column)[window]
+            matches = np.isin(codes, [index[v] for v in wanted if v in index])
+            mask = matches if mask is None else mask & matches
+
+        def values(name):
+            column = self.column(name) if window is None else self.column(name)[window]
+            return column if mask is None else column[mask]
+
+        if not by:
+            return int(len(values("role")))
+        key, size, labels = None, 1, []
+        for name in by:
+            codes, names = self._group(name, values)
+            key = codes.astype(np.int64) if key is None else key * len(names) + codes
+            size *= max(len(names), 1)
+            labels.append(names)
+        if size <= 1 << 24:
+            counts = np.bincount(key, minlength=size)
+            present = np.flatnonzero(counts)
+            counts = counts[present]
+        else:
+            present, counts = np.unique(key, return_counts=True)
+        order = np.argsort(-counts, kind="stable")
+        out = {}
+        for flat, n in zip(present[order].tolist(), counts[order].tolist()):
+            group = []
+            for names in reversed(labels):
+                flat, code = divmod(flat, len(names))
+                group.append(names[code])
+            group.reverse()
+            out[group[0] if len(group) == 1 else tuple(group)] = n
+        return out
+
+    def stats(self):
+        """Rows, whether timestamps are in order, dictionary sizes and bytes on disk"""
+        self.reload()
+        size = sum(os.path.getsize(self._file(c)) for c in DTYPES if os.path.exists(self._file(c)))
+        return {"rows": self.rows, "sorted": self.meta["sorted"], "bytes": size,
+                "dictionaries": {c: len(v) for c, v in self.meta["dictionaries"].items()}}
+
+
+def _rewritten(source):
+    return ValueError(f"{source} is shorter than when it was last ingested, so it was recreated or rewritten;"
+                      " rebuild the columns with `python lead_columns.py ingest --rebuild`")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("ingest", help="append new leads")
+    p.add_argument("--db", default=config.LEAD_STORE["path"])
+    p.add_argument("--csv", help="read this leads CSV instead of the database")
+    p.add_argument("--rebuild", action="store_true", help="drop the columns first and ingest everything again")
+    p = sub.add_parser("report", help="lead counts")
+    p.add_argument("--by", nargs="*", default=["program"],
+                   help=f"columns to group by: {', '.join(CATEGORIES)}, match_score, day, month")
+    p.add_argument("--since", help="first day, e.g. 2026-01-01")
+    p.add_argument("--until", help="day after the last")
+    p.add_argument("--where", nargs="*", default=[], metavar="COLUMN=VALUE")
+    parser.add_argument("--path", default=config.LEAD_COLUMNS["path"])
+    args = parser.parse_args()
+
+    columns = LeadColumns(args.path)
+    if args.command == "ingest":
+        if args.rebuild:
+            columns.reset()
+        added = columns.ingest_csv(args.csv) if args.csv else columns.ingest_store(args.db)
+        print(f"Appended {added} leads ({columns.rows} in total)")
+        return
+    where = {}
+    for condition in args.where:
+        column, value = condition.split("=", 1)
+        where.setdefault(column, []).append(value)
+    counts = columns.count(args.by, args.since, args.until, where)
+    if not args.by:
+        print(counts)
+        return
+    for group, n in counts.items():
+        print(f"{n:>10}  {' | '.join(map(str, group)) if isinstance(group, tuple) else group}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+"""Concurrency-safe lead store.
+
+Leads are queued in memory and written by a single background thread in
+batches, one SQLite (WAL) transaction per batch, so capturing a lead costs the
+request path a queue put instead of a file open. Several Streamlit worker
+processes can share the same database file.
+
+A lead who gave a contact (email or phone) is one row: they are identified
+by a fingerprint of their normalized name and contact, kept in a unique
+index on disk and in a dict the writer loads once, so a repeat save (a
+regenerated roadmap, a new assessment) updates the row in O(1) instead of
+adding one. Without a contact a name alone cannot tell two people apart, so
+every such save is a row of its own; dedup later merges only rows with the
+same name, stage, challenge and goal saved within `merge_window` seconds of
+each other (a regenerated roadmap). Every save, with the program recommended
+at the time, is also appended to lead_history.
+
+Usage:
+    python lead_store.py export leads.csv   # CSV for the sales team
+    python lead_store.py import leads.csv   # load an existing CSV once
+    python lead_store.py dedup              # merge duplicate leads already in the database
+    python lead_store.py dedup leads.csv    # ... or in a CSV, in place
+"""
+import argparse
+import atexit
+import csv
+import hashlib
+import os
+import queue
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from datetime import datetime
+
+import config
+
+CSV_HEADER = ["Timestamp", "Name", "Role", "Challenge", "Goal", "Program", "Alternate", "Match Score", "Contact"]
+COLUMNS = "timestamp, name, role, challenge, goal, program, alternate, match_score, contact"
+HISTORY_COLUMNS = "lead_id, timestamp, role, challenge, goal, program, alternate, match_score"
+_STOP = object()
+
+
+def _normalize(text):
+    text = str(text or "")
+    if not text.isascii():
+        text = unicodedata.normalize("NFKC", text)
+    return " ".join(text.casefold().split())
+
+
+def fingerprint(name, contact):
+    """Signed 64-bit identity of a lead, or None without a contact.
+
+    Names compare case-, width- and whitespace-insensitively. An email is
+    compared lowercased and a phone number by its last ten digits.
+    """
+    contact = _normalize(contact)
+    if "@" not in contact:
+        contact = re.sub(r"\D", "", contact)[-10:]
+    if not contact:
+        return None
+    key = f"{_normalize(name)}\x1f{contact}"
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+def _profile(name, role, challenge, goal):
+    """What dedup compares for a lead without a contact: the whole form, normalized"""
+    return tuple(_normalize(value) for value in (name, role, challenge, goal))
+
+
+def _seconds(timestamp):
+    try:
+        return datetime.fromisoformat(str(timestamp)).timestamp()
+    except ValueError:
+        return None
+
+
+def _within(timestamp, last_seen, window):
+    """True if a save at `timestamp` came at most `window` seconds after `last_seen`"""
+    start, last = _seconds(timestamp), _seconds(last_seen)
+    return start is not None and last is not None and start - last <= window
+
+
+class LeadStore:
+    """SQLite-backed lead store with a bounded queue and a batching writer thread"""
+
+    def __init__(self, path="leads.db", queue_size=10000, batch_size=200, flush_interval=0.5, merge_window=3600.0):
+        self.path = path
+        self.merge_window = merge_window
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.merged = 0  # saves that updated an existing lead
+        self.dropped = 0  # leads lost to a full queue or a failed batch
+        self.batches = 0
+        self.write_seconds = 0.0  # time spent committing, including waits for the database lock
+        self.retries = 0  # batches retried because another process held the write lock
+        self._ids = None  # fingerprint -> lead id, loaded by the writer thread
+        self._queue = queue.Queue(maxsize=queue_size)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leads ("
+                " id INTEGER PRIMARY KEY,"
+                " timestamp TEXT NOT NULL,"
+                " name TEXT, role TEXT, challenge TEXT, goal TEXT, program TEXT,"
+                " alternate TEXT, match_score INTEGER)"
+            )
+            # Older databases lack the columns added since (structured roadmap, dedup)
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(leads)")}
+            for column, kind in (("alternate", "TEXT"), ("match_score", "INTEGER"), ("contact", "TEXT"),
+                                 ("fingerprint", "INTEGER"), ("last_seen", "TEXT"),
+                                 ("saves", "INTEGER NOT NULL DEFAULT 1")):
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE leads ADD COLUMN {column} {kind}")
+            # Leads without a contact, and rows from before dedup until it runs, have no fingerprint
+            # (NULLs never conflict)
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS leads_fingerprint ON leads (fingerprint)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS lead_history ("
+                " id INTEGER PRIMARY KEY, lead_id INTEGER NOT NULL, timestamp TEXT NOT NULL,"
+                " role TEXT, challenge TEXT, goal TEXT, program TEXT, alternate TEXT, match_score INTEGER)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS lead_history_lead ON lead_history (lead_id)")
+        self._writer = threading.Thread(target=self._run, name="lead-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # FULL fsyncs every commit; commits happen once per batch
+        conn.execute("PRAGMA synchronous=FULL")
+        return conn
+
+    def save(self, data):
+        """Queue a lead for writing; never blocks (a lead is dropped if the writer is this far behind)"""
+        lead = (
+            str(datetime.now()),
+            data['name'],
+            data['role'],
+            data['challenge'],
+            data['goal'],
+            data.get('program', 'N/A'),
+            data.get('alternate'),
+            data.get('match_score'),
+            data.get('contact') or None,
+            fingerprint(data['name'], data.get('contact')),
+        )
+        try:
+            self._queue.put_nowait(lead)
+        except queue.Full:
+            self.dropped += 1
+            print("lead-writer: queue full, dropped a lead", file=sys.stderr)
+
+    def _run(self):
+        conn = self._connect()
+        self._ids = dict(conn.execute("SELECT fingerprint, id FROM leads WHERE fingerprint IS NOT NULL"))
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            while True:
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+                if stopping or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            try:
+                if batch:
+                    self._write(conn, batch)
+            except Exception as e:
+                # A bad batch must not kill the writer: every later save() and flush() depends on it
+                self.dropped += len(batch)
+                print(f"lead-writer: dropped {len(batch)} leads: {e!r}", file=sys.stderr)
+            finally:
+                for _ in range(len(batch) + (1 if stopping else 0)):
+                    self._queue.task_done()
+        conn.close()
+
+    def _write(self, conn, batch, attempts=5):
+        start = time.perf_counter()
+        for attempt in range(attempts):
+            ids = {}
+            try:
+                with conn:
+                    merged = sum(self._upsert(conn, lead, ids) for lead in batch)
+                # Only ids from a committed transaction are remembered
+                self._ids.update(ids)
+                self.written += len(batch)
+                self.merged += merged
+                self.batches += 1
+                self.write_seconds += time.perf_counter() - start
+                return
+            except sqlite3.OperationalError as e:
+                # Another worker process holds the write lock for too long
+                if attempt == attempts - 1:
+                    self.dropped += len(batch)
+                    print(f"lead-writer: dropped {len(batch)} leads: {e}", file=sys.stderr)
+                    return
+                self.retries += 1
+                time.sleep(0.5 * (attempt + 1))
+
+    def _upsert(self, conn, lead, ids):
+        """Insert or update one lead and log it to lead_history; True if the lead already existed"""
+        timestamp, name, role, challenge, goal, program, alternate, match_score, contact, fp = lead
+        lead_id = None if fp is None else ids.get(fp) or self._ids.get(fp)
+        existed = lead_id is not None and conn.execute(
+            "UPDATE leads SET name = ?, role = ?, challenge = ?, goal = ?, program = ?, alternate = ?,"
+            " match_score = ?, contact = ?, last_seen = ?, saves = saves + 1 WHERE id = ?",
+            (name, role, challenge, goal, program, alternate, match_score, contact, timestamp,
+             lead_id)).rowcount > 0
+        if not existed:
+            # Unknown here, but another process may have just added them
+            lead_id, saves = conn.execute(
+                f"INSERT INTO leads ({COLUMNS}, fingerprint, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (fingerprint) DO UPDATE SET name = excluded.name, role = excluded.role,"
+                " challenge = excluded.challenge, goal = excluded.goal, program = excluded.program,"
+                " alternate = excluded.alternate, match_score = excluded.match_score,"
+                " contact = excluded.contact, last_seen = excluded.last_seen, saves = saves + 1"
+                " RETURNING id, saves",
+                (timestamp, name, role, challenge, goal, program, alternate, match_score, contact, fp,
+                 timestamp)).fetchall()[0]
+            existed = saves > 1
+            if fp is not None:
+                ids[fp] = lead_id
+        conn.execute(f"INSERT INTO lead_history ({HISTORY_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                     (lead_id, timestamp, role, challenge, goal, program, alternate, match_score))
+        return existed
+
+    def flush(self):
+        """Block until every queued lead has been committed"""
+        self._queue.join()
+
+    def stats(self):
+        """Writer counters: saves committed (and merged into existing leads) and dropped, batches,
+        lock retries, commit time and queue length"""
+        return {"written": self.written, "merged": self.merged, "dropped": self.dropped, "batches": self.batches,
+                "retries": self.retries,
+                "write_seconds": round(self.write_seconds, 4), "pending": self._queue.qsize()}
+
+    def close(self):
+        """Flush and stop the writer thread"""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+    def rows(self):
+        """All committed leads, oldest first"""
+        with self._connect() as conn:
+            return conn.execute(
+                f"SELECT {COLUMNS} FROM leads ORDER BY id"
+            ).fetchall()
+
+    def counts(self):
+        """{"leads", "saves"} committed so far"""
+        with self._connect() as conn:
+            leads, saves = conn.execute("SELECT count(*), coalesce(sum(saves), 0) FROM leads").fetchone()
+        return {"leads": leads, "saves": saves}
+
+    def history(self, name, contact):
+        """Every save of the lead with this name and contact, oldest first: (timestamp, program, alternate,
+        match_score)"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT h.timestamp, h.program, h.alternate, h.match_score FROM lead_history h"
+                " JOIN leads l ON l.id = h.lead_id WHERE l.fingerprint = ? ORDER BY h.timestamp, h.id",
+                (fingerprint(name, contact),)).fetchall()
+
+    def export_csv(self, path):
+        """Write every committed lead to a CSV with the leads.csv header"""
+        rows = self.rows()
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADER)
+            writer.writerows(rows)
+        return len(rows)
+
+    def import_csv(self, path):
+        """Save the rows of an existing leads CSV, merging repeat leads like save() does"""
+        count = 0
+        for row in _read_csv(path):
+            self._queue.put(tuple(row) + (fingerprint(row[1], row[8]),))
+            count += 1
+        self.flush()
+        return count
+
+    def dedup(self):
+        """Merge leads that share a fingerprint, including rows saved before dedup existed.
+
+        The oldest row of each lead is kept with the newest details and the
+        summed save count; every merged row moves to lead_history. A row
+        without a contact is merged only into the previous one with the same
+        name, stage, challenge and goal, if that was last saved at most
+        `merge_window` seconds earlier; the rest are left as they are (and
+        lose any fingerprint an older version gave them from name and stage
+        alone). One pass over the table in one transaction. Returns (rows
+        before, rows after).
+        """
+        conn = self._connect()
+        conn.execute("PRAGMA cache_size = -262144")  # 256 MB: the fingerprint index is filled in random order
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                keepers = []  # [id, saves, last seen, latest details, changed, fingerprint]
+                latest = {}  # fingerprint, or the form without a contact -> its latest keeper
+                deleted, moved, history = [], [], []
+                total = 0
+                rows = conn.execute(f"SELECT id, {COLUMNS}, fingerprint, last_seen, saves FROM leads ORDER BY id")
+                for (lead_id, timestamp, name, role, challenge, goal, program, alternate, score, contact, stored,
+                     seen, saves) in rows:
+                    total += 1
+                    details = (name, role, challenge, goal, program, alternate, score, contact)
+                    # Saved before lead_history existed: the row itself is its only record
+                    legacy = seen is None
+                    fp = fingerprint(name, contact)
+                    key = fp if fp is not None else _profile(name, role, challenge, goal)
+                    keeper = latest.get(key)
+                    if keeper is not None and fp is None and not _within(timestamp, keeper[2], self.merge_window):
+                        keeper = None  # the same form much later may well be someone else
+                    if keeper is None:
+                        keeper = latest[key] = [lead_id, saves, seen or timestamp, details, legacy or stored != fp, fp]
+                        keepers.append(keeper)
+                    else:
+                        keeper[1] += saves
+                        keeper[2], keeper[3], keeper[4] = seen or timestamp, details, True
+                        deleted.append((lead_id,))
+                        if not legacy:
+                            moved.append((keeper[0], lead_id))
+                    if legacy:
+                        history.append((keeper[0], timestamp, role, challenge, goal, program, alternate, score))
+                conn.executemany("DELETE FROM leads WHERE id = ?", deleted)
+                conn.executemany("UPDATE lead_history SET lead_id = ? WHERE lead_id = ?", moved)
+                conn.executemany(f"INSERT INTO lead_history ({HISTORY_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                 history)
+                conn.executemany(
+                    "UPDATE leads SET fingerprint = ?, saves = ?, last_seen = ?, name = ?, role = ?, challenge = ?,"
+                    " goal = ?, program = ?, alternate = ?, match_score = ?, contact = ? WHERE id = ?",
+                    [(fp, saves, seen, *details, lead_id)
+                     for lead_id, saves, seen, details, changed, fp in keepers if changed])
+        finally:
+            conn.close()
+        return total, total - len(deleted)
+
+
+def _read_csv(path):
+    """Rows of a leads CSV, padded to CSV_HEADER (older CSVs stop at Program or Match Score)"""
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if row:
+                row = row + [""] * (len(CSV_HEADER) - len(row))
+                yield row[:6] + [row[6] or None, int(row[7]) if row[7] else None, row[8] or None]
+
+
+def dedup_csv(path, merge_window=3600.0):
+    """Merge repeat leads of a CSV in place, as LeadStore.dedup does. Returns (rows before, rows after)."""
+    leads = {}  # fingerprint (or first row number, without a contact) -> row: first timestamp, latest details
+    latest = {}  # the form of a lead without a contact -> (its key in leads, last saved)
+    total = 0
+    for row in _read_csv(path):
+        total += 1
+        key = fingerprint(row[1], row[8])
+        if key is None:
+            profile = _profile(*row[1:5])
+            key, last_seen = latest.get(profile, (None, None))
+            if key is None or not _within(row[0], last_seen, merge_window):
+                key = ("row", total)
+            latest[profile] = (key, row[0])
+        if key in leads:
+            row[0] = leads[key][0]
+        leads[key] = row
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        writer.writerows(leads.values())
+    os.replace(tmp, path)
+    return total, len(leads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["export", "import", "dedup"])
+    parser.add_argument("csv_path", nargs="?")
+    parser.add_argument("--db", default=config.LEAD_STORE["path"])
+    args = parser.parse_args()
+    if args.command != "dedup" and not args.csv_path:
+        parser.error(f"{args.command} needs a CSV path")
+
+    window = config.LEAD_STORE["merge_window"]
+    note = (f"Rows without a contact were merged only with the same name, stage, challenge and goal saved"
+            f" within {window / 60:.0f} minutes; the rest are left as they are")
+    if args.command == "dedup" and args.csv_path:
+        before, after = dedup_csv(args.csv_path, window)
+        print(f"Merged {before} rows into {after} leads in {args.csv_path}")
+        print(note)
+        return
+    store = LeadStore(path=args.db, merge_window=window)
+    if args.command == "export":
+        print(f"Exported {store.export_csv(args.csv_path)} leads to {args.csv_path}")
+    elif args.command == "import":
+        print(f"Imported {store.import_csv(args.csv_path)} leads from {args.csv_path}")
+    else:
+        before, after = store.dedup()
+        print(f"Merged {before} rows into {after} leads")
+        print(note)
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Groq client construction with a pooled, keep-alive HTTP transport"""
+import httpx
+from groq import AsyncGroq, Groq
+
+import config
+
+
+def build_client(api_key, pool_size=20, keepalive=20, keepalive_expiry=60.0,
+                 timeout=30.0, connect_timeout=5.0, max_retries=2, base_url=None):
+    """Build a Groq client whose HTTP connections are pooled and reused.
+
+    Build it once per process (the app wraps this in st.cache_resource) so
+    consecutive calls skip the TCP/TLS handshake.
+    """
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=keepalive,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(timeout, connect=connect_timeout),
+    )
+    return Groq(api_key=api_key, base_url=base_url, max_retries=max_retries, http_client=http_client)
+
+
+def default_client(api_key, base_url=None):
+    """Pooled client configured from config.LLM_CLIENT"""
+    return build_client(api_key, base_url=base_url, **config.LLM_CLIENT)
+
+
+def build_async_client(api_key, pool_size=20, keepalive=20, keepalive_expiry=60.0,
+                       timeout=30.0, connect_timeout=5.0, max_retries=2, base_url=None):
+    """Async counterpart of build_client, for the batch engine"""
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=keepalive,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(timeout, connect=connect_timeout),
+    )
+    return AsyncGroq(api_key=api_key, base_url=base_url, max_retries=max_retries, http_client=http_client)
@@ -0,0 +1,191 @@
+"""Prompt templates for Asha.
+
+Templates are compiled once per process for each version and language, with
+the tokens of their fixed text counted up front, so building a prompt only
+fills in and counts the user's fields. The roadmap prompt lists just the
+candidate programs for the user's stage, serialized compactly, and is kept
+within the token budget for its call (config.TOKEN_BUDGETS).
+"""
+import json
+from collections import Counter
+from functools import lru_cache
+from string import Template
+
+import config
+from recommender import recommend
+from roadmap_cache import NAME_PLACEHOLDER
+from tokenizer import count_tokens, truncate
+
+TONES = {"A": "warm supportive mentoring", "B": "urgent sales with FOMO and scarcity"}
+
+# $-placeholders leave the JSON braces alone; $lang and $tone are filled in at compile time
+ROADMAP_TEMPLATE = """
+You are Asha, an AI Leadership Architect for Iron Lady. Speak in $lang.
+
+User Profile:
+- Name: $name
+- Current Stage: $role
+- Challenge: $challenge
+- Goal: $goal
+
+Programs: $programs
+
+Recommended Program (already selected, do not change it): $program - $score% match
+Alternate Option: $alternate
+
+Tone: $tone
+
+Respond with a single JSON object and nothing else (no markdown fences), keys in this order:
+{"program":"$program","score":$score,"why":"why it fits, tied to their goal; use their name","alternate":"$alternate","steps":["3 plan steps specific to their profile"],"outcomes":["measurable outcomes"],"comparison":[{"aspect":"Duration","best":"...","alternate":"..."},{"aspect":"Focus",...},{"aspect":"Price",...}],"cta":"emotional call to action using their name"}
+Write the values in $lang (markdown allowed inside them); keep the keys in English.
+"""
+
+FOLLOWUP_TEMPLATE = """
+You are Asha, Iron Lady's AI mentor. The user asked: "$question"
+
+Context:
+- User: $name
+- Recommended Program: $program
+- Their Goal: $goal
+
+Answer warmly and specifically. If it's about logistics, be factual. If it's about confidence, be motivating.
+Language: $lang
+"""
+
+# Roadmaps already shown in one language, translated on a language switch
+TRANSLATE_TEMPLATE = """
+You are Asha, an AI Leadership Architect for Iron Lady. Translate this roadmap into $lang.
+
+Roadmap: $roadmap
+
+Respond with a single JSON object and nothing else (no markdown fences), with the same keys in the same order.
+Write the values in $lang; keep markdown, emoji, numbers, prices, the program names ($programs) and $placeholder exactly as they are.
+"""
+
+# Static page copy for the localized catalog (catalog.py)
+CATALOG_TEMPLATE = """
+Translate each string of this JSON array into $lang for Iron Lady, a leadership program for women.
+Keep markdown, emoji, numbers, prices, {placeholders} and the program names ($programs) exactly as they are.
+
+Strings: $strings
+
+Respond with a JSON array of the $count translated strings, in the same order, and nothing else.
+"""
+
+
+class CompiledPrompt:
+    """A template whose fixed text has already been counted in tokens"""
+
+    def __init__(self, text):
+        self.template = Template(text)
+        self.placeholders = Counter(m.group("named") or m.group("braced")
+                                    for m in self.template.pattern.finditer(text)
+                                    if m.group("named") or m.group("braced"))
+        self.fixed_tokens = count_tokens(self.template.safe_substitute({k: "" for k in self.placeholders}))
+
+    def substitute(self, fields):
+        return self.template.substitute(fields)
+
+    def tokens(self, fields):
+        """Tokens of substitute(fields), counting only the fields"""
+        return self.fixed_tokens + sum(n * _field_tokens(str(fields[k])) for k, n in self.placeholders.items())
+
+
+# Program names and catalog JSON repeat on every prompt
+_field_tokens = lru_cache(maxsize=4096)(count_tokens)
+
+
+def token_budget(kind, language, version=None):
+    """{"prompt", "completion"} token budget for a call, scaled for its language and A/B version"""
+    budgets = config.TOKEN_BUDGETS
+    scale = budgets["languages"].get(language, 1.0) * budgets["versions"].get(version, 1.0)
+    return {"prompt": budgets[kind]["prompt"], "completion": int(budgets[kind]["completion"] * scale)}
+
+
+@lru_cache(maxsize=None)
+def _roadmap_template(version, language):
+    lang = config.LANGUAGES[language]["name"]
+    return CompiledPrompt(Template(ROADMAP_TEMPLATE).safe_substitute(lang=lang, tone=TONES.get(version, TONES["A"])))
+
+
+@lru_cache(maxsize=None)
+def _followup_template(language):
+    return CompiledPrompt(Template(FOLLOWUP_TEMPLATE).safe_substitute(lang=config.LANGUAGES[language]["name"]))
+
+
+@lru_cache(maxsize=None)
+def _translate_template(language):
+    return CompiledPrompt(Template(TRANSLATE_TEMPLATE).safe_substitute(
+        lang=config.LANGUAGES[language]["name"], programs=", ".join(config.PROGRAMS_DB), placeholder=NAME_PLACEHOLDER))
+
+
+@lru_cache(maxsize=None)
+def _catalog_template(language):
+    return CompiledPrompt(Template(CATALOG_TEMPLATE).safe_substitute(
+        lang=config.LANGUAGES[language]["name"], programs=", ".join(config.PROGRAMS_DB)))
+
+
+@lru_cache(maxsize=None)
+def programs_json(names):
+    """The named programs as compact JSON, without the fields only the recommender uses"""
+    return json.dumps({name: {k: v for k, v in config.PROGRAMS_DB[name].items() if k != "ideal_for"}
+                       for name in names}, ensure_ascii=False, separators=(",", ":"))
+
+
+def candidate_programs(role, rec):
+    """The recommended and alternate programs, then any other program meant for this stage"""
+    names = [rec.program, rec.alternate]
+    for name, info in config.PROGRAMS_DB.items():
+        if name not in names and (role in info["ideal_for"] or "All Stages" in info["ideal_for"]):
+            names.append(name)
+    return tuple(names)
+
+
+def _fit(template, fields, budget, *trimmable):
+    """Fill `template`, shortening the `trimmable` free-text fields in order until it fits `budget`"""
+    for field in trimmable:
+        excess = template.tokens(fields) - budget
+        while excess > 0 and fields[field]:
+            fields[field] = truncate(fields[field], max(0, count_tokens(fields[field]) - excess))
+            excess = template.tokens(fields) - budget
+    return template.substitute(fields)
+
+
+def build_roadmap_prompt(user_data, version, language, rec=None):
+    """Build the roadmap prompt for a user profile.
+
+    The program choice comes from the local recommender; the model only
+    writes the narrative around it, as a JSON roadmap (roadmap_format.SCHEMA).
+    Over the prompt budget, only the recommended and alternate programs are
+    listed, and then the goal is shortened.
+    """
+    rec = rec or recommend(user_data)
+    template = _roadmap_template(version, language)
+    budget = token_budget("roadmap", language, version)["prompt"]
+    fields = {"name": user_data['name'], "role": user_data['role'], "challenge": user_data['challenge'],
+              "goal": user_data['goal'], "program": rec.program, "score": rec.score, "alternate": rec.alternate}
+
+    names = candidate_programs(user_data['role'], rec)
+    fields["programs"] = programs_json(names)
+    if template.tokens(fields) > budget and len(names) > 2:
+        fields["programs"] = programs_json(names[:2])
+    return _fit(template, fields, budget, "goal")
+
+
+def build_followup_prompt(question, user_data, program, language):
+    """Build the prompt for an "Ask Asha Anything" follow-up question, shortening very long text"""
+    fields = {"question": question, "name": user_data['name'], "program": program, "goal": user_data['goal']}
+    return _fit(_followup_template(language), fields, token_budget("followup", language)["prompt"],
+                "question", "goal")
+
+
+def build_translation_prompt(fields, language):
+    """Prompt translating a roadmap's narrative fields (the user's name swapped for NAME_PLACEHOLDER) into `language`"""
+    return _translate_template(language).substitute(
+        {"roadmap": json.dumps(fields, ensure_ascii=False, separators=(",", ":"))})
+
+
+def build_catalog_prompt(strings, language):
+    """Prompt translating a batch of catalog strings into `language`"""
+    return _catalog_template(language).substitute(
+        {"strings": json.dumps(strings, ensure_ascii=False), "count": len(strings)})
@@ -0,0 +1,187 @@
+"""Global rate limiter and admission queue for LLM calls.
+
+Two token buckets, requests per minute and tokens per minute, live in SQLite
+so every Streamlit worker, API worker and batch run draws from the same Groq
+quota. A call that would exceed the quota waits in a FIFO queue (also in
+SQLite) instead of failing. Only the head of the queue may take from the
+buckets, so nobody gets overtaken. The queue is bounded: past `queue_size`
+waiters, or after `max_wait` seconds, acquire() raises RateLimited and the
+caller falls back.
+
+Tokens are reserved up front (prompt estimate + max_tokens) and settled
+against the reported usage afterwards. `clock` and `sleep` can be replaced
+with a simulated clock for testing.
+"""
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from tokenizer import count_tokens
+
+
+class RateLimited(Exception):
+    """The admission queue is full, or the wait exceeded max_wait"""
+
+
+def estimate_tokens(text):
+    """Prompt size in tokens, counted locally (tokenizer.py)"""
+    return count_tokens(text) + 1
+
+
+class SharedLimiter:
+    """Cross-process request and token buckets with a fair, bounded wait queue"""
+
+    def __init__(self, path="ratelimit.db", rpm=30, tpm=6000, headroom=0.9, queue_size=100, max_wait=45.0,
+                 poll_interval=0.1, stale_after=10.0, clock=time.time, sleep=time.sleep):
+        self.path = path
+        # Stay under the nominal quota: admitted calls can reach the upstream late
+        # and bunched, and the SDK's own retries are not admitted through here
+        rpm, tpm = rpm * headroom, tpm * headroom
+        self.rates = {"requests": rpm / 60.0, "tokens": tpm / 60.0}
+        self.capacity = {"requests": max(1.0, rpm), "tokens": float(tpm)}
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.clock = clock
+        self.sleep = sleep
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.counters = {"admitted": 0, "queued": 0, "rejected": 0, "wait_seconds": 0.0}
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, level REAL, updated REAL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS waiters (ticket INTEGER PRIMARY KEY AUTOINCREMENT, heartbeat REAL)")
+
+    def _conn(self):
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self, conn):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _levels(self, conn, now):
+        levels = {}
+        for name, level, updated in conn.execute("SELECT name, level, updated FROM buckets"):
+            levels[name] = min(self.capacity[name], level + max(0.0, now - updated) * self.rates[name])
+        for name in self.capacity:
+            levels.setdefault(name, self.capacity[name])
+        return levels
+
+    def _store(self, conn, levels, now):
+        conn.executemany("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)",
+                         [(name, level, now) for name, level in levels.items()])
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def acquire(self, tokens=1, on_wait=None):
+        """Block until the quota allows a call costing `tokens`; returns the tokens reserved.
+
+        While queued, `on_wait(position, eta_seconds)` is called on every poll.
+        """
+        tokens = min(tokens, self.capacity["tokens"])  # a larger call could never be admitted
+        conn = self._conn()
+        start = self.clock()
+        ticket = None
+        try:
+            while True:
+                now = self.clock()
+                with self._transaction(conn):
+                    conn.execute("DELETE FROM waiters WHERE heartbeat < ?", (now - self.stale_after,))
+                    if ticket is not None and conn.execute(
+                            "UPDATE waiters SET heartbeat = ? WHERE ticket = ?", (now, ticket)).rowcount == 0:
+                        ticket = None  # dropped as stale after a long stall: rejoin at the back
+                    if ticket is None:
+                        ahead = conn.execute("SELECT COUNT(*) FROM waiters").fetchone()[0]
+                    else:
+                        ahead = conn.execute("SELECT COUNT(*) FROM waiters WHERE ticket < ?", (ticket,)).fetchone()[0]
+                    levels = self._levels(conn, now)
+                    if ahead == 0 and levels["requests"] >= 1 and levels["tokens"] >= tokens:
+                        levels["requests"] -= 1
+                        levels["tokens"] -= tokens
+                        self._store(conn, levels, now)
+                        if ticket is not None:
+                            conn.execute("DELETE FROM waiters WHERE ticket = ?", (ticket,))
+                            ticket = None
+                        break
+                    if ticket is None:
+                        if ahead >= self.queue_size:
+                            self._count("rejected")
+                            raise RateLimited(f"LLM queue is full ({ahead} waiting)")
+                        ticket = conn.execute("INSERT INTO waiters (heartbeat) VALUES (?)", (now,)).lastrowid
+                        self._count("queued")
+
+                waited = now - start
+                if waited >= self.max_wait:
+                    self._count("rejected")
+                    raise RateLimited(f"waited {waited:.0f}s for LLM quota")
+                # Assume everyone ahead costs about what we do
+                eta = max(0.0,
+                          (ahead + 1 - levels["requests"]) / self.rates["requests"],
+                          ((ahead + 1) * tokens - levels["tokens"]) / self.rates["tokens"])
+                if on_wait:
+                    on_wait(ahead + 1, eta)
+                # The head sleeps until its refill; others poll gently but often enough to heartbeat
+                pause = eta if ahead == 0 else eta / 2
+                self.sleep(min(max(pause, self.poll_interval), 1.0, self.stale_after / 2))
+        finally:
+            if ticket is not None:
+                conn.execute("DELETE FROM waiters WHERE ticket = ?", (ticket,))
+        self._count("admitted")
+        self._count("wait_seconds", self.clock() - start)
+        return tokens
+
+    def try_acquire(self, tokens=1):
+        """Take quota only if it is free right now and nobody is queued; never waits.
+
+        Returns the tokens reserved, or 0 if nothing was taken.
+        """
+        tokens = min(tokens, self.capacity["tokens"])
+        conn = self._conn()
+        now = self.clock()
+        with self._transaction(conn):
+            waiting = conn.execute("SELECT COUNT(*) FROM waiters").fetchone()[0]
+            levels = self._levels(conn, now)
+            if waiting or levels["requests"] < 1 or levels["tokens"] < tokens:
+                return 0
+            levels["requests"] -= 1
+            levels["tokens"] -= tokens
+            self._store(conn, levels, now)
+        self._count("admitted")
+        return tokens
+
+    def settle(self, reserved, used):
+        """Return unused reserved tokens to the bucket (or charge the overrun)"""
+        if used is None or used == reserved:
+            return
+        conn = self._conn()
+        now = self.clock()
+        with self._transaction(conn):
+            levels = self._levels(conn, now)
+            levels["tokens"] = min(self.capacity["tokens"], levels["tokens"] + reserved - used)
+            self._store(conn, levels, now)
+
+    def stats(self):
+        """Admission counters for this process plus the shared bucket levels and queue length"""
+        conn = self._conn()
+        levels = self._levels(conn, self.clock())
+        waiting = conn.execute("SELECT COUNT(*) FROM waiters").fetchone()[0]
+        with self._lock:
+            counters = dict(self.counters)
+        return dict(counters, waiting=waiting, requests_available=int(levels["requests"]),
+                    tokens_available=int(levels["tokens"]))
@@ -0,0 +1,136 @@
+"""Deterministic local program recommender.
+
+Ranks config.PROGRAMS_DB against a profile using each program's `ideal_for`,
+`focus` and `outcomes` plus keywords from the user's goal and challenge. It
+runs in microseconds, so the LLM only has to write the narrative around a
+decision that is already made (or can be skipped entirely).
+"""
+import re
+from collections import namedtuple
+
+import config
+
+Recommendation = namedtuple("Recommendation", ["program", "alternate", "score", "scores"])
+
+# Goal/challenge words mapped onto the vocabulary of the catalog
+SYNONYMS = {
+    "lead": "leadership", "leader": "leadership", "leading": "leadership", "manage": "management",
+    "manager": "management", "managing": "management", "team": "team", "promotion": "senior",
+    "promoted": "senior", "promote": "senior", "senior": "senior", "director": "senior",
+    "executive": "executive", "ceo": "suite", "cxo": "suite", "vp": "senior", "strategy": "strategic",
+    "strategic": "strategic", "grow": "growth", "growth": "growth", "confident": "confidence",
+    "confidence": "confidence", "speak": "speaking", "speaking": "speaking", "speaker": "speaking",
+    "public": "public", "present": "presence", "presentation": "speaking", "communicate": "communication",
+    "communication": "communication", "job": "job", "jobs": "job", "hired": "job", "placement": "job",
+    "interview": "interview", "interviews": "interview", "return": "entry", "restart": "entry",
+    "comeback": "entry", "rejoin": "entry", "break": "break", "skills": "skills", "quick": "quick",
+    "fast": "quick", "mindset": "mindset", "plan": "action", "action": "action", "wins": "wins",
+}
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "at", "for", "with", "after", "my", "me",
+    "i", "am", "is", "be", "want", "get", "become", "more", "re", "career",
+}
+
+CHALLENGE_KEYWORDS = {
+    "Low Confidence": ["confidence", "presence"],
+    "Stagnant Career": ["senior", "growth", "strategic"],
+    "Return to Work": ["entry", "job", "interview", "break"],
+    "Public Speaking": ["speaking", "public", "communication"],
+    "Work-Life Balance": ["mindset", "action", "quick"],
+    "Leadership Skills": ["leadership", "team", "management"],
+}
+
+ROLE_WEIGHT = 3.0
+ALL_STAGES_WEIGHT = 1.0
+CHALLENGE_WEIGHT = 1.0
+GOAL_WEIGHT = 2.0
+
+_WORD = re.compile(r"[a-z]+")
+
+
+def _terms(text):
+    terms = set()
+    for word in _WORD.findall(text.lower()):
+        if word not in STOPWORDS:
+            terms.add(SYNONYMS.get(word, word))
+    return terms
+
+
+def _program_features(programs):
+    features = {}
+    for name, info in programs.items():
+        text = " ".join([name, info["focus"]] + info["outcomes"])
+        features[name] = (set(info["ideal_for"]), _terms(text))
+    return features
+
+
+_FEATURES = _program_features(config.PROGRAMS_DB)
+
+
+def score_programs(user_data, programs=None):
+    """Raw relevance score of every program for a profile"""
+    features = _FEATURES if programs is None else _program_features(programs)
+    goal_terms = _terms(user_data.get("goal", ""))
+    challenge_terms = CHALLENGE_KEYWORDS.get(user_data.get("challenge", ""), [])
+    role = user_data.get("role", "")
+
+    scores = {}
+    for name, (ideal_for, terms) in features.items():
+        score = 0.0
+        if role in ideal_for:
+            score += ROLE_WEIGHT
+        elif "All Stages" in ideal_for:
+            score += ALL_STAGES_WEIGHT
+        score += CHALLENGE_WEIGHT * sum(1 for t in challenge_terms if t in terms)
+        score += GOAL_WEIGHT * len(goal_terms & terms)
+        scores[name] = score
+    return scores
+
+
+def recommend(user_data, programs=None):
+    """Best program, alternate and a 85-95% match score for a profile.
+
+    Ties are broken by catalog order, so the result is fully reproducible.
+    """
+    scores = score_programs(user_data, programs)
+    order = list(scores)
+    ranked = sorted(order, key=lambda name: (-scores[name], order.index(name)))
+    best = ranked[0]
+    alternate = ranked[1] if len(ranked) > 1 else best
+
+    # Map the raw score onto the 85-95% band the page has always shown
+    ceiling = ROLE_WEIGHT + CHALLENGE_WEIGHT * 2 + GOAL_WEIGHT * 3
+    match = 85 + round(10 * min(scores[best], ceiling) / ceiling)
+    return Recommendation(best, alternate, match, scores)
+
+
+def build_roadmap(user_data, rec, version="A"):
+    """Structured roadmap (see roadmap_format.SCHEMA) built from the catalog alone, with no LLM call"""
+    best = config.PROGRAMS_DB[rec.program]
+    alt = config.PROGRAMS_DB[rec.alternate]
+    name = user_data["name"]
+    if version == "B":
+        cta = f"⚡ Seats at this price are filling fast, {name}. Reserve yours today!"
+    else:
+        cta = f"💖 You already took the first step, {name}. We'd love to walk the rest with you."
+
+    return {
+        "program": rec.program,
+        "score": rec.score,
+        "why": f"{name}, as a {user_data['role']} facing *{user_data['challenge'].lower()}*, "
+               f"{rec.program} focuses on {best['focus'].lower()}, which is exactly what your goal to "
+               f"\"{user_data['goal']}\" needs.",
+        "alternate": rec.alternate,
+        "steps": [
+            "Enroll and set your personal goal with a mentor in week one",
+            f"Practice {best['outcomes'][0].lower()} in live sessions and apply it at work",
+            f"Review progress with your cohort and lock in {best['outcomes'][-1].lower()}",
+        ],
+        "outcomes": list(best["outcomes"]),
+        "comparison": [
+            {"aspect": aspect, "best": best[field], "alternate": alt[field]}
+            for aspect, field in (("Duration", "duration"), ("Focus", "focus"), ("Price", "price"))
+        ],
+        "cta": cta,
+    }
@@ -0,0 +1,232 @@
+"""Timeouts, hedged requests and a circuit breaker around LLM calls.
+
+Timeouts adapt to observed latency: a call is allowed a multiple of the
+recent p99 for its operation, clamped between a floor and the client's own
+timeout. A call still waiting for its first response after the recent p95
+gets a hedged twin, if the rate limiter has spare quota; the first answer
+wins and the other is closed. A circuit breaker opens when too many recent
+calls fail, so callers fail fast and serve degraded answers until a trial
+call succeeds.
+
+State is per process. Resilience.stats() exposes the breaker and latency
+histograms for operators.
+"""
+import bisect
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from utils import percentile
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = [0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 20.0, 30.0, 60.0]
+
+
+class CircuitOpen(Exception):
+    """The upstream is failing; the call was not attempted"""
+
+
+class LatencyHistogram:
+    """Bucketed latency counts plus a window of recent samples for percentiles"""
+
+    def __init__(self, window=500):
+        self._lock = threading.Lock()
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.recent = deque(maxlen=window)
+        self.total = 0
+        self.sum = 0.0
+
+    def record(self, seconds):
+        with self._lock:
+            self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+            self.recent.append(seconds)
+            self.total += 1
+            self.sum += seconds
+
+    def percentile(self, pct):
+        with self._lock:
+            samples = list(self.recent)
+        return percentile(samples, pct) if samples else None
+
+    def snapshot(self):
+        with self._lock:
+            samples = list(self.recent)
+            counts = list(self.counts)
+            total, total_sum = self.total, self.sum
+        labels = [f"le_{b:g}" for b in BUCKETS] + ["le_inf"]
+        return {
+            "count": total,
+            "sum": round(total_sum, 3),
+            "p50": percentile(samples, 50) if samples else None,
+            "p95": percentile(samples, 95) if samples else None,
+            "p99": percentile(samples, 99) if samples else None,
+            "buckets": dict(zip(labels, counts)),
+        }
+
+
+class CircuitBreaker:
+    """Closed -> open when the recent failure rate is too high -> half-open trial after reset_timeout"""
+
+    def __init__(self, failure_threshold=0.5, window=20, min_calls=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window)  # True = failure
+        self.state = "closed"
+        self.opened_at = None
+        self.trips = 0
+        self.short_circuited = 0
+        self._trial_running = False
+
+    def allow(self):
+        """True if a call may go upstream now"""
+        with self._lock:
+            if self.state == "open" and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            if self.state == "closed":
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record(self, failed):
+        with self._lock:
+            if self.state == "half_open":
+                self._trial_running = False
+                if failed:
+                    self._open()
+                else:
+                    self.state = "closed"
+                    self._outcomes.clear()
+                return
+            self._outcomes.append(failed)
+            failures = sum(self._outcomes)
+            if (self.state == "closed" and len(self._outcomes) >= self.min_calls
+                    and failures / len(self._outcomes) >= self.failure_threshold):
+                self._open()
+
+    def healthy(self):
+        """Closed with no recent failures"""
+        with self._lock:
+            return self.state == "closed" and not any(self._outcomes)
+
+    def _open(self):
+        self.state = "open"
+        self.opened_at = self.clock()
+        self.trips += 1
+
+    def snapshot(self):
+        with self._lock:
+            failures = sum(self._outcomes)
+            return {
+                "state": self.state,
+                "recent_calls": len(self._outcomes),
+                "recent_failures": failures,
+                "trips": self.trips,
+                "short_circuited": self.short_circuited,
+                "open_for": round(self.clock() - self.opened_at, 1) if self.state != "closed" else 0.0,
+            }
+
+
+class Resilience:
+    """Adaptive timeouts, hedging and a shared circuit breaker for named operations"""
+
+    def __init__(self, timeout_percentile=99, timeout_multiplier=2.0, min_timeout=5.0, max_timeout=30.0,
+                 min_samples=20, hedge_percentile=95, hedge_min_delay=0.5, failure_threshold=0.5,
+                 window=20, min_calls=5, reset_timeout=30.0, threads=16):
+        self.timeout_percentile = timeout_percentile
+        self.timeout_multiplier = timeout_multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.min_samples = min_samples
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.breaker = CircuitBreaker(failure_threshold, window, min_calls, reset_timeout)
+        self.histograms = {}
+        self.counters = {"calls": 0, "failures": 0, "hedges": 0, "hedge_wins": 0}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="llm-call")
+
+    def histogram(self, op):
+        with self._lock:
+            if op not in self.histograms:
+                self.histograms[op] = LatencyHistogram()
+            return self.histograms[op]
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def timeout(self, op):
+        """Seconds to allow a call: timeout_multiplier x recent p99, within [min_timeout, max_timeout]"""
+        hist = self.histogram(op)
+        if len(hist.recent) < self.min_samples:
+            return self.max_timeout
+        p = hist.percentile(self.timeout_percentile)
+        return min(self.max_timeout, max(self.min_timeout, p * self.timeout_multiplier))
+
+    def hedge_delay(self, op):
+        """Seconds without an answer before hedging, or None (no hedge)"""
+        hist = self.histogram(op)
+        if self.hedge_percentile is None or len(hist.recent) < self.min_samples:
+            return None
+        return max(self.hedge_min_delay, hist.percentile(self.hedge_percentile))
+
+    def call(self, op, start, can_hedge=None, close=None):
+        """Run start(timeout) with breaker, adaptive timeout and an optional hedge.
+
+        `start` returns as soon as the call has a usable response (for a
+        stream, its first chunk). `can_hedge()` is asked before sending a
+        second request; `close(result)` releases the losing response.
+        Raises CircuitOpen without calling upstream while the breaker is open.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpen("AI service temporarily unavailable")
+        self._count("calls")
+        timeout = self.timeout(op)
+        hedge_after = self.hedge_delay(op)
+        began = time.perf_counter()
+        primary = self._executor.submit(start, timeout)
+        pending = {primary}
+        if hedge_after is not None:
+            done, _ = wait(pending, hedge_after)
+            # Never hedge into a failing upstream: it only doubles the load
+            if not done and self.breaker.healthy() and (can_hedge is None or can_hedge()):
+                self._count("hedges")
+                pending.add(self._executor.submit(start, timeout))
+
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+                self.histogram(op).record(time.perf_counter() - began)
+                self.breaker.record(failed=False)
+                if future is not primary:
+                    self._count("hedge_wins")
+                if close is not None:
+                    for loser in (done | pending) - {future}:
+                        loser.add_done_callback(lambda f: f.exception() is None and close(f.result()))
+                return future.result()
+        self._count("failures")
+        self.breaker.record(failed=True)
+        raise error
+
+    def stats(self):
+        """Breaker state, call counters and per-operation latency histograms"""
+        with self._lock:
+            counters = dict(self.counters)
+            ops = list(self.histograms.items())
+        return {
+            "breaker": self.breaker.snapshot(),
+            "counters": counters,
+            "latency": {op: hist.snapshot() for op, hist in ops},
+            "timeouts": {op: round(self.timeout(op), 2) for op, _ in ops},
+        }
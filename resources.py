@@ -0,0 +1,69 @@
+"""Process-wide resources for the Streamlit app.
+
+Everything here is built once per process with st.cache_resource and shared
+by every session. Keeping the decorated functions out of app.py means they
+are not re-decorated on every script rerun. The roadmap, follow-up, FAQ and
+lead logic itself lives in core.Core, which the HTTP API (api.py) shares; the
+Groq SDK is only imported when the first LLM call needs it (stage 0 never
+does).
+"""
+import importlib
+import os
+import threading
+
+import streamlit as st
+from dotenv import load_dotenv
+
+from core import Core
+
+# Load environment variables
+load_dotenv()
+
+
+def get_api_key():
+    """Resolve the Groq API key"""
+    # Robust API Key Retrieval
+    # Priority: 1. Environment Variable (os.getenv) 2. Streamlit Cloud Secrets (st.secrets)
+    # Probing st.secrets without a secrets.toml renders an error, so only do it as a fallback.
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        try:
+            api_key = st.secrets.get("GROQ_API_KEY")
+        except FileNotFoundError:
+            api_key = None
+
+    if not api_key:
+        raise ValueError("GROQ_API_KEY not found in secrets or environment.")
+    return api_key
+
+
+def get_admin_token():
+    """Operator token for ?view=admin (env, then st.secrets); None disables the view"""
+    token = os.getenv("ADMIN_TOKEN")
+    if not token:
+        try:
+            token = st.secrets.get("ADMIN_TOKEN")
+        except FileNotFoundError:
+            token = None
+    return token or None
+
+
+@st.cache_resource(show_spinner=False)
+def core():
+    """Caches, FAQ index, lead store and pooled Groq client, shared by every session"""
+    return Core(api_key=get_api_key)
+
+
+@st.cache_resource(show_spinner=False)
+def preload_llm():
+    """Import the Groq SDK on a background thread while the user fills in stage 0"""
+    thread = threading.Thread(target=importlib.import_module, args=("llm",), daemon=True)
+    thread.start()
+    return thread
+
+
+@st.cache_resource(show_spinner=False)
+def page_css():
+    """The page stylesheet, read from disk once"""
+    with open("style.css", "r", encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
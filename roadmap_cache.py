@@ -0,0 +1,193 @@
+"""Disk-backed roadmap cache shared by every Streamlit worker process.
+
+Roadmaps (JSON, see roadmap_format) are keyed on a normalized profile (role,
+challenge, goal, language, A/B version, a hash of the programs catalog and
+the stored format), never on the user's name or the submission timestamp.
+The user's name is swapped for a placeholder before storing and substituted
+back in on every hit, so the same profile under a different name costs zero
+LLM calls. A name that is also a word of the persona, brand or catalog text
+(e.g. "Asha") is never swapped out, since the placeholder would take over
+that text too; those roadmaps are simply not shared.
+
+Translations of a roadmap into another language (Core.localized_roadmap_chunks)
+are stored here too, keyed on the name-free source roadmap and the target
+language (localized_key).
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+import config
+
+NAME_PLACEHOLDER = "⟦NAME⟧"
+# Part of every key: bump it when the stored roadmap format changes
+ROADMAP_FORMAT = "json-1"
+
+
+def catalog_hash(programs=None):
+    """Stable short hash of the programs catalog"""
+    programs = config.PROGRAMS_DB if programs is None else programs
+    raw = json.dumps(programs, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def normalize_goal(goal):
+    """Lowercase, drop punctuation and collapse whitespace"""
+    goal = re.sub(r"[^\w\s]", " ", goal.lower())
+    return " ".join(goal.split())
+
+
+def profile_key(user_data, version, language):
+    """Cache key for a roadmap, independent of name and timestamp"""
+    parts = [
+        user_data["role"],
+        user_data["challenge"],
+        normalize_goal(user_data["goal"]),
+        language,
+        version,
+        catalog_hash(),
+        ROADMAP_FORMAT,
+    ]
+    raw = json.dumps(parts, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def localized_key(template, language):
+    """Cache key for a roadmap translated into `language`, from its JSON with the name swapped out (anonymize)"""
+    raw = json.dumps(["localized", template, language, ROADMAP_FORMAT], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _name_pattern(name):
+    return re.compile(r"(?<!\w)" + re.escape(name.strip()) + r"(?!\w)")
+
+
+def _strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            yield from _strings(key)
+            yield from _strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _strings(item)
+
+
+@lru_cache(maxsize=1)
+def _fixed_text():
+    return "\n".join(_strings(["Asha", "AI Leadership Architect", config.BUSINESS_INFO, config.PROGRAMS_DB]))
+
+
+def name_collides(name):
+    """Whether `name` is also a word of text every roadmap may contain: persona, brand or programs"""
+    name = name.strip()
+    if not name:
+        return False
+    return re.search(r"(?<!\w)" + re.escape(name) + r"(?!\w)", _fixed_text(), re.IGNORECASE) is not None
+
+
+def anonymize(text, name):
+    """`text` with every whole-word `name` replaced by NAME_PLACEHOLDER: (template, replacements).
+
+    A name that collides with fixed text (name_collides) is left in place
+    and reported as 0 replacements, so nothing keyed or stored on the
+    template is shared with other users.
+    """
+    if not name.strip() or name_collides(name):
+        return text, 0
+    return _name_pattern(name).subn(NAME_PLACEHOLDER, text)
+
+
+class RoadmapCache:
+    """SQLite (WAL) roadmap store with TTL expiry and LRU eviction"""
+
+    def __init__(self, path="roadmap_cache.db", ttl=86400, max_entries=5000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS roadmaps ("
+            " key TEXT PRIMARY KEY,"
+            " text TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL,"
+            " hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn().execute("CREATE INDEX IF NOT EXISTS roadmaps_accessed ON roadmaps (accessed)")
+
+    def _conn(self):
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, name=""):
+        """Return the cached roadmap personalised for `name`, or None"""
+        now = time.time()
+        row = self._conn().execute(
+            "SELECT text FROM roadmaps WHERE key = ? AND created > ?", (key, now - self.ttl)
+        ).fetchone()
+        if row is None:
+            return None
+        self._conn().execute(
+            "UPDATE roadmaps SET accessed = ?, hits = hits + 1 WHERE key = ?", (now, key)
+        )
+        return row[0].replace(NAME_PLACEHOLDER, name)
+
+    def contains(self, key):
+        """True if a fresh roadmap is stored under `key`"""
+        row = self._conn().execute(
+            "SELECT 1 FROM roadmaps WHERE key = ? AND created > ?", (key, time.time() - self.ttl)
+        ).fetchone()
+        return row is not None
+
+    def put(self, key, text, name=""):
+        """Store a roadmap generated for `name`.
+
+        Returns False (and stores nothing) when the name cannot be found in
+        the text, e.g. because the model transliterated it, or when it is
+        also persona or catalog text: caching that would leak one user's name
+        to the next, or put another user's name in place of "Asha".
+        """
+        template, count = anonymize(text, name)
+        if name.strip() and count == 0:
+            return False
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO roadmaps (key, text, created, accessed, hits) VALUES (?, ?, ?, ?, 0)",
+            (key, template, now, now),
+        )
+        self._evict(conn, now)
+        return True
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM roadmaps WHERE created <= ?", (now - self.ttl,))
+        conn.execute(
+            "DELETE FROM roadmaps WHERE key IN ("
+            " SELECT key FROM roadmaps ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def stats(self):
+        """Entry count and total hits, for the analytics sidebar"""
+        entries, hits = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM roadmaps"
+        ).fetchone()
+        return {"entries": entries, "hits": hits}
+
+    def clear(self):
+        self._conn().execute("DELETE FROM roadmaps")
@@ -0,0 +1,223 @@
+"""Structured roadmaps: JSON schema, streaming parser and markdown renderer.
+
+The LLM answers with one JSON object (see SCHEMA). RoadmapParser picks the
+top-level fields out of the stream as soon as each one is complete, and
+SectionRenderer turns them into markdown sections in page order, so the
+steps, outcomes and comparison table appear while the rest is still being
+generated. The same dict is what gets cached and saved with the lead; the
+local recommender builds one of the same shape when there is no LLM.
+"""
+import json
+
+import config
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "program": {"type": "string"},
+        "score": {"type": "integer", "minimum": 0, "maximum": 100},
+        "why": {"type": "string"},
+        "alternate": {"type": "string"},
+        "steps": {"type": "array", "items": {"type": "string"}, "minItems": 1},
+        "outcomes": {"type": "array", "items": {"type": "string"}, "minItems": 1},
+        "comparison": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"aspect": {"type": "string"}, "best": {"type": "string"},
+                               "alternate": {"type": "string"}},
+                "required": ["aspect", "best", "alternate"],
+            },
+        },
+        "cta": {"type": "string"},
+    },
+    "required": ["program", "score", "why", "alternate", "steps", "outcomes", "comparison", "cta"],
+}
+
+# Page order; "program" renders the header with the match score
+SECTIONS = ["program", "why", "alternate", "steps", "outcomes", "comparison", "cta"]
+
+# Chosen by the local recommender, never by the model
+FIXED = ("program", "score", "alternate")
+
+# Extra chat-completion parameters per config.ROADMAP_RESPONSE_FORMAT
+RESPONSE_FORMATS = {
+    None: {},
+    "json_object": {"response_format": {"type": "json_object"}},
+    "json_schema": {"response_format": {"type": "json_schema", "json_schema": {"name": "roadmap", "schema": SCHEMA}}},
+}
+
+
+def _text(value):
+    return isinstance(value, str) and bool(value.strip())
+
+
+def valid_field(field, value):
+    """True if `value` is usable for `field`"""
+    if field in ("program", "alternate", "why", "cta"):
+        return _text(value)
+    if field == "score":
+        return isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= 100
+    if field in ("steps", "outcomes"):
+        return isinstance(value, list) and bool(value) and all(_text(v) for v in value)
+    if field == "comparison":
+        return isinstance(value, list) and bool(value) and all(
+            isinstance(row, dict) and all(_text(row.get(k)) for k in ("aspect", "best", "alternate"))
+            for row in value)
+    return False
+
+
+class RoadmapParser:
+    """Incremental parser for one JSON object arriving in pieces.
+
+    feed() returns the (key, value) pairs of the top-level fields completed
+    by the new text. Anything before the opening brace (such as a markdown
+    fence) is skipped. Each character is scanned once.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.started = False
+        self.done = False
+        self.key = None
+        self.key_start = None
+        self.value_start = None
+
+    def feed(self, text):
+        self.buffer += text
+        fields = []
+        buf = self.buffer
+        for i in range(self.pos, len(buf)):
+            if self.done:
+                break
+            ch = buf[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    if self.key_start is not None:
+                        self.key = json.loads(buf[self.key_start:i + 1])
+                        self.key_start = None
+                continue
+            if not self.started:
+                if ch == "{":
+                    self.started = True
+                    self.depth = 1
+                continue
+            if ch == '"':
+                self.in_string = True
+                if self.depth == 1 and self.value_start is None:
+                    self.key_start = i
+            elif ch in "{[":
+                self.depth += 1
+            elif ch in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self._complete(buf, i, fields)
+                    self.done = True
+            elif self.depth == 1:
+                if ch == ":":
+                    self.value_start = i + 1
+                elif ch == ",":
+                    self._complete(buf, i, fields)
+        self.pos = len(buf)
+        return fields
+
+    def _complete(self, buf, end, fields):
+        if self.key is not None and self.value_start is not None:
+            try:
+                fields.append((self.key, json.loads(buf[self.value_start:end])))
+            except ValueError:
+                pass  # malformed value: the renderer fills the section in later
+        self.key = None
+        self.value_start = None
+
+
+def parse_roadmap(text):
+    """Every valid field of a complete JSON roadmap text (possibly truncated or fenced)"""
+    parser = RoadmapParser()
+    return {k: v for k, v in parser.feed(text) if valid_field(k, v)}
+
+
+def merge_roadmap(text, local):
+    """The model's roadmap text completed by `local` (build_roadmap), which also decides the FIXED fields"""
+    parsed = parse_roadmap(text)
+    return {field: local[field] if field in FIXED else parsed.get(field, local[field]) for field in SCHEMA["required"]}
+
+
+def json_name(name):
+    """A name as it appears inside a JSON string, for the roadmap cache's name placeholder"""
+    return json.dumps(name, ensure_ascii=False)[1:-1]
+
+
+def render_section(section, roadmap):
+    """Markdown for one section of a roadmap"""
+    if section == "program":
+        return f"### 🎯 Best Program Match: {roadmap['program']} ({roadmap['score']}% match)\n\n"
+    if section == "why":
+        return f"**Why This Program**: {roadmap['why']}\n\n"
+    if section == "alternate":
+        alt = config.PROGRAMS_DB.get(roadmap["alternate"])
+        detail = f" ({alt['duration']}, {alt['focus']})" if alt else ""
+        return f"**Alternate Option**: {roadmap['alternate']}{detail}\n\n"
+    if section == "steps":
+        steps = "\n".join(f"{i}.  {step}" for i, step in enumerate(roadmap["steps"], 1))
+        return f"**{len(roadmap['steps'])}-Step Transformation Plan**\n{steps}\n\n"
+    if section == "outcomes":
+        outcomes = "\n".join(f"*   {o}" for o in roadmap["outcomes"])
+        return f"**Expected Outcomes**\n{outcomes}\n\n"
+    if section == "comparison":
+        rows = "\n".join(f"| {r['aspect']} | {r['best']} | {r['alternate']} |" for r in roadmap["comparison"])
+        return f"| | {roadmap['program']} | {roadmap['alternate']} |\n|---|---|---|\n{rows}\n\n"
+    if section == "cta":
+        return f"{roadmap['cta']}\n"
+    raise ValueError(f"unknown section: {section}")
+
+
+def render_markdown(roadmap):
+    """The whole roadmap as markdown"""
+    return "\n" + "".join(render_section(section, roadmap) for section in SECTIONS)
+
+
+class SectionRenderer:
+    """Renders sections in page order as their fields arrive.
+
+    `fixed` fields (the locally chosen program, score and alternate) win over
+    whatever the model writes for them.
+    """
+
+    def __init__(self, fixed):
+        self.fixed = set(fixed)
+        self.roadmap = dict(fixed)
+        self.rendered = 0
+
+    def add(self, field, value):
+        """Accept a parsed field; returns markdown for any sections now ready"""
+        if field not in self.fixed and field in SCHEMA["properties"] and valid_field(field, value):
+            self.roadmap[field] = value
+        return self._flush()
+
+    def finish(self, fallback):
+        """Fill missing fields from `fallback`; returns markdown for the remaining sections"""
+        for field in SCHEMA["required"]:
+            self.roadmap.setdefault(field, fallback[field])
+        return self._flush()
+
+    def _flush(self):
+        out = []
+        while self.rendered < len(SECTIONS):
+            section = SECTIONS[self.rendered]
+            needs = ("program", "score") if section == "program" else \
+                ("program", "alternate", "comparison") if section == "comparison" else (section,)
+            if not all(field in self.roadmap for field in needs):
+                break
+            out.append(render_section(section, self.roadmap))
+            self.rendered += 1
+        return "".join(out)
@@ -0,0 +1,176 @@
+"""Coalesce concurrent identical work so only one caller does it.
+
+When a campaign link goes out, many users submit the same profile within
+seconds and all miss the roadmap cache together. The first caller for a key
+becomes the leader and does the LLM call; everyone else waits for it and then
+reads the result from the shared cache.
+
+Within a process, followers wait on an Event. Across worker processes the
+leader holds a lease row in SQLite (the roadmap cache database); the first
+waiting thread in each other process polls that row on behalf of its
+process. A leader that dies is detected when its lease expires.
+"""
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class FlightError(Exception):
+    """The leader failed; followers get its error instead of retrying upstream"""
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.shared = False
+        self.error = None
+
+
+class Flight:
+    """One caller's membership in the flight for a key"""
+
+    def __init__(self, group, key, call, leader, remote_owner=None):
+        self.group = group
+        self.key = key
+        self.leader = leader
+        self._call = call
+        self._remote_owner = remote_owner
+
+    def finish(self, shared, error=None):
+        """Leader only: publish the outcome. `shared` means followers can read it from the cache."""
+        self.group._finish(self.key, self._call, shared, error)
+
+    def wait(self):
+        """Follower only: block until the leader finishes.
+
+        Returns True when the result is ready to read, False on timeout or
+        when the leader had nothing to share (the caller should do the work
+        itself). Raises FlightError if the leader failed.
+        """
+        return self.group._wait(self.key, self._call, self._remote_owner)
+
+
+class SingleFlight:
+    """Per-key leader election across threads and, with a path, across processes"""
+
+    def __init__(self, path=None, timeout=60.0, lease=120.0, poll_interval=0.05):
+        self.path = path
+        self.timeout = timeout
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._local = threading.local()
+        self.counters = {"leaders": 0, "followers": 0, "saved": 0, "errors_shared": 0, "timeouts": 0}
+        if path:
+            self._conn().execute(
+                "CREATE TABLE IF NOT EXISTS flights ("
+                " key TEXT PRIMARY KEY,"
+                " owner TEXT NOT NULL,"
+                " expires REAL NOT NULL,"
+                " done INTEGER NOT NULL DEFAULT 0,"
+                " shared INTEGER NOT NULL DEFAULT 0,"
+                " error TEXT)"
+            )
+
+    def _conn(self):
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def begin(self, key):
+        """Join the flight for `key`; the returned Flight says whether to lead"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.counters["followers"] += 1
+                return Flight(self, key, call, leader=False)
+            call = self._calls[key] = _Call()
+        remote_owner = self._claim(key) if self.path else None
+        if remote_owner is not None:
+            self._count("followers")
+            return Flight(self, key, call, leader=False, remote_owner=remote_owner)
+        self._count("leaders")
+        return Flight(self, key, call, leader=True)
+
+    def _claim(self, key):
+        """Take the lease for `key`; returns the current owner if another process holds it"""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT owner, expires, done FROM flights WHERE key = ?", (key,)).fetchone()
+            if row is not None and not row[2] and row[1] > now:
+                return row[0]
+            conn.execute("DELETE FROM flights WHERE expires <= ?", (now,))
+            conn.execute(
+                "INSERT OR REPLACE INTO flights (key, owner, expires) VALUES (?, ?, ?)",
+                (key, self.owner, now + self.lease),
+            )
+            return None
+        finally:
+            conn.execute("COMMIT")
+
+    def _finish(self, key, call, shared, error):
+        if self.path:
+            # Keep the row briefly so other processes' pollers see the outcome
+            self._conn().execute(
+                "UPDATE flights SET done = 1, shared = ?, error = ?, expires = ? WHERE key = ? AND owner = ?",
+                (int(shared), None if error is None else str(error), time.time() + self.timeout, key, self.owner),
+            )
+        self._settle(key, call, shared, error)
+
+    def _settle(self, key, call, shared, error):
+        call.shared = shared
+        call.error = None if error is None else str(error)
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.event.set()
+
+    def _wait(self, key, call, remote_owner):
+        if remote_owner is not None:
+            shared, error = self._poll(key, remote_owner)
+            self._settle(key, call, shared, error)
+        elif not call.event.wait(self.timeout):
+            self._count("timeouts")
+            return False
+        if call.error is not None:
+            self._count("errors_shared")
+            raise FlightError(call.error)
+        if call.shared:
+            self._count("saved")
+        return call.shared
+
+    def _poll(self, key, owner):
+        """Wait for another process's leader; returns (shared, error)"""
+        deadline = time.monotonic() + self.timeout
+        interval = self.poll_interval
+        while time.monotonic() < deadline:
+            row = self._conn().execute(
+                "SELECT owner, expires, done, shared, error FROM flights WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[0] != owner or (not row[2] and row[1] <= time.time()):
+                return False, None  # leader gone without a result
+            if row[2]:
+                return bool(row[3]), row[4]
+            time.sleep(interval)
+            interval = min(interval * 2, 0.5)
+        self._count("timeouts")
+        return False, None
+
+    def stats(self):
+        """Leader/follower counts and upstream calls saved"""
+        with self._lock:
+            return dict(self.counters, in_flight=len(self._calls))
@@ -0,0 +1,194 @@
+"""Speculative roadmap generation while the user is still on the form.
+
+Once stage 0 has a name and goal, the app calls Speculator.speculate() on
+every rerun. A background thread then generates the roadmap for that profile
+in the session's current version and language, using only spare LLM quota
+(Core.roadmap_chunks(speculative=True)). When the user submits, claim()
+hands back the speculation if the profile is unchanged, and its sections are
+replayed and then streamed live. Otherwise the speculation is cancelled.
+
+A speculative LLM call that is never claimed is wasted. Those are capped at
+`max_wasted_per_hour`; past that, speculation pauses until older waste ages
+out. stats() reports hits, waste and the latency users did not have to wait.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from roadmap_cache import profile_key
+
+
+class Speculation:
+    """One background roadmap generation; its sections can be streamed to the user who claims it"""
+
+    def __init__(self, key, clock):
+        self.key = key
+        self.clock = clock
+        self.started = clock()
+        self.finished = None
+        self.claimed_at = None
+        self.sections = []
+        self.timings = {}
+        self.cancelled = threading.Event()
+        self._cond = threading.Condition()
+
+    def add(self, section):
+        with self._cond:
+            self.sections.append(section)
+            self._cond.notify_all()
+
+    def finish(self):
+        with self._cond:
+            self.finished = self.clock()
+            self._cond.notify_all()
+
+    @property
+    def done(self):
+        return self.finished is not None
+
+    @property
+    def used_llm(self):
+        """True unless the roadmap came from the cache or another caller's call, or no call was made"""
+        return not (self.timings.get("cached") or self.timings.get("coalesced")
+                    or self.timings.get("skipped"))
+
+    def stream(self, fallback, timings):
+        """Sections produced so far, then the rest as they arrive.
+
+        If the speculation ends without producing anything, yields from
+        `fallback()` instead. `timings` receives the caller's ttft/total,
+        measured from the claim.
+        """
+        i = 0
+        while True:
+            with self._cond:
+                while i == len(self.sections) and not self.done:
+                    self._cond.wait()
+                pending = self.sections[i:]
+                finished = self.done
+            for section in pending:
+                if i == 0:
+                    timings["ttft"] = self.clock() - self.claimed_at
+                i += 1
+                yield section
+            if finished and i == len(self.sections):
+                break
+        if i == 0:
+            yield from fallback()
+            return
+        timings.update({k: v for k, v in self.timings.items() if k not in ("ttft", "total")})
+        timings["speculative"] = True
+        timings["total"] = self.clock() - self.claimed_at
+
+
+class Speculator:
+    """Per-process background roadmap generations, one per session"""
+
+    def __init__(self, core, enabled=True, max_inflight=4, max_wasted_per_hour=60, claim_ttl=600.0,
+                 clock=time.monotonic):
+        self.core = core
+        self.enabled = enabled
+        self.max_inflight = max_inflight
+        self.max_wasted_per_hour = max_wasted_per_hour
+        self.claim_ttl = claim_ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._wasted = deque()  # times of wasted LLM calls in the last hour
+        self._executor = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="speculate")
+        self.counters = {"started": 0, "hits": 0, "cancelled": 0, "expired": 0, "wasted": 0, "capped": 0,
+                         "saved_seconds": 0.0}
+
+    def _key(self, user_data, version, language):
+        # The name is rendered into the sections, so it is part of what must match
+        return profile_key(user_data, version, language), user_data["name"]
+
+    def _discard(self, spec, reason):
+        """Cancel a speculation nobody will claim; counts its LLM call as wasted (lock held)"""
+        spec.cancelled.set()
+        self.counters[reason] += 1
+        if spec.used_llm:
+            self.counters["wasted"] += 1
+            self._wasted.append(self.clock())
+
+    def _sweep(self, now):
+        for session_id, spec in list(self._sessions.items()):
+            if now - spec.started > self.claim_ttl:
+                del self._sessions[session_id]
+                self._discard(spec, "expired")
+        while self._wasted and now - self._wasted[0] > 3600:
+            self._wasted.popleft()
+
+    def speculate(self, session_id, user_data, version, language):
+        """Start generating this session's roadmap in the background, unless it already is.
+
+        Returns True if a speculation for exactly this profile is running or done.
+        """
+        if not self.enabled:
+            return False
+        key = self._key(user_data, version, language)
+        with self._lock:
+            now = self.clock()
+            self._sweep(now)
+            current = self._sessions.get(session_id)
+            if current is not None and current.key == key:
+                return True
+            if current is not None:
+                # The user changed the profile: the old roadmap will never be shown
+                del self._sessions[session_id]
+                self._discard(current, "cancelled")
+            inflight = sum(1 for spec in self._sessions.values() if not spec.done)
+            # Every running speculation could still end up wasted
+            if inflight >= self.max_inflight or len(self._wasted) + inflight >= self.max_wasted_per_hour:
+                self.counters["capped"] += 1
+                return False
+            spec = Speculation(key, self.clock)
+            self._sessions[session_id] = spec
+            self.counters["started"] += 1
+        self._executor.submit(self._run, spec, dict(user_data), version, language)
+        return True
+
+    def _run(self, spec, user_data, version, language):
+        chunks = self.core.roadmap_chunks(user_data, version, language, timings=spec.timings, speculative=True)
+        try:
+            for section in chunks:
+                if spec.cancelled.is_set():
+                    break
+                spec.add(section)
+        except Exception:
+            spec.timings["failed"] = True
+        finally:
+            chunks.close()  # a cancelled generation closes its LLM stream here
+            spec.finish()
+
+    def claim(self, session_id, user_data, version, language):
+        """The session's speculation if it matches the submitted profile, else None (and it is cancelled)"""
+        with self._lock:
+            spec = self._sessions.pop(session_id, None)
+            if spec is None:
+                return None
+            now = self.clock()
+            if spec.key != self._key(user_data, version, language) or (spec.done and not spec.sections):
+                self._discard(spec, "cancelled")
+                return None
+            spec.claimed_at = now
+            self.counters["hits"] += 1
+            # Generation time already behind us when the user clicked
+            end = spec.finished if spec.done else now
+            self.counters["saved_seconds"] += end - spec.started
+            return spec
+
+    def stats(self):
+        """Speculations started, claimed (hits), cancelled or expired, wasted LLM calls and seconds saved"""
+        with self._lock:
+            self._sweep(self.clock())
+            counters = dict(self.counters)
+            resolved = counters["hits"] + counters["cancelled"] + counters["expired"]
+            return dict(counters,
+                        saved_seconds=round(counters["saved_seconds"], 3),
+                        saved_per_hit=round(counters["saved_seconds"] / counters["hits"], 3)
+                        if counters["hits"] else 0.0,
+                        hit_rate=round(counters["hits"] / resolved, 3) if resolved else 0.0,
+                        inflight=sum(1 for spec in self._sessions.values() if not spec.done),
+                        wasted_last_hour=len(self._wasted))
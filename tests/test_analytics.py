@@ -0,0 +1,59 @@
+import threading
+
+from analytics import Analytics
+
+NOON = 1_700_000_000.0  # a fixed "today"
+
+
+def make(tmp_path, **kwargs):
+    kwargs.setdefault("flush_interval", 3600)  # flushed by hand
+    return Analytics(str(tmp_path / "analytics.db"), refresh=0, clock=lambda: NOON, **kwargs)
+
+
+def test_events_from_many_threads_are_all_counted(tmp_path):
+    analytics = make(tmp_path)
+    start = threading.Barrier(8)
+
+    def visitor(i):
+        version, language = ("A", "English") if i % 2 else ("B", "Hindi")
+        start.wait()
+        for _ in range(1000):
+            analytics.record("visit", version, language)
+        analytics.record("roadmap", version, language, n=10)
+
+    threads = [threading.Thread(target=visitor, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    analytics.record("enroll", "A", "English")  # the test thread buffers too
+    for thread in threads:
+        thread.join()
+    analytics.flush()
+
+    rollup = analytics.rollup()
+    for period in ("today", "all_time"):
+        assert rollup[period]["total"] == {"visit": 8000, "roadmap": 80, "enroll": 1, "whatsapp": 0}
+        assert rollup[period]["by_version"]["B"]["visit"] == 4000
+        assert rollup[period]["by_language"]["English"] == {"visit": 4000, "roadmap": 40, "enroll": 1, "whatsapp": 0}
+    assert analytics.stats()["thread_buffers"] == 1  # finished threads' buffers are dropped
+    analytics.close()
+
+
+def test_flush_only_writes_growth(tmp_path):
+    analytics = make(tmp_path)
+    analytics.record("visit", "A", "English", n=3)
+    analytics.flush()
+    analytics.flush()  # nothing new
+    analytics.record("visit", "A", "English")
+    analytics.flush()
+    assert analytics.rollup()["today"]["total"]["visit"] == 4
+    assert analytics.stats()["flushes"] == 2
+    analytics.close()
+
+
+def test_counts_are_shared_through_the_database(tmp_path):
+    writer = make(tmp_path)
+    writer.record("whatsapp", "B", "Tamil", n=2)
+    writer.close()  # writes what is still buffered
+    reader = make(tmp_path)
+    assert reader.rollup()["all_time"]["by_language"]["Tamil"]["whatsapp"] == 2
+    reader.close()
@@ -0,0 +1,67 @@
+import sqlite3
+
+from answer_cache import AnswerCache
+
+PROGRAM = "Leadership Accelerator"
+QUESTION = "How many hours a week does the program take?"
+ANSWER = "Priya, plan on about five hours a week to get promoted to manager."
+
+
+def test_hit_is_personalised_with_the_askers_name_and_goal():
+    cache = AnswerCache()
+    assert cache.put(QUESTION, PROGRAM, "English", ANSWER, "Priya", "get promoted to manager")
+    answer = cache.get("How many hours per week does the program take?", PROGRAM, "English",
+                       "Meera", "lead a bigger team")
+    assert answer == "Meera, plan on about five hours a week to lead a bigger team."
+
+
+def test_other_program_or_language_misses():
+    cache = AnswerCache()
+    cache.put(QUESTION, PROGRAM, "English", ANSWER, "Priya", "get promoted to manager")
+    assert cache.get(QUESTION, "Iron Lady Essentials", "English", "Meera", "get promoted to manager") is None
+    assert cache.get(QUESTION, PROGRAM, "Hindi", "Meera", "get promoted to manager") is None
+
+
+def test_near_duplicate_question_replaces_the_cached_one(tmp_path):
+    path = str(tmp_path / "answers.db")
+    cache = AnswerCache(path=path)
+    cache.put(QUESTION, PROGRAM, "English", ANSWER, "Priya", "get promoted to manager")
+    cache.put("How many hours a week does this program take?", PROGRAM, "English",
+              "Meera, about six hours a week.", "Meera", "lead a team")
+    assert cache.stats()["entries"] == 1
+    assert cache.get(QUESTION, PROGRAM, "English", "Divya", "") == "Divya, about six hours a week."
+    assert AnswerCache(path=path).stats()["entries"] == 1
+
+
+def test_answer_without_the_name_is_not_cached():
+    cache = AnswerCache()
+    answer = "Pri, plan on about five hours a week."
+    assert not cache.put(QUESTION, PROGRAM, "English", answer, "Priya", "get promoted to manager")
+    assert cache.get(QUESTION, PROGRAM, "English", "Priya", "get promoted to manager") is None
+
+
+def test_persisted_answers_reload(tmp_path):
+    path = str(tmp_path / "answers.db")
+    AnswerCache(path=path).put(QUESTION, PROGRAM, "English", ANSWER, "Priya", "get promoted to manager")
+    answer = AnswerCache(path=path).get(QUESTION, PROGRAM, "English", "Meera", "speak up in meetings")
+    assert answer == "Meera, plan on about five hours a week to speak up in meetings."
+
+
+def test_answers_from_an_older_schema_are_dropped(tmp_path):
+    path = str(tmp_path / "answers.db")
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("CREATE TABLE answers (program TEXT, language TEXT, goal TEXT, question TEXT, answer TEXT,"
+                     " created REAL, PRIMARY KEY (program, language, goal, question))")
+        conn.execute("INSERT INTO answers VALUES (?, ?, ?, ?, ?, 9e9)",
+                     (PROGRAM, "English", "get promoted to manager", QUESTION, ANSWER))
+    conn.close()
+    cache = AnswerCache(path=path)
+    assert cache.stats()["entries"] == 0
+
+
+def test_name_that_is_also_the_persona_is_not_cached():
+    cache = AnswerCache()
+    answer = "Asha here, Asha! Plan on about five hours a week."
+    assert not cache.put(QUESTION, PROGRAM, "English", answer, "Asha", "get promoted to manager")
+    assert cache.get(QUESTION, PROGRAM, "English", "Meera", "get promoted to manager") is None
@@ -0,0 +1,97 @@
+import asyncio
+import itertools
+import json
+import threading
+import time
+
+import pytest
+
+from api import API, STREAM_ERROR
+
+PROFILE = {"name": "Priya", "role": "Manager", "challenge": "Low Confidence", "goal": "Lead a team",
+           "stream": True}
+
+
+class FakeCore:
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.closed = threading.Event()
+
+    def stats(self):
+        return {"ok": True}
+
+    def roadmap_chunks(self, user_data, version, language, rec):
+        try:
+            for i in itertools.count():
+                if i == self.fail_after:
+                    raise RuntimeError("upstream went away")
+                yield f"section {i}\n"
+                time.sleep(0.01)
+        finally:
+            self.closed.set()
+
+
+def scope(method, path, headers=()):
+    return {"type": "http", "method": method, "path": path, "query_string": b"", "headers": list(headers)}
+
+
+def request(app, method, path, headers=(), body=None):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": json.dumps(body).encode() if body else b"", "more_body": False}
+
+    async def record(message):
+        sent.append(message)
+
+    asyncio.run(app(scope(method, path, headers), receive, record))
+    return sent
+
+
+def call(app, method, path, headers=()):
+    return request(app, method, path, headers)[0]["status"]
+
+
+def test_operator_endpoints_are_off_without_a_token(monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    app = API(core=FakeCore(), threads=1)
+    assert call(app, "GET", "/stats") == 404
+    assert call(app, "GET", "/metrics", [(b"authorization", b"Bearer ")]) == 404
+
+
+def test_operator_endpoints_need_the_token():
+    app = API(core=FakeCore(), threads=1, admin_token="s3cret")
+    assert call(app, "GET", "/stats") == 401
+    assert call(app, "GET", "/stats", [(b"authorization", b"Bearer wrong")]) == 401
+    assert call(app, "GET", "/stats", [(b"authorization", b"Bearer s3cret")]) == 200
+    assert call(app, "GET", "/metrics", [(b"authorization", b"bearer s3cret")]) == 200
+    assert call(app, "GET", "/health") == 200
+
+
+def test_streamed_roadmap_ends_with_a_marker_when_generation_fails():
+    core = FakeCore(fail_after=1)
+    sent = request(API(core=core, threads=2), "POST", "/roadmap", body=PROFILE)
+    assert [m["type"] for m in sent].count("http.response.start") == 1
+    assert sent[0]["status"] == 200
+    assert sent[1]["body"] == b"section 0\n"
+    assert sent[-1]["body"] == STREAM_ERROR.encode("utf-8") and not sent[-1].get("more_body")
+
+
+def test_streamed_roadmap_stops_generating_when_the_client_disconnects():
+    core = FakeCore()
+    app = API(core=core, threads=2)
+
+    async def receive():
+        return {"type": "http.request", "body": json.dumps(PROFILE).encode(), "more_body": False}
+
+    async def send(message):
+        if message.get("body"):
+            raise OSError("client disconnected")
+
+    async def run():
+        with pytest.raises(OSError):
+            await app(scope("POST", "/roadmap"), receive, send)
+        # checked while the loop still runs: asyncio.run would close the stream itself on exit
+        return await asyncio.get_running_loop().run_in_executor(None, core.closed.wait, 2)
+
+    assert asyncio.run(run())
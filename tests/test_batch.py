@@ -0,0 +1,40 @@
+import asyncio
+import re
+from types import SimpleNamespace
+
+from batch import run_batch
+from roadmap_cache import RoadmapCache, profile_key
+
+
+class FakeClient:
+    """Answers every completion with a short roadmap addressed to the user in the prompt"""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, messages, **kwargs):
+        self.calls += 1
+        name = re.search(r"- Name: (.*)", messages[0]["content"]).group(1).strip()
+        content = f"{name}, the Leadership Accelerator is your best match."
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+def profile(name, goal):
+    return {"name": name, "role": "Manager", "challenge": "Leadership Skills", "goal": goal}
+
+
+def test_only_cached_roadmaps_are_journaled(tmp_path):
+    cache = RoadmapCache(path=str(tmp_path / "roadmaps.db"))
+    journal = tmp_path / "profiles.done"
+    priya, asha = profile("Priya", "lead a team"), profile("Asha", "get promoted")
+    stats = asyncio.run(run_batch([priya, asha], cache, FakeClient(), concurrency=2, rpm=6000,
+                                  journal=str(journal)))
+    assert (stats.done, stats.uncached, stats.failed) == (1, 1, 0)
+    assert journal.read_text(encoding="utf-8").split() == [profile_key(priya, "A", "English")]
+    assert not cache.contains(profile_key(asha, "A", "English"))
+
+    # The refused profile is tried again on the next run
+    client = FakeClient()
+    asyncio.run(run_batch([priya, asha], cache, client, concurrency=2, rpm=6000, journal=str(journal)))
+    assert client.calls == 1
@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+from cassette import Recorder, Replayer, load_entries
+
+INPUTS = {"kind": "followup", "question": "Can Priya join while working full-time?", "name": "Priya",
+          "goal": "lead a team at Infosys", "program": "Leadership Accelerator", "language": "English"}
+PROMPT = "User: Priya\nGoal: lead a team at Infosys\nQuestion: Can Priya join while working full-time?"
+ANSWER = "Yes Priya! Evenings work, and they fit your goal to lead a team at Infosys."
+
+
+def completion(params):
+    usage = SimpleNamespace(prompt_tokens=20, completion_tokens=15, total_tokens=35)
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=ANSWER))], usage=usage)
+
+
+def record(path, **kwargs):
+    recorder = Recorder(str(path), **kwargs)
+    recorder.create(completion, INPUTS, {"messages": [{"role": "user", "content": PROMPT}], "max_tokens": 100})
+    recorder.writer.close()
+
+
+def replay(path, inputs):
+    response = Replayer(str(path), speed=0).create(None, inputs, {"messages": [{"role": "user", "content": PROMPT}]})
+    return response.choices[0].message.content
+
+
+def test_record_redacts_personal_inputs(tmp_path):
+    path = tmp_path / "llm_calls.jsonl"
+    record(path)
+    text = path.read_text(encoding="utf-8")
+    for value in ("Priya", "Infosys", "full-time"):
+        assert value not in text
+    entry = load_entries(str(path))[0]
+    assert entry["inputs"]["name"] == "⟦NAME⟧" and entry["inputs"]["program"] == "Leadership Accelerator"
+    assert entry["response"] == "Yes ⟦NAME⟧! Evenings work, and they fit your goal to ⟦GOAL⟧."
+
+
+def test_redacted_call_replays_for_the_same_inputs(tmp_path):
+    path = tmp_path / "llm_calls.jsonl"
+    record(path)
+    assert replay(path, INPUTS) == ANSWER
+    assert replay(path, dict(load_entries(str(path))[0]["inputs"]))  # rerunning the log itself also works
+
+
+def test_record_without_redaction_keeps_inputs(tmp_path):
+    path = tmp_path / "llm_calls.jsonl"
+    record(path, redact=False)
+    entry = load_entries(str(path))[0]
+    assert entry["inputs"] == INPUTS and entry["response"] == ANSWER
+    assert replay(path, INPUTS) == ANSWER
@@ -0,0 +1,55 @@
+import os
+import re
+
+import catalog
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_every_copy_key_used_by_the_app_exists():
+    with open(os.path.join(ROOT, "app.py"), encoding="utf-8") as f:
+        keys = set(re.findall(r"copy\(['\"](\w+)['\"][,)]", f.read()))
+    assert keys and keys <= set(catalog.COPY)
+
+
+def test_copy_is_translated_from_the_catalog_and_english_otherwise(tmp_path):
+    path = str(tmp_path / "catalog.json")
+    data = catalog.read(path)
+    data["languages"]["हिंदी"] = {catalog.COPY["ask_title"]: "💬 आशा से कुछ भी पूछें"}
+    catalog.write(path, data)
+    hindi = catalog.get("हिंदी", path)
+    assert hindi.copy("ask_title") == "💬 आशा से कुछ भी पूछें"
+    assert hindi.copy("share_title") == catalog.COPY["share_title"]
+
+
+def test_copy_fills_fields_and_falls_back_when_a_translation_breaks_them(tmp_path):
+    path = str(tmp_path / "catalog.json")
+    data = catalog.read(path)
+    data["languages"]["हिंदी"] = {catalog.COPY["roadmap_title"]: "🎉 {name} का रोडमैप",
+                                 catalog.COPY["progress_complete"]: "{प्रतिशत}% पूरा"}
+    catalog.write(path, data)
+    hindi = catalog.get("हिंदी", path)
+    assert hindi.copy("roadmap_title", name="Asha") == "🎉 Asha का रोडमैप"
+    assert hindi.copy("progress_complete", percent=60) == catalog.COPY["progress_complete"].format(percent=60)
+
+
+def test_app_takes_all_page_text_from_the_catalog():
+    assert catalog.literal_copy(os.path.join(ROOT, "app.py")) == []
+
+
+def test_check_flags_literal_page_text_outside_the_sidebar(tmp_path):
+    page = tmp_path / "page.py"
+    page.write_text(
+        'import streamlit as st\n'
+        'st.markdown("### Welcome back")\n'
+        'st.text_input(copy("name_label"), placeholder="Your name")\n'
+        'st.markdown(f"<b>{name}</b> 📧 hello@iamironlady.com")\n'
+        'st.error("🔑 Please set GROQ_API_KEY in your .env file")\n'
+        'with st.sidebar:\n'
+        '    st.metric("Leads", 3)\n', encoding="utf-8")
+    assert catalog.literal_copy(str(page)) == [(2, "### Welcome back"), (3, "Your name")]
+
+
+def test_missing_catalog_reads_as_empty(tmp_path):
+    data = catalog.read(str(tmp_path / "missing.json"))
+    assert data["version"] == 0 and data["languages"] == {}
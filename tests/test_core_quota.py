@@ -0,0 +1,74 @@
+import os
+import threading
+
+import pytest
+
+from core import Core
+from ratelimit import SharedLimiter
+from resilience import CircuitOpen, Resilience
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Response:
+    def __init__(self, total_tokens):
+        self.usage = type("Usage", (), {"total_tokens": total_tokens})()
+
+
+@pytest.fixture
+def core(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # the caches and stores open their files in the working directory
+    core = Core(api_key=lambda: "test", faq_path=os.path.join(ROOT, "faqs.json"))
+    core.limiter = SharedLimiter(path=str(tmp_path / "ratelimit.db"), rpm=60, tpm=6000, headroom=1.0,
+                                 clock=lambda: 1000.0)  # no refill during a test
+    yield core
+    core.lead_store.close()
+
+
+def tokens_available(core):
+    return core.limiter.stats()["tokens_available"]
+
+
+def test_failed_call_gets_its_quota_back(core):
+    reserved = core.limiter.acquire(1000)
+
+    def fail(timeout):
+        raise RuntimeError("upstream error")
+
+    with pytest.raises(RuntimeError):
+        core._limited_call("test", fail, 1000, reserved, discard=None)
+    assert tokens_available(core) == 6000
+
+
+def test_open_breaker_gives_the_quota_back(core):
+    reserved = core.limiter.acquire(1000)
+    core.resilience.breaker.allow = lambda: False
+    with pytest.raises(CircuitOpen):
+        core._limited_call("test", lambda timeout: Response(10), 1000, reserved, discard=None)
+    assert tokens_available(core) == 6000
+
+
+def test_losing_hedge_is_settled(core):
+    core.resilience = Resilience(min_samples=1, hedge_percentile=50, hedge_min_delay=0.01, threads=2)
+    core.resilience.histogram("test").record(0.01)
+    release, settled = threading.Event(), threading.Event()
+    calls = []
+
+    def start(timeout):
+        calls.append(timeout)
+        if len(calls) == 1:
+            release.wait(5)  # the primary is slow, so a hedge is sent and wins
+            return Response(300)
+        return Response(200)
+
+    def discard(response):
+        core.limiter.settle(reserved, response.usage.total_tokens)
+        settled.set()
+
+    reserved = core.limiter.acquire(1000)
+    winner = core._limited_call("test", start, 1000, reserved, discard)
+    core.limiter.settle(reserved, winner.usage.total_tokens)
+    assert winner.usage.total_tokens == 200 and len(calls) == 2
+    release.set()
+    assert settled.wait(5)
+    assert tokens_available(core) == 6000 - 200 - 300
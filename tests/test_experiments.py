@@ -0,0 +1,89 @@
+import random
+import sqlite3
+
+import pytest
+
+from experiments import Experiments, assign
+
+TONE = {"roadmap_tone": {"A": 50, "B": 50}}
+
+
+@pytest.fixture
+def make(tmp_path):
+    opened = []
+
+    def make(**kwargs):
+        kwargs.setdefault("experiments", TONE)
+        experiments = Experiments(str(tmp_path / "experiments.db"), refresh=0, flush_interval=0.01, **kwargs)
+        opened.append(experiments)
+        return experiments
+
+    yield make
+    for experiments in opened:
+        experiments.close()
+
+
+def run(experiments, units, rates, seed=7):
+    """Expose `units` sessions and convert each with its variant's rate"""
+    rng = random.Random(seed)
+    for i in range(units):
+        unit = f"session-{i}"
+        variant = experiments.assign("roadmap_tone", unit)
+        experiments.expose("roadmap_tone", unit, variant)
+        if rng.random() < rates[variant]:
+            experiments.convert("roadmap_tone", unit, variant)
+    experiments.flush()
+    return experiments.results("roadmap_tone")
+
+
+def test_assignment_is_stable_and_follows_the_weights():
+    variants = {"A": 1, "B": 3}
+    picks = [assign("tone", f"session-{i}", variants) for i in range(20000)]
+    assert picks == [assign("tone", f"session-{i}", variants) for i in range(20000)]
+    assert 0.73 < picks.count("B") / len(picks) < 0.77
+    # Another experiment buckets the same sessions independently
+    other = [assign("cta", f"session-{i}", variants) for i in range(20000)]
+    assert picks != other
+    assert assign("tone", "session-1", {"A": 0, "B": 1}) == "B"
+
+
+def test_no_p_value_below_min_exposures(make):
+    results = run(make(min_exposures=100), 150, {"A": 0.0, "B": 1.0})
+    assert min(v["exposures"] for v in results["variants"].values()) < 100
+    assert results["variants"]["B"]["p_value"] == 1.0
+    assert results["winner"] is None
+
+
+def test_p_value_falls_for_a_real_difference(make):
+    results = run(make(), 4000, {"A": 0.10, "B": 0.20})
+    assert results["variants"]["B"]["p_value"] < 0.05
+    assert results["winner"] == "B"
+    assert results["variants"]["B"]["lift"] > 0.5
+
+
+def test_p_value_stays_high_under_a_a(make):
+    results = run(make(), 4000, {"A": 0.15, "B": 0.15})
+    assert results["variants"]["B"]["p_value"] > 0.05
+    assert results["winner"] is None
+    assert results["variants"]["A"]["p_value"] is None  # the control is not tested against itself
+
+
+def test_rebuild_reproduces_the_live_counts(make, tmp_path):
+    experiments = make()
+    live = run(experiments, 1000, {"A": 0.1, "B": 0.2})
+    with sqlite3.connect(str(tmp_path / "experiments.db")) as conn:
+        conn.execute("DELETE FROM projections")
+    assert experiments.rebuild() == live["events"]
+    assert experiments.results("roadmap_tone") == live
+    assert experiments.stats()["written"] == live["events"]
+
+
+def test_a_failed_batch_does_not_stop_the_writer(make, capsys):
+    experiments = make()
+    experiments._log("roadmap_tone", "session-1", "A", object())  # cannot be stored
+    experiments.flush()
+    assert experiments.stats()["dropped"] == 1
+    assert "experiment-writer: dropped 1 events" in capsys.readouterr().err
+    experiments.expose("roadmap_tone", "session-2", "A")
+    experiments.flush()
+    assert experiments.results("roadmap_tone")["variants"]["A"]["exposures"] == 1
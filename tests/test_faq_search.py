@@ -0,0 +1,44 @@
+from faq_search import FAQIndex, tokenize
+
+FAQS = [
+    {"question": "What is the fee for the Leadership Accelerator?", "answer": "The program fee is listed on the website."},
+    {"question": "Do I get a certificate?", "answer": "Yes, every graduate receives a certificate of completion."},
+    {"question": "Is the program online?", "answer": "All sessions are live online with recordings."},
+    {"question": "क्या कार्यक्रम हिंदी में है?", "answer": "हाँ, सत्र हिंदी और अंग्रेज़ी में होते हैं।"},
+]
+
+
+def questions(results):
+    return [faq["question"] for _, faq in results]
+
+
+def test_ranks_the_matching_question_first():
+    results = FAQIndex(FAQS).search("certificate after the program")
+    assert questions(results)[0] == "Do I get a certificate?"
+    scores = [score for score, _ in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_question_words_outrank_answer_words():
+    # "online" is in both a question and an answer; the question match wins
+    results = FAQIndex(FAQS).search("online")
+    assert questions(results)[0] == "Is the program online?"
+
+
+def test_misspelled_and_partial_terms_still_match():
+    index = FAQIndex(FAQS)
+    assert questions(index.search("certficate"))[0] == "Do I get a certificate?"
+    assert questions(index.search("certif"))[0] == "Do I get a certificate?"
+
+
+def test_devanagari_words_are_kept_whole():
+    assert tokenize("कार्यक्रम हिंदी") == ["कार्यक्रम", "हिंदी"]
+    results = FAQIndex(FAQS).search("हिंदी कार्यक्रम")
+    assert questions(results)[0] == "क्या कार्यक्रम हिंदी में है?"
+
+
+def test_empty_and_stopword_queries_return_nothing():
+    index = FAQIndex(FAQS)
+    assert index.search("") == []
+    assert index.search("what is the") == []
+    assert FAQIndex([]).search("fee") == []
@@ -0,0 +1,54 @@
+from faq_search import FAQIndex
+from followup import FollowupStats, answer_followup
+
+FAQS = [
+    {"question": "Do I get a certificate after the program?", "answer": "Yes, every graduate gets a certificate."},
+    {"question": "Are the sessions online?", "answer": "All sessions are live online."},
+]
+USER = {"name": "Priya", "role": "Manager", "challenge": "Leadership Skills", "goal": "lead a team"}
+
+
+class StubCompletion:
+    """Records the prompts it is called with and answers each with a fixed reply"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def __call__(self, prompt, max_tokens, temperature):
+        self.prompts.append(prompt)
+        return "From the LLM", 120
+
+
+def ask(question, complete, stats, **kwargs):
+    return answer_followup(question, USER, "Leadership Accelerator", "English", complete,
+                           FAQIndex(FAQS), stats, **kwargs)
+
+
+def test_close_faq_match_skips_the_llm():
+    complete, stats = StubCompletion(), FollowupStats()
+    result = ask("Do I get a certificate after the program?", complete, stats)
+    assert result["source"] == "faq"
+    assert result["answer"] == "Yes, every graduate gets a certificate."
+    assert complete.prompts == []
+    assert stats.snapshot()["faq_answers"] == 1
+
+
+def test_weak_match_falls_through_to_the_llm():
+    complete, stats = StubCompletion(), FollowupStats()
+    result = ask("How do I negotiate a raise with my manager?", complete, stats)
+    assert result["source"] == "llm"
+    assert result["answer"] == "From the LLM"
+    assert "negotiate a raise" in complete.prompts[0]
+    snapshot = stats.snapshot()
+    assert (snapshot["llm_answers"], snapshot["faq_answers"]) == (1, 0)
+
+
+def test_threshold_decides_between_faq_and_llm():
+    question = "certificate online?"
+    confidence, _ = FAQIndex(FAQS).best_match(question)
+    assert 0 < confidence < 1
+
+    complete = StubCompletion()
+    assert ask(question, complete, FollowupStats(), threshold=confidence)["source"] == "faq"
+    assert ask(question, complete, FollowupStats(), threshold=confidence + 0.01)["source"] == "llm"
+    assert len(complete.prompts) == 1
@@ -0,0 +1,121 @@
+import os
+
+import pytest
+
+from lead_columns import LeadColumns
+from lead_store import LeadStore
+
+HEADER = "Timestamp,Name,Role,Challenge,Goal,Program,Alternate,Match Score\n"
+
+
+def save(store, name, program, contact=None):
+    store.save({"name": name, "role": "Manager", "challenge": "Low Confidence", "goal": "Lead a team",
+                "program": program, "alternate": "10X Masterclass", "match_score": 80, "contact": contact})
+    store.flush()
+
+
+def test_store_ingest_only_appends_new_leads(tmp_path):
+    store = LeadStore(path=str(tmp_path / "leads.db"))
+    columns = LeadColumns(str(tmp_path / "columns"))
+    try:
+        save(store, "Priya", "Leadership Accelerator")
+        save(store, "Anita", "10X Masterclass")
+        assert columns.ingest_store(store.path) == 2
+        save(store, "Meera", "Leadership Accelerator")
+        assert columns.ingest_store(store.path) == 1
+        assert columns.ingest_store(store.path) == 0
+        assert columns.count("program") == {"Leadership Accelerator": 2, "10X Masterclass": 1}
+    finally:
+        store.close()
+
+
+def test_repeat_saves_are_ingested_from_the_history(tmp_path):
+    store = LeadStore(path=str(tmp_path / "leads.db"))
+    columns = LeadColumns(str(tmp_path / "columns"))
+    try:
+        save(store, "Priya", "Leadership Accelerator", "priya@example.com")
+        assert columns.ingest_store(store.path) == 1
+        # The same lead again: the leads row is updated, not added
+        save(store, "Priya", "Iron Lady Essentials", "priya@example.com")
+        assert columns.ingest_store(store.path) == 1
+        assert columns.count("program") == {"Leadership Accelerator": 1, "Iron Lady Essentials": 1}
+    finally:
+        store.close()
+
+
+def test_dedup_does_not_leave_deleted_rows_behind(tmp_path):
+    store = LeadStore(path=str(tmp_path / "leads.db"))
+    columns = LeadColumns(str(tmp_path / "columns"))
+    try:
+        save(store, "Priya", "Leadership Accelerator", "priya@example.com")
+        save(store, "Anita", "10X Masterclass")
+        columns.ingest_store(store.path)
+        store.dedup()
+        assert columns.ingest_store(store.path) == 0
+        assert columns.count() == 2
+    finally:
+        store.close()
+
+
+def test_a_copy_of_the_leads_table_must_be_rebuilt(tmp_path):
+    store = LeadStore(path=str(tmp_path / "leads.db"))
+    columns = LeadColumns(str(tmp_path / "columns"))
+    try:
+        save(store, "Priya", "Leadership Accelerator")
+        columns.append([("2026-01-01", "Manager", "Low Confidence", "10X Masterclass", None, 80)],
+                       f"db:{tmp_path / 'leads.db'}", 1)
+        with pytest.raises(ValueError, match="--rebuild"):
+            columns.ingest_store(store.path)
+        columns.reset()
+        assert columns.ingest_store(store.path) == 1
+        assert columns.count("program") == {"Leadership Accelerator": 1}
+    finally:
+        store.close()
+
+
+def test_csv_ingest_waits_for_a_complete_row(tmp_path):
+    path = tmp_path / "leads.csv"
+    path.write_text(HEADER + "2026-01-02 10:00:00,Priya,Manager,Low Confidence,Lead,10X Masterclass,,70\n"
+                    "2026-01-03 10:00:00,Anita,Founder,Work-Life", encoding="utf-8")
+    columns = LeadColumns(str(tmp_path / "columns"))
+    assert columns.ingest_csv(str(path)) == 1
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(" Balance,Grow,Leadership Accelerator,,90\n")
+    assert columns.ingest_csv(str(path)) == 1
+    assert columns.count("role") == {"Manager": 1, "Founder": 1}
+    assert columns.count(where={"challenge": "Work-Life Balance"}) == 1
+
+
+def test_a_recreated_database_must_be_rebuilt(tmp_path):
+    columns = LeadColumns(str(tmp_path / "columns"))
+    store = LeadStore(path=str(tmp_path / "leads.db"))
+    save(store, "Priya", "Leadership Accelerator")
+    save(store, "Anita", "10X Masterclass")
+    store.close()
+    columns.ingest_store(store.path)
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(store.path + suffix):
+            os.remove(store.path + suffix)
+    store = LeadStore(path=store.path)
+    try:
+        save(store, "Meera", "Iron Lady Essentials")
+        with pytest.raises(ValueError, match="--rebuild"):
+            columns.ingest_store(store.path)  # would skip Meera, whose id was already ingested
+        columns.reset()
+        assert columns.ingest_store(store.path) == 1
+        assert columns.count("program") == {"Iron Lady Essentials": 1}
+        assert LeadColumns(str(tmp_path / "columns")).rows == 1
+    finally:
+        store.close()
+
+
+def test_a_rewritten_csv_must_be_rebuilt(tmp_path):
+    path = tmp_path / "leads.csv"
+    path.write_text(HEADER + "2026-01-02 10:00:00,Priya,Manager,Low Confidence,Lead,10X Masterclass,,70\n",
+                    encoding="utf-8")
+    columns = LeadColumns(str(tmp_path / "columns"))
+    columns.ingest_csv(str(path))
+    path.write_text(HEADER, encoding="utf-8")
+    with pytest.raises(ValueError):
+        columns.ingest_csv(str(path))
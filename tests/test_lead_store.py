@@ -0,0 +1,192 @@
+import csv
+import sqlite3
+
+import pytest
+
+from lead_store import CSV_HEADER, LeadStore, dedup_csv, fingerprint
+
+
+def lead(name, contact=None, role="Manager", program="Leadership Accelerator"):
+    return {"name": name, "role": role, "challenge": "Low Confidence", "goal": "Lead a team",
+            "program": program, "alternate": "Iron Lady Essentials", "match_score": 80, "contact": contact}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LeadStore(path=str(tmp_path / "leads.db"))
+    yield store
+    store.close()
+
+
+def test_fingerprint_needs_a_contact():
+    assert fingerprint("Priya Sharma", None) is None
+    assert fingerprint("Priya Sharma", "  ") is None
+
+
+def test_fingerprint_normalizes_name_and_contact():
+    assert fingerprint("Priya  Sharma", "Priya@Example.com") == fingerprint("priya sharma", "priya@example.com")
+    assert fingerprint("Priya", "+91 98765-43210") == fingerprint("Priya", "9876543210")
+    assert fingerprint("Priya", "priya@example.com") != fingerprint("Priya", "other@example.com")
+
+
+def test_same_name_without_contact_keeps_both_people(store):
+    store.save(lead("Priya Sharma"))
+    store.save(lead("Priya Sharma", program="10X Masterclass"))
+    store.flush()
+    rows = store.rows()
+    assert len(rows) == 2
+    assert {row[5] for row in rows} == {"Leadership Accelerator", "10X Masterclass"}
+    assert store.stats()["merged"] == 0
+
+
+def test_same_name_with_different_contacts_keeps_both_people(store):
+    store.save(lead("Priya Sharma", "priya.s@example.com"))
+    store.save(lead("Priya Sharma", "priya.sharma@example.com"))
+    store.flush()
+    assert store.counts() == {"leads": 2, "saves": 2}
+
+
+def test_same_person_is_updated_in_place(store):
+    store.save(lead("Priya Sharma", "priya@example.com"))
+    store.save(lead("priya sharma", "PRIYA@example.com", program="10X Masterclass"))
+    store.flush()
+    rows = store.rows()
+    assert len(rows) == 1 and rows[0][5] == "10X Masterclass"
+    assert store.counts() == {"leads": 1, "saves": 2}
+    programs = [h[1] for h in store.history("Priya Sharma", "priya@example.com")]
+    assert programs == ["Leadership Accelerator", "10X Masterclass"]
+
+
+def test_export_keeps_people_sharing_a_name(store, tmp_path):
+    store.save(lead("Priya Sharma"))
+    store.save(lead("Priya Sharma"))
+    store.flush()
+    path = tmp_path / "leads.csv"
+    assert store.export_csv(str(path)) == 2
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == CSV_HEADER and len(rows) == 3
+
+
+def test_dedup_merges_only_leads_with_a_contact(tmp_path):
+    db = str(tmp_path / "leads.db")
+    conn = sqlite3.connect(db)
+    # As left by an older LeadStore: one row per save, no fingerprints
+    conn.execute("CREATE TABLE leads (id INTEGER PRIMARY KEY, timestamp TEXT NOT NULL, name TEXT, role TEXT,"
+                 " challenge TEXT, goal TEXT, program TEXT, alternate TEXT, match_score INTEGER, contact TEXT)")
+    rows = [("2026-01-0%d" % i, name, "Manager", "Low Confidence", "Lead", "Leadership Accelerator", None, 80, contact)
+            for i, (name, contact) in enumerate([("Priya", None), ("Priya", None),
+                                                 ("Anita", "anita@example.com"), ("anita", "ANITA@example.com")], 1)]
+    conn.executemany("INSERT INTO leads (timestamp, name, role, challenge, goal, program, alternate, match_score,"
+                     " contact) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    store = LeadStore(path=db)
+    try:
+        assert store.dedup() == (4, 3)
+        assert [row[1] for row in store.rows()] == ["Priya", "Priya", "anita"]
+        assert store.counts() == {"leads": 3, "saves": 4}
+        assert len(store.history("Anita", "anita@example.com")) == 2
+        assert store.dedup() == (3, 3)  # nothing left to merge, and no history added twice
+        assert len(store.history("Anita", "anita@example.com")) == 2
+    finally:
+        store.close()
+
+
+def test_dedup_merges_a_form_saved_again_soon_without_a_contact(store):
+    store.save(lead("Sahana", role="Student"))
+    store.save(lead("sahana ", role="Student", program="10X Masterclass"))  # a regenerated roadmap
+    store.save(lead("Sahana", role="Manager"))  # another stage: maybe someone else
+    store.flush()
+    assert store.dedup() == (3, 2)
+    rows = store.rows()
+    assert [(row[2], row[5]) for row in rows] == [("Student", "10X Masterclass"),
+                                                   ("Manager", "Leadership Accelerator")]
+    assert store.counts() == {"leads": 2, "saves": 3}
+    assert store.dedup() == (2, 2)
+
+
+def test_dedup_keeps_a_form_saved_again_much_later(tmp_path):
+    db = str(tmp_path / "leads.db")
+    store = LeadStore(path=db, merge_window=3600)
+    store.close()
+    conn = sqlite3.connect(db)
+    conn.executemany("INSERT INTO leads (timestamp, name, role, challenge, goal, program) VALUES (?, ?, ?, ?, ?, ?)",
+                     [(timestamp, "Sahana", "Student", "Low Confidence", "get a job", "Iron Lady Essentials")
+                      for timestamp in ("2026-01-31 22:00:00", "2026-01-31 22:50:00", "2026-02-01 01:30:00")])
+    conn.commit()
+    conn.close()
+    store = LeadStore(path=db, merge_window=3600)
+    try:
+        assert store.dedup() == (3, 2)  # the third save came over an hour after the second
+        assert store.counts() == {"leads": 2, "saves": 3}
+    finally:
+        store.close()
+
+
+def test_dedup_csv_merges_only_a_form_saved_again_soon(tmp_path):
+    path = tmp_path / "leads.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER[:6])  # the original leads.csv layout
+        writer.writerow(["2026-01-31 22:39:30", "sahana", "Student", "Low Confidence", "get a job",
+                         "Iron Lady Essentials"])
+        writer.writerow(["2026-01-31 22:59:36", "Sahana", "Student", "Low Confidence", "Get a job", "10X Masterclass"])
+        writer.writerow(["2026-01-31 23:10:00", "sahana", "Student", "Low Confidence", "job", "10X Masterclass"])
+        writer.writerow(["2026-02-01 01:33:39", "sahana", "Student", "Low Confidence", "get a job", "10X Masterclass"])
+    assert dedup_csv(str(path), merge_window=3600) == (4, 3)
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))[1:]
+    assert [(row[0], row[4], row[5]) for row in rows] == [
+        ("2026-01-31 22:39:30", "Get a job", "10X Masterclass"),
+        ("2026-01-31 23:10:00", "job", "10X Masterclass"),
+        ("2026-02-01 01:33:39", "get a job", "10X Masterclass"),
+    ]
+
+
+def test_dedup_csv_keeps_people_sharing_a_name(tmp_path):
+    path = tmp_path / "leads.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        writer.writerow(["2026-01-01", "Priya", "Manager", "Low Confidence", "Lead", "10X Masterclass", "", "", ""])
+        writer.writerow(["2026-01-02", "Priya", "Manager", "Low Confidence", "Lead", "10X Masterclass", "", "", ""])
+        writer.writerow(["2026-01-03", "Anita", "Manager", "Low Confidence", "Lead", "10X Masterclass", "", "",
+                         "anita@example.com"])
+        writer.writerow(["2026-01-04", "Anita", "Manager", "Low Confidence", "Lead", "Leadership Accelerator", "",
+                         "", "anita@example.com"])
+    assert dedup_csv(str(path)) == (4, 3)
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))[1:]
+    assert rows[-1][0] == "2026-01-03" and rows[-1][5] == "Leadership Accelerator"
+
+
+def test_saved_leads_are_written(store):
+    store.save(lead("Priya"))
+    store.save(lead("Meera"))
+    store.flush()
+    assert [row[1] for row in store.rows()] == ["Priya", "Meera"]
+
+
+def test_writer_survives_a_failing_batch(store, monkeypatch):
+    original = store._write
+
+    def fail_once(conn, batch):
+        monkeypatch.setattr(store, "_write", original)
+        raise ValueError("bad row")
+
+    monkeypatch.setattr(store, "_write", fail_once)
+    store.save(lead("Priya"))
+    store.flush()  # returns although the batch failed
+    assert store.dropped == 1
+    store.save(lead("Meera"))
+    store.flush()
+    assert [row[1] for row in store.rows()] == ["Meera"]
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    store = LeadStore(path=str(tmp_path / "leads.db"), queue_size=1)
+    store.close()  # a writer that has stopped keeping up
+    store.save(lead("Priya"))
+    store.save(lead("Meera"))  # would block forever with a blocking put
+    assert store.dropped == 1
@@ -0,0 +1,110 @@
+import re
+
+import pytest
+
+import config
+from prompts import (CompiledPrompt, _fit, _followup_template, _roadmap_template, build_followup_prompt, build_roadmap_prompt,
+                     candidate_programs, programs_json, token_budget)
+from recommender import recommend
+from tokenizer import TokenMeter, count_tokens, truncate
+
+GOAL = "return to a senior engineering role after five years at home and lead a team again by next spring"
+PROFILE = {"name": "Priya", "role": "Career Break", "challenge": "Return to Work", "goal": GOAL}
+
+
+def roadmap_fields(programs):
+    rec = recommend(PROFILE)
+    return dict(PROFILE, program=rec.program, score=rec.score, alternate=rec.alternate,
+                programs=programs_json(programs))
+
+
+def prompt_tokens(programs):
+    return _roadmap_template("A", "English").tokens(roadmap_fields(programs))
+
+
+def set_prompt_budget(monkeypatch, prompt):
+    monkeypatch.setitem(config.TOKEN_BUDGETS, "roadmap", dict(config.TOKEN_BUDGETS["roadmap"], prompt=prompt))
+
+
+def test_candidates_are_the_pick_the_alternate_then_the_stage():
+    rec = recommend(PROFILE)
+    names = candidate_programs(PROFILE["role"], rec)
+    assert names[:2] == (rec.program, rec.alternate)
+    assert len(names) > 2
+    assert all(PROFILE["role"] in config.PROGRAMS_DB[n]["ideal_for"] or "All Stages" in config.PROGRAMS_DB[n]["ideal_for"]
+               for n in names[2:])
+
+
+def test_within_budget_every_candidate_is_listed():
+    names = candidate_programs(PROFILE["role"], recommend(PROFILE))
+    prompt = build_roadmap_prompt(PROFILE, "A", "English")
+    assert programs_json(names) in prompt and GOAL in prompt
+
+
+def test_over_budget_drops_the_extra_candidates_first(monkeypatch):
+    names = candidate_programs(PROFILE["role"], recommend(PROFILE))
+    set_prompt_budget(monkeypatch, prompt_tokens(names[:2]))
+    prompt = build_roadmap_prompt(PROFILE, "A", "English")
+    assert programs_json(names[:2]) in prompt
+    assert GOAL in prompt  # nothing else had to go
+
+
+def test_then_the_goal_is_shortened(monkeypatch):
+    names = candidate_programs(PROFILE["role"], recommend(PROFILE))
+    budget = prompt_tokens(names[:2]) - 10
+    set_prompt_budget(monkeypatch, budget)
+    prompt = build_roadmap_prompt(PROFILE, "A", "English")
+    assert programs_json(names[:2]) in prompt
+    goal = re.search(r"- Goal: (.*)\n", prompt).group(1)
+    assert GOAL.startswith(goal) and len(goal) < len(GOAL)
+    assert _roadmap_template("A", "English").tokens(dict(roadmap_fields(names[:2]), goal=goal)) <= budget
+
+
+def test_fit_trims_fields_in_order():
+    template = CompiledPrompt("Q: $question\nG: $goal\n")
+    fields = {"question": "why " * 40, "goal": "grow " * 40}
+    budget = template.tokens(fields) - 30
+    text = _fit(template, fields, budget, "question", "goal")
+    assert fields["goal"] == "grow " * 40  # the first field covered the whole excess
+    assert template.tokens(fields) <= budget and text == template.substitute(fields)
+
+    fields = {"question": "why", "goal": "grow " * 40}
+    _fit(template, fields, template.fixed_tokens + 5, "question", "goal")
+    assert fields["question"] == "" and count_tokens(fields["goal"]) <= 5
+
+
+def test_long_followup_question_is_cut_to_the_budget():
+    question = "Can I join the weekend batch? " * 200
+    prompt = build_followup_prompt(question, PROFILE, "Leadership Accelerator", "English")
+    asked = re.search(r'asked: "(.*)"\n', prompt).group(1)
+    assert question.startswith(asked) and len(asked) < len(question)
+    fields = {"question": asked, "name": "Priya", "program": "Leadership Accelerator", "goal": GOAL}
+    assert _followup_template("English").tokens(fields) <= token_budget("followup", "English")["prompt"]
+
+
+def test_completion_budget_scales_with_language_and_version(monkeypatch):
+    monkeypatch.setitem(config.TOKEN_BUDGETS, "versions", {"A": 1.0, "B": 1.25})
+    base = config.TOKEN_BUDGETS["roadmap"]["completion"]
+    hindi = config.TOKEN_BUDGETS["languages"]["हिंदी"]
+    assert token_budget("roadmap", "English", "A")["completion"] == base
+    assert token_budget("roadmap", "English", "B")["completion"] == int(base * 1.25)
+    assert token_budget("roadmap", "हिंदी", "B")["completion"] == int(base * hindi * 1.25)
+    assert token_budget("roadmap", "हिंदी", "B")["prompt"] == config.TOKEN_BUDGETS["roadmap"]["prompt"]
+    assert token_budget("followup", "हिंदी")["completion"] == int(config.TOKEN_BUDGETS["followup"]["completion"] * hindi)
+
+
+def test_truncate_never_exceeds_the_limit():
+    text = "नेतृत्व कौशल seekhna hai, 2024 mein ₹50,000 tak!"
+    assert truncate(text, count_tokens(text)) == text
+    for limit in range(count_tokens(text)):
+        assert count_tokens(truncate(text, limit)) <= limit
+
+
+def test_token_meter_reports_means_truncation_and_upstream_ratio():
+    meter = TokenMeter()
+    meter.record("roadmap", 300, 500, upstream_tokens=880)
+    meter.record("roadmap", 100, 300, truncated=True)
+    stats = meter.stats()["roadmap"]
+    assert (stats["calls"], stats["prompt_mean"], stats["completion_mean"]) == (2, 200.0, 400.0)
+    assert stats["truncated"] == 1
+    assert stats["upstream_ratio"] == pytest.approx(1.1)  # only calls with reported usage are compared
@@ -0,0 +1,155 @@
+import threading
+import time
+
+import pytest
+
+from ratelimit import RateLimited, SharedLimiter
+
+
+class FakeClock:
+    """Simulated time shared by every limiter in a test; sleep() advances it unless frozen"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.frozen = False
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            return self.now
+
+    def sleep(self, seconds):
+        with self._lock:
+            if not self.frozen:
+                self.now += seconds
+        time.sleep(0.001)  # let other threads run
+
+    def advance(self, seconds):
+        with self._lock:
+            self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def make_limiter(tmp_path, clock):
+    """A limiter on a shared database, as another worker process would open it: 1 request/s, 10 tokens/s"""
+    path = str(tmp_path / "ratelimit.db")
+
+    def make(**kwargs):
+        settings = dict(path=path, rpm=60, tpm=600, headroom=1.0, queue_size=10, max_wait=1000.0,
+                        poll_interval=0.1, stale_after=1000.0, clock=clock, sleep=clock.sleep)
+        settings.update(kwargs)
+        return SharedLimiter(**settings)
+
+    return make
+
+
+def drain_requests(limiter):
+    for _ in range(60):
+        limiter.acquire(1)
+
+
+def test_request_bucket_refills_with_time(make_limiter, clock):
+    limiter = make_limiter()
+    drain_requests(limiter)
+    assert limiter.stats()["requests_available"] == 0
+    clock.advance(0.5)
+    assert limiter.stats()["requests_available"] == 0
+    clock.advance(0.5)
+    assert limiter.stats()["requests_available"] == 1
+    clock.advance(3600)
+    assert limiter.stats()["requests_available"] == 60  # never above capacity
+
+
+def test_token_bucket_refills_with_time(make_limiter, clock):
+    limiter = make_limiter()
+    assert limiter.acquire(600) == 600
+    assert limiter.stats()["tokens_available"] == 0
+    clock.advance(1)
+    assert limiter.stats()["tokens_available"] == 10
+
+
+def test_acquire_waits_for_the_refill(make_limiter, clock):
+    limiter = make_limiter()
+    drain_requests(limiter)
+    start = clock()
+    limiter.acquire(1)
+    assert 1.0 <= clock() - start < 1.5
+    assert limiter.stats()["queued"] == 1
+
+
+def test_acquire_gives_up_after_max_wait(make_limiter):
+    limiter = make_limiter(max_wait=5.0)
+    limiter.acquire(600)
+    with pytest.raises(RateLimited):
+        limiter.acquire(600)  # a full minute of tokens away
+    assert limiter.stats()["waiting"] == 0  # the ticket is not left behind
+
+
+def test_waiters_are_admitted_in_arrival_order_across_processes(make_limiter, clock):
+    drain_requests(make_limiter())
+    clock.frozen = True  # nothing refills until everyone is queued
+    order = []
+    threads = []
+    for worker in range(4):
+        limiter = make_limiter()  # its own connection, like a separate worker process
+        thread = threading.Thread(target=lambda l=limiter, w=worker: (l.acquire(1), order.append(w)))
+        thread.start()
+        threads.append(thread)
+        while make_limiter().stats()["waiting"] < worker + 1:
+            time.sleep(0.001)
+    clock.advance(1)  # one request's worth of quota
+    with pytest.raises(RateLimited):
+        make_limiter(max_wait=0.0).acquire(1)  # queued callers are not overtaken
+    for admitted in range(1, 5):
+        while len(order) < admitted:
+            time.sleep(0.001)
+        clock.advance(1)
+    for thread in threads:
+        thread.join(10)
+    assert order == [0, 1, 2, 3]
+
+
+def test_full_queue_rejects(make_limiter, clock):
+    drain_requests(make_limiter())
+    clock.frozen = True
+    waiter = threading.Thread(target=make_limiter().acquire, args=(1,))
+    waiter.start()
+    while make_limiter().stats()["waiting"] < 1:
+        time.sleep(0.001)
+    with pytest.raises(RateLimited):
+        make_limiter(queue_size=1).acquire(1)
+    clock.frozen = False
+    waiter.join(10)
+
+
+def test_settle_refunds_unused_tokens(make_limiter):
+    limiter = make_limiter()
+    reserved = limiter.acquire(500)
+    assert limiter.stats()["tokens_available"] == 100
+    limiter.settle(reserved, 200)
+    assert limiter.stats()["tokens_available"] == 400
+
+
+def test_settle_charges_an_overrun(make_limiter):
+    limiter = make_limiter()
+    reserved = limiter.acquire(100)
+    limiter.settle(reserved, 300)
+    assert limiter.stats()["tokens_available"] == 300
+
+
+def test_settle_without_usage_keeps_the_reservation(make_limiter):
+    limiter = make_limiter()
+    reserved = limiter.acquire(100)
+    limiter.settle(reserved, None)
+    assert limiter.stats()["tokens_available"] == 500
+
+
+def test_settle_never_exceeds_capacity(make_limiter):
+    limiter = make_limiter()
+    limiter.settle(600, 0)
+    assert limiter.stats()["tokens_available"] == 600
@@ -0,0 +1,55 @@
+import itertools
+
+import pytest
+
+import config
+from recommender import CHALLENGE_KEYWORDS, recommend, score_programs
+
+ROLES = ["Student", "Professional", "Manager", "Career Break", "Entrepreneur"]
+GOALS = ["", "lead a team and get promoted to director", "get a job after my break", "speak with confidence",
+         "!!!", "x" * 500]
+
+
+def profile(role, challenge, goal):
+    return {"name": "Priya", "role": role, "challenge": challenge, "goal": goal}
+
+
+@pytest.mark.parametrize("role, challenge, goal, program", [
+    ("Career Break", "Return to Work", "get a job after my break", "Career Restart Launchpad"),
+    ("Manager", "Leadership Skills", "lead a team and get promoted to director", "Leadership Accelerator"),
+    ("Student", "Low Confidence", "become confident", "Iron Lady Essentials"),
+])
+def test_recommends_the_program_for_the_profile(role, challenge, goal, program):
+    assert recommend(profile(role, challenge, goal)).program == program
+
+
+def test_alternate_is_the_runner_up():
+    rec = recommend(profile("Career Break", "Return to Work", "get a job after my break"))
+    assert rec.alternate != rec.program
+    ranked = sorted(rec.scores.values(), reverse=True)
+    assert rec.scores[rec.program] == ranked[0]
+    assert rec.scores[rec.alternate] == ranked[1]
+
+
+def test_ties_follow_catalog_order():
+    programs = {name: dict(info, ideal_for=["All Stages"]) for name, info in config.PROGRAMS_DB.items()}
+    rec = recommend(profile("Student", "Unknown", ""), programs)
+    assert (rec.program, rec.alternate) == tuple(programs)[:2]
+
+
+def test_single_program_is_its_own_alternate():
+    name = next(iter(config.PROGRAMS_DB))
+    rec = recommend(profile("Student", "Low Confidence", ""), {name: config.PROGRAMS_DB[name]})
+    assert rec.program == rec.alternate == name
+
+
+def test_score_stays_in_the_85_to_95_band():
+    for role, challenge, goal in itertools.product(ROLES, CHALLENGE_KEYWORDS, GOALS):
+        rec = recommend(profile(role, challenge, goal))
+        assert 85 <= rec.score <= 95
+        assert rec.scores == score_programs(profile(role, challenge, goal))
+
+
+def test_missing_fields_still_recommend():
+    rec = recommend({})
+    assert rec.program in config.PROGRAMS_DB and 85 <= rec.score <= 95
@@ -0,0 +1,105 @@
+import threading
+
+import pytest
+
+from resilience import CircuitBreaker, CircuitOpen, Resilience
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_then_recovers_through_a_trial_call():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=0.5, window=4, min_calls=4, reset_timeout=30.0, clock=clock)
+    for failed in (False, True, False):
+        breaker.record(failed)
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record(True)  # 2 of the last 4 failed
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    clock.now += 29.9
+    assert not breaker.allow()
+    clock.now += 0.1
+    assert breaker.allow()  # the one trial call
+    assert breaker.state == "half_open"
+    assert not breaker.allow()  # everyone else still fails fast
+    breaker.record(False)
+    assert breaker.state == "closed" and breaker.allow()
+    assert breaker.snapshot()["short_circuited"] == 3
+
+
+def test_failed_trial_reopens_the_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(min_calls=1, reset_timeout=10.0, clock=clock)
+    breaker.record(True)
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == "open" and breaker.trips == 2
+    assert not breaker.allow()
+
+
+def test_open_breaker_refuses_calls_without_starting_them():
+    resilience = Resilience(min_calls=1)
+    resilience.breaker.record(True)
+    calls = []
+    with pytest.raises(CircuitOpen):
+        resilience.call("followup", lambda timeout: calls.append(timeout))
+    assert calls == []
+
+
+def hedging(**kwargs):
+    """Resilience whose "test" operation has a p95 latency of 0.05 s"""
+    resilience = Resilience(min_samples=5, hedge_percentile=95, hedge_min_delay=0.01, threads=4, **kwargs)
+    for _ in range(5):
+        resilience.histogram("test").record(0.05)
+    return resilience
+
+
+def test_hedge_is_sent_after_the_p95_and_the_loser_is_closed():
+    resilience = hedging()
+    assert resilience.hedge_delay("test") == pytest.approx(0.05)
+    release, closed_event = threading.Event(), threading.Event()
+    calls, closed = [], []
+
+    def start(timeout):
+        calls.append(timeout)
+        if len(calls) == 1:
+            release.wait(5)  # the primary stalls past the p95
+            return "primary"
+        return "hedge"
+
+    def close(result):
+        closed.append(result)
+        closed_event.set()
+
+    assert resilience.call("test", start, close=close) == "hedge"
+    assert resilience.counters["hedges"] == 1 and resilience.counters["hedge_wins"] == 1
+    assert closed == []  # the primary is still running
+    release.set()
+    assert closed_event.wait(5)
+    assert closed == ["primary"]
+
+
+def test_no_hedge_for_a_call_answered_before_the_p95():
+    resilience = hedging()
+    assert resilience.call("test", lambda timeout: "primary") == "primary"
+    assert resilience.counters["hedges"] == 0
+
+
+def test_no_hedge_without_spare_quota():
+    resilience = hedging()
+    release = threading.Event()
+
+    def start(timeout):
+        release.wait(0.2)
+        return "primary"
+
+    assert resilience.call("test", start, can_hedge=lambda: False) == "primary"
+    assert resilience.counters["hedges"] == 0
@@ -0,0 +1,42 @@
+import pytest
+
+from roadmap_cache import NAME_PLACEHOLDER, RoadmapCache, anonymize, name_collides
+
+ROADMAP = "Asha here! Priya, the Leadership Accelerator fits your goal, Priya."
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return RoadmapCache(path=str(tmp_path / "roadmaps.db"))
+
+
+def test_anonymize_swaps_whole_words_only():
+    template, count = anonymize("Priya, Priyanka and Priya.", "Priya")
+    assert (template, count) == (f"{NAME_PLACEHOLDER}, Priyanka and {NAME_PLACEHOLDER}.", 2)
+
+
+@pytest.mark.parametrize("name", ["Asha", "asha", "Leadership", "Iron Lady", "Accelerator"])
+def test_names_in_persona_or_catalog_text_collide(name):
+    assert name_collides(name)
+    assert anonymize(ROADMAP, name) == (ROADMAP, 0)
+
+
+def test_ordinary_names_do_not_collide():
+    assert not name_collides("Priya")
+    assert not name_collides("  ")
+
+
+def test_cached_roadmap_is_personalised_for_the_next_user(cache):
+    assert cache.put("key", ROADMAP, "Priya")
+    assert cache.get("key", "Meera") == "Asha here! Meera, the Leadership Accelerator fits your goal, Meera."
+
+
+def test_name_is_swapped_as_a_whole_word_only(cache):
+    assert cache.put("key", "Priya, Priyanka and Priya.", "Priya")
+    assert cache.get("key", NAME_PLACEHOLDER) == f"{NAME_PLACEHOLDER}, Priyanka and {NAME_PLACEHOLDER}."
+    assert cache.get("key", "Meera") == "Meera, Priyanka and Meera."
+
+
+def test_colliding_name_is_not_cached(cache):
+    assert not cache.put("key", "Asha here! Asha, the Leadership Accelerator fits your goal.", "Asha")
+    assert cache.get("key", "Meera") is None
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+from recommender import build_roadmap, recommend
+from roadmap_format import (FIXED, SECTIONS, RoadmapParser, SectionRenderer, merge_roadmap, parse_roadmap,
+                            render_markdown, render_section)
+
+PROFILE = {"name": "Priya", "role": "Manager", "challenge": "Leadership Skills", "goal": "lead a team"}
+# A fenced reply with escaped quotes, a newline escape, \u escapes and brackets inside strings
+MODEL_JSON = (r'{"why": "Priya, you said \"lead a team\"\nand this is the way.", '
+              r'"steps": ["Week 1: set a goal", "Week 2: practise \u0928\u0947\u0924\u0943\u0924\u094d\u0935"], '
+              r'"outcomes": ["Confidence {in} [meetings]", "A plan, with commas"], '
+              r'"comparison": [{"aspect": "Duration", "best": "3 months", "alternate": "6 weeks"}], '
+              r'"cta": "Join us, Priya!"}')
+MODEL_TEXT = "```json\n" + MODEL_JSON + "\n```"
+EXPECTED = list(json.loads(MODEL_JSON).items())
+
+
+def local():
+    return build_roadmap(PROFILE, recommend(PROFILE))
+
+
+def feed_in_pieces(text, sizes):
+    parser, fields, i = RoadmapParser(), [], 0
+    for size in sizes:
+        fields += parser.feed(text[i:i + size])
+        i += size
+    fields += parser.feed(text[i:])
+    return fields
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 64])
+def test_any_chunking_gives_the_same_fields(size):
+    assert feed_in_pieces(MODEL_TEXT, [size] * (len(MODEL_TEXT) // size)) == EXPECTED
+
+
+@pytest.mark.parametrize("marker", ['"ste', 'you said \\', 'you said \\"', "\\u09", 'ps": ["We', "{in"])
+def test_split_inside_a_key_string_or_escape(marker):
+    cut = MODEL_TEXT.index(marker) + len(marker)
+    assert feed_in_pieces(MODEL_TEXT, [cut]) == EXPECTED
+
+
+def test_unicode_and_escapes_are_decoded():
+    fields = dict(feed_in_pieces(MODEL_TEXT, [1] * len(MODEL_TEXT)))
+    assert fields["why"] == 'Priya, you said "lead a team"\nand this is the way.'
+    assert fields["steps"][1] == "Week 2: practise नेतृत्व"
+    assert fields["outcomes"][0] == "Confidence {in} [meetings]"
+
+
+def test_fields_are_emitted_as_soon_as_they_are_complete():
+    parser = RoadmapParser()
+    assert parser.feed('{"why": "Because", "ste') == [("why", "Because")]
+    assert parser.feed('ps": ["a"') == []
+    assert parser.feed(']}') == [("steps", ["a"])]
+    assert parser.feed(', "cta": "ignored after the object closes"') == []
+
+
+def test_renderer_emits_sections_in_page_order():
+    roadmap = local()
+    renderer = SectionRenderer({field: roadmap[field] for field in FIXED})
+    assert renderer.add(None, None) == render_section("program", roadmap)
+    assert renderer.add("steps", ["Step one"]) == ""  # waits for "why"
+    out = renderer.add("why", "Because.")
+    assert out.index("**Why This Program**") < out.index("**Alternate Option**") < out.index("Step one")
+    assert renderer.rendered == SECTIONS.index("steps") + 1
+
+
+def test_unknown_invalid_and_fixed_fields_are_ignored():
+    roadmap = local()
+    renderer = SectionRenderer({field: roadmap[field] for field in FIXED})
+    renderer.add("mood", "sunny")
+    renderer.add("steps", [])
+    renderer.add("program", "Some Other Program")
+    assert "mood" not in renderer.roadmap and "steps" not in renderer.roadmap
+    assert renderer.roadmap["program"] == roadmap["program"]
+    assert parse_roadmap('{"score": 150, "cta": "   ", "why": "ok"}') == {"why": "ok"}
+
+
+def test_missing_sections_come_from_the_fallback():
+    roadmap = local()
+    renderer = SectionRenderer({field: roadmap[field] for field in FIXED})
+    shown = renderer.add(None, None) + renderer.add("why", "Model why.") + renderer.add("cta", "Model cta.")
+    shown += renderer.finish(roadmap)
+    assert renderer.rendered == len(SECTIONS)
+    assert renderer.roadmap["why"] == "Model why." and renderer.roadmap["cta"] == "Model cta."
+    assert renderer.roadmap["steps"] == roadmap["steps"]
+    assert shown == render_markdown(renderer.roadmap)[1:]
+
+
+def test_truncated_stream_falls_back_for_the_rest():
+    truncated = MODEL_TEXT[:MODEL_TEXT.index('"comparison"') + 20]
+    merged = merge_roadmap(truncated, local())
+    assert merged["why"] == 'Priya, you said "lead a team"\nand this is the way.'
+    assert merged["outcomes"] == ["Confidence {in} [meetings]", "A plan, with commas"]
+    assert merged["comparison"] == local()["comparison"]
+    assert merged["cta"] == local()["cta"]
+
+
+def test_unparseable_text_is_the_local_roadmap():
+    assert merge_roadmap("Sorry, I can't help with that.", local()) == local()
+    assert merge_roadmap("", local()) == local()
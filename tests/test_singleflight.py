@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import FlightError, SingleFlight
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_concurrent_callers_generate_once():
+    group, n = SingleFlight(), 8
+    generations, results = [], []
+    barrier = threading.Barrier(n)
+
+    def caller():
+        barrier.wait()
+        flight = group.begin("profile")
+        if flight.leader:
+            # hold the flight until every other caller has joined it
+            wait_for(lambda: group.stats()["followers"] == n - 1)
+            generations.append(1)
+            flight.finish(shared=True)
+            results.append(True)
+        else:
+            results.append(flight.wait())
+
+    threads = [threading.Thread(target=caller) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(generations) == 1
+    assert results == [True] * n
+    assert group.stats() == {"leaders": 1, "followers": n - 1, "saved": n - 1, "errors_shared": 0,
+                             "timeouts": 0, "in_flight": 0}
+
+
+def test_follower_waits_for_the_leader_in_process():
+    group = SingleFlight()
+    leader = group.begin("profile")
+    follower = group.begin("profile")
+    assert leader.leader and not follower.leader
+
+    outcome = []
+    waiter = threading.Thread(target=lambda: outcome.append(follower.wait()))
+    waiter.start()
+    time.sleep(0.05)
+    assert waiter.is_alive() and outcome == []
+    leader.finish(shared=True)
+    waiter.join(1)
+    assert outcome == [True]
+    assert group.begin("profile").leader  # the finished flight is gone
+
+
+def test_follower_gets_the_leaders_error():
+    group = SingleFlight()
+    leader, follower = group.begin("profile"), group.begin("profile")
+    leader.finish(shared=False, error=RuntimeError("rate limited"))
+    with pytest.raises(FlightError, match="rate limited"):
+        follower.wait()
+
+
+def test_follower_times_out_without_a_leader_result():
+    group = SingleFlight(timeout=0.05)
+    group.begin("profile")
+    assert group.begin("profile").wait() is False
+    assert group.stats()["timeouts"] == 1
+
+
+def test_stale_lease_from_another_process_is_taken_over(tmp_path):
+    path = str(tmp_path / "flights.db")
+    # Three groups on one database stand in for three worker processes
+    dead = SingleFlight(path=path, lease=0.2, poll_interval=0.01)
+    waiting = SingleFlight(path=path, lease=0.2, poll_interval=0.01)
+    later = SingleFlight(path=path, lease=0.2, poll_interval=0.01)
+
+    assert dead.begin("profile").leader  # and never finishes
+    follower = waiting.begin("profile")
+    assert not follower.leader
+
+    start = time.monotonic()
+    assert follower.wait() is False  # the lease lapsed without a result
+    assert time.monotonic() - start >= 0.15
+    assert later.begin("profile").leader
@@ -0,0 +1,134 @@
+import threading
+import time
+
+from speculation import Speculator
+
+PROFILE = {"name": "Priya", "role": "Manager", "challenge": "Leadership Skills", "goal": "lead a team"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubCore:
+    """roadmap_chunks() yields two sections; with block=True it holds after the first until released"""
+
+    def __init__(self, block=False):
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+        self.calls = []
+        self.closed = threading.Event()
+
+    def roadmap_chunks(self, user_data, version, language, timings=None, speculative=False):
+        self.calls.append((user_data["goal"], speculative))
+        try:
+            yield f"header for {user_data['name']}\n"
+            self.release.wait(5)
+            yield f"plan to {user_data['goal']}\n"
+        finally:
+            self.closed.set()
+
+
+def settle(speculator):
+    deadline = time.monotonic() + 5
+    while speculator.stats()["inflight"]:
+        assert time.monotonic() < deadline, "speculation never finished"
+        time.sleep(0.005)
+
+
+def no_fallback():
+    raise AssertionError("the speculation should have been used")
+
+
+def test_claimed_speculation_is_replayed():
+    core, clock = StubCore(), FakeClock()
+    speculator = Speculator(core, clock=clock)
+    assert speculator.speculate("s1", PROFILE, "A", "English")
+    assert speculator.speculate("s1", PROFILE, "A", "English")  # already running: not started twice
+    settle(speculator)
+
+    clock.now += 30
+    spec = speculator.claim("s1", dict(PROFILE), "A", "English")
+    timings = {}
+    assert list(spec.stream(no_fallback, timings)) == ["header for Priya\n", "plan to lead a team\n"]
+    assert timings["speculative"] and timings["ttft"] == 0
+    assert core.calls == [("lead a team", True)]
+    stats = speculator.stats()
+    assert (stats["started"], stats["hits"], stats["wasted"]) == (1, 1, 0)
+
+
+def test_claim_streams_sections_still_being_generated():
+    core = StubCore(block=True)
+    speculator = Speculator(core, clock=FakeClock())
+    speculator.speculate("s1", PROFILE, "A", "English")
+    spec = speculator.claim("s1", PROFILE, "A", "English")
+    sections = spec.stream(no_fallback, {})
+    assert next(sections) == "header for Priya\n"
+    core.release.set()
+    assert list(sections) == ["plan to lead a team\n"]
+
+
+def test_changed_profile_is_not_reused():
+    core = StubCore(block=True)
+    speculator = Speculator(core, clock=FakeClock())
+    speculator.speculate("s1", PROFILE, "A", "English")
+    changed = dict(PROFILE, goal="start my own business")
+    assert speculator.claim("s1", changed, "A", "English") is None
+    core.release.set()
+    assert core.closed.wait(5)  # the running generation was stopped
+    stats = speculator.stats()
+    assert (stats["hits"], stats["cancelled"], stats["wasted"]) == (0, 1, 1)
+
+
+def test_editing_the_form_restarts_the_speculation():
+    core = StubCore(block=True)
+    speculator = Speculator(core, clock=FakeClock())
+    speculator.speculate("s1", PROFILE, "A", "English")
+    changed = dict(PROFILE, goal="start my own business")
+    speculator.speculate("s1", changed, "A", "English")
+    core.release.set()
+    settle(speculator)
+    assert speculator.claim("s1", PROFILE, "A", "English") is None  # the first profile is gone
+    assert speculator.stats()["cancelled"] == 2
+    assert [goal for goal, _ in core.calls] == ["lead a team", "start my own business"]
+
+
+def test_wasted_calls_per_hour_pause_speculation():
+    clock = FakeClock()
+    speculator = Speculator(StubCore(), max_wasted_per_hour=2, clock=clock)
+    for session in ("s1", "s2"):
+        assert speculator.speculate(session, PROFILE, "A", "English")
+        settle(speculator)
+        assert speculator.claim(session, dict(PROFILE, name="Someone Else"), "A", "English") is None
+    assert speculator.stats()["wasted_last_hour"] == 2
+
+    assert not speculator.speculate("s3", PROFILE, "A", "English")
+    assert speculator.stats()["capped"] == 1
+    clock.now += 3601  # the waste ages out
+    assert speculator.speculate("s3", PROFILE, "A", "English")
+
+
+def test_unclaimed_speculation_expires():
+    clock = FakeClock()
+    speculator = Speculator(StubCore(), claim_ttl=600.0, clock=clock)
+    speculator.speculate("s1", PROFILE, "A", "English")
+    settle(speculator)
+    clock.now += 599
+    assert speculator.stats()["expired"] == 0
+    clock.now += 2
+    stats = speculator.stats()
+    assert (stats["expired"], stats["wasted"]) == (1, 1)
+    assert speculator.claim("s1", PROFILE, "A", "English") is None
+
+
+def test_disabled_speculator_does_nothing():
+    core = StubCore()
+    speculator = Speculator(core, enabled=False)
+    assert not speculator.speculate("s1", PROFILE, "A", "English")
+    assert speculator.claim("s1", PROFILE, "A", "English") is None
+    assert core.calls == []
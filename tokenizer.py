@@ -0,0 +1,85 @@
+"""Local token counting for prompts, budgets and the rate limiter.
+
+Text is split the way BPE pre-tokenizers split it (words with their leading
+space, runs of up to three digits, punctuation, whitespace) and each piece is
+costed by length and script: a Latin word is usually one token, Indic scripts
+take about one token per two characters. It needs no model files and is
+close enough to the upstream's count to size budgets; TokenMeter reports the
+ratio between the two so the estimate can be checked against real usage.
+"""
+import re
+import threading
+
+# Devanagari through Sinhala, including the combining vowel signs \w misses
+_INDIC = "ऀ-෿"
+_PIECE = re.compile(rf" ?(?:[^\W\d_]|[{_INDIC}])+| ?\d{{1,3}}| ?[^\w\s{_INDIC}]+|\s+")
+_NON_LATIN = re.compile(r"[^\x00-\x7f]")
+
+
+def _cost(piece):
+    word = piece.lstrip(" ")
+    if not word or word[0].isspace() or word[0].isdigit():
+        return 1
+    if word.isascii():
+        return (len(word) + 7) // 8 if word[0].isalpha() else (len(word) + 1) // 2
+    non_latin = len(_NON_LATIN.findall(word))
+    latin = len(word) - non_latin
+    if word[0].isalpha() or _INDIC[0] <= word[0] <= _INDIC[-1]:
+        # Latin letters: about eight per token; other scripts: about two
+        return -(-latin // 8) + -(-non_latin // 2)
+    # ASCII punctuation merges in pairs; other symbols (₹, emoji) cost a token or more each
+    return -(-latin // 2) + non_latin
+
+
+def count_tokens(text):
+    """Approximate number of LLM tokens in `text`"""
+    return sum(_cost(m.group()) for m in _PIECE.finditer(text))
+
+
+def truncate(text, max_tokens):
+    """The longest prefix of `text` (cut between pieces) costing at most `max_tokens`"""
+    used = 0
+    for m in _PIECE.finditer(text):
+        used += _cost(m.group())
+        if used > max_tokens:
+            return text[:m.start()].rstrip()
+    return text
+
+
+class TokenMeter:
+    """Per call kind: prompt and completion tokens counted locally, and the upstream's total"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.kinds = {}
+
+    def record(self, kind, prompt_tokens, completion_tokens, upstream_tokens=None, truncated=False):
+        """Count one call; `upstream_tokens` is the usage total reported by the API, if any"""
+        with self._lock:
+            k = self.kinds.setdefault(kind, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                                             "truncated": 0, "measured_local": 0, "measured_upstream": 0})
+            k["calls"] += 1
+            k["prompt_tokens"] += prompt_tokens
+            k["completion_tokens"] += completion_tokens
+            k["truncated"] += bool(truncated)
+            if upstream_tokens:
+                k["measured_local"] += prompt_tokens + completion_tokens
+                k["measured_upstream"] += upstream_tokens
+
+    def stats(self):
+        """Totals and means per kind, with upstream/local (how far off the local count runs)"""
+        with self._lock:
+            kinds = {kind: dict(k) for kind, k in self.kinds.items()}
+        out = {}
+        for kind, k in kinds.items():
+            out[kind] = {
+                "calls": k["calls"],
+                "prompt_tokens": k["prompt_tokens"],
+                "completion_tokens": k["completion_tokens"],
+                "prompt_mean": round(k["prompt_tokens"] / k["calls"], 1),
+                "completion_mean": round(k["completion_tokens"] / k["calls"], 1),
+                "truncated": k["truncated"],  # hit the completion budget
+                "upstream_ratio": (round(k["measured_upstream"] / k["measured_local"], 3)
+                                   if k["measured_local"] else None),
+            }
+        return out
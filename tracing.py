@@ -0,0 +1,175 @@
+"""Lightweight spans for timing the steps of a request.
+
+    from tracing import tracer
+
+    with tracer.span("roadmap.prompt"):
+        prompt = build_roadmap_prompt(...)
+    with tracer.span("followup.llm") as span:
+        text, tokens = complete(...)
+        span.set(tokens=tokens)
+
+Finished spans go into an in-process ring buffer of the last `buffer_size`
+samples. summary() reports count, mean and p50/p95/p99 per step;
+prometheus() renders the same summary in the Prometheus text format (served
+by api.py at /metrics), and with `jsonl_path` set every sample is also
+appended to a JSONL file in batches.
+
+With tracing disabled, span() returns a shared no-op object, so an
+instrumented step costs one method call.
+"""
+import atexit
+import json
+import threading
+import time
+from collections import deque
+
+import config
+from utils import percentile
+
+
+class Span:
+    """One timed step; use as a context manager, or call stop() yourself"""
+
+    __slots__ = ("tracer", "name", "attrs", "started", "start")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.started = time.time()
+        self.start = time.perf_counter()
+
+    def set(self, **attrs):
+        """Attach attributes (e.g. tokens=...) to the sample"""
+        self.attrs.update(attrs)
+
+    def stop(self):
+        self.tracer.record(self.name, time.perf_counter() - self.start, self.started, **self.attrs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.stop()
+
+
+class _NullSpan:
+    """Stands in for Span while tracing is off"""
+
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def stop(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Ring buffer of span samples with percentile summaries and exporters"""
+
+    def __init__(self, enabled=False, buffer_size=10000, jsonl_path=None, flush_every=200):
+        self.enabled = enabled
+        self.samples = deque(maxlen=buffer_size)
+        self.jsonl_path = jsonl_path
+        self.flush_every = flush_every
+        self._pending = []
+        self._lock = threading.Lock()
+        if jsonl_path:
+            atexit.register(self.flush)
+
+    def span(self, name, **attrs):
+        """Time a step; a no-op while tracing is disabled"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, attrs)
+
+    def record(self, name, seconds, started=None, **attrs):
+        """Add a sample measured elsewhere (e.g. a time-to-first-token)"""
+        if not self.enabled:
+            return
+        sample = {"name": name, "ts": round(started or time.time(), 6), "seconds": seconds}
+        if attrs:
+            sample.update(attrs)
+        self.samples.append(sample)
+        if self.jsonl_path:
+            with self._lock:
+                self._pending.append(sample)
+                full = len(self._pending) >= self.flush_every
+            if full:
+                self.flush()
+
+    def flush(self):
+        """Append pending samples to jsonl_path"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+            with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(s, ensure_ascii=False) + "\n" for s in pending)
+
+    def jsonl(self):
+        """The ring buffer as JSONL text"""
+        return "".join(json.dumps(s, ensure_ascii=False) + "\n" for s in list(self.samples))
+
+    def export_jsonl(self, path):
+        """Write the whole ring buffer to `path`"""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.jsonl())
+
+    def clear(self):
+        self.samples.clear()
+
+    def summary(self):
+        """Per step: count, mean and p50/p95/p99 seconds, plus tokens where recorded"""
+        by_name = {}
+        tokens = {}
+        for sample in list(self.samples):
+            by_name.setdefault(sample["name"], []).append(sample["seconds"])
+            if "tokens" in sample:
+                tokens[sample["name"]] = tokens.get(sample["name"], 0) + (sample["tokens"] or 0)
+        summary = {}
+        for name, seconds in sorted(by_name.items()):
+            summary[name] = {
+                "count": len(seconds),
+                "mean": sum(seconds) / len(seconds),
+                "p50": percentile(seconds, 50),
+                "p95": percentile(seconds, 95),
+                "p99": percentile(seconds, 99),
+            }
+            if name in tokens:
+                summary[name]["tokens"] = tokens[name]
+        return summary
+
+    def prometheus(self):
+        """The summary in Prometheus text exposition format"""
+        lines = ["# HELP ironlady_step_seconds Duration of request steps (recent samples)",
+                 "# TYPE ironlady_step_seconds summary"]
+        token_lines = []
+        for name, stats in self.summary().items():
+            for q in ("p50", "p95", "p99"):
+                quantile = int(q[1:]) / 100
+                lines.append(f'ironlady_step_seconds{{step="{name}",quantile="{quantile:g}"}} {stats[q]:.6f}')
+            lines.append(f'ironlady_step_seconds_sum{{step="{name}"}} {stats["mean"] * stats["count"]:.6f}')
+            lines.append(f'ironlady_step_seconds_count{{step="{name}"}} {stats["count"]}')
+            if "tokens" in stats:
+                token_lines.append(f'ironlady_step_tokens{{step="{name}"}} {stats["tokens"]}')
+        if token_lines:
+            lines += ["# HELP ironlady_step_tokens LLM tokens used by a step (recent samples)",
+                      "# TYPE ironlady_step_tokens gauge"] + token_lines
+        return "\n".join(lines) + "\n"
+
+
+# One tracer per process, shared by the app, the API and the core
+tracer = Tracer(**config.TRACING)
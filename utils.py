@@ -1,5 +1,5 @@
 import urllib.parse
-import re
+import math
 
 def get_whatsapp_link(user_name, program_name):
     """Generate WhatsApp deep link with pre-filled message"""
@@ -14,12 +14,10 @@ def generate_share_text(user_name, match_score):
     text = f"I just discovered my personalized leadership path with Iron Lady's AI Navigator! 🎯 Got a {match_score}% match score. Ready to transform my career! 💪 #IronLady #WomenInLeadership #CareerGrowth"
     return text
 
-def calculate_match_score(ai_response):
-    """Extract match score from AI response or calculate default"""
-    # Try to find percentage in response
-    match = re.search(r'(\d{2,3})%', ai_response)
-    if match:
-        return int(match.group(1))
-    
-    # Default score based on response length and quality
-    return 92  # High confidence default
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]